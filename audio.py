@@ -0,0 +1,204 @@
+# audio.py - تلفظ کلمات با موتور TTS آفلاین (espeak-ng) و کش فایل‌های صوتی روی دیسک
+#
+# فایل‌های WAV پیش از رسیدن کارت‌ها در یک process pool ساخته می‌شوند و با کلید محتوایی
+# (هش موتور، صدا، سرعت و متن) در پوشه audio_cache کنار دیتابیس ذخیره می‌شوند؛ هنگام نمایش کارت
+# فقط فایل آماده پخش می‌شود و اگر هنوز ساخته نشده باشد تلفظ آن کارت رد می‌شود (هیچ‌وقت منتظر
+# ساخت صدا نمی‌مانیم). حجم کش با حذف فایل‌هایی که مدت بیشتری استفاده نشده‌اند (LRU بر اساس
+# زمان آخرین استفاده) زیر audio.cache_mb نگه داشته می‌شود.
+#
+# espeak-ng اختیاری است؛ اگر پیدا نشود، تلفظ غیرفعال می‌ماند.
+#
+#   python audio.py say "serendipity"
+#   python audio.py prefetch           ساخت صدای کارت‌های سررسید
+#   python audio.py stats
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import review_engine
+from settings import get_settings
+
+ENGINE = shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+def available():
+    return ENGINE is not None
+
+
+def cache_dir_for(db_path):
+    """پوشه کش صدا کنار فایل دیتابیس"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "audio_cache")
+
+
+def synthesize(text, path, voice, speed):
+    """ساخت فایل WAV برای text (در پردازش کارگر اجرا می‌شود)؛ فایل به صورت اتمیک جایگزین می‌شود"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    subprocess.run([ENGINE, "-v", voice, "-s", str(speed), "-w", tmp_path, "--", text],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def play_file(path):
+    """پخش غیرهم‌زمان یک فایل WAV (بدون انتظار برای پایان پخش)"""
+    try:
+        if sys.platform == "win32":
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            return True
+        for player in (("afplay",), ("aplay", "-q"), ("paplay",)):
+            if shutil.which(player[0]):
+                subprocess.Popen([*player, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                return True
+    except Exception as e:
+        print(f"Error playing audio: {e}")
+    return False
+
+
+class PronunciationCache:
+    """کش محتوایی فایل‌های تلفظ با ساخت پیش‌دستانه در پس‌زمینه"""
+
+    def __init__(self, db_path=None, cache_dir=None, workers=2):
+        db_path = db_path or review_engine.DB_PATH
+        settings = get_settings(db_path)
+        self.cache_dir = cache_dir or cache_dir_for(db_path)
+        self.voice = settings.get("audio.voice")
+        self.speed = settings.get("audio.speed")
+        self.max_bytes = settings.get("audio.cache_mb") * 1024 * 1024
+        self.workers = workers
+        self._pool = None
+        # path -> Future برای فایل‌هایی که در حال ساخت هستند
+        self._pending = {}
+
+    def path_for(self, text):
+        key = hashlib.sha1(f"{ENGINE}|{self.voice}|{self.speed}|{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+
+    def cached(self, text):
+        """مسیر فایل آماده یا None (بدون ساخت)؛ زمان استفاده برای LRU به‌روز می‌شود"""
+        path = self.path_for(text)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def prefetch(self, texts):
+        """ارسال متن‌هایی که هنوز فایل ندارند به process pool"""
+        if not available():
+            return []
+        futures = []
+        for text in dict.fromkeys(t for t in texts if t):
+            path = self.path_for(text)
+            if path in self._pending or os.path.exists(path):
+                continue
+            if self._pool is None:
+                # spawn به جای fork: پردازش اصلی thread های Qt و SQLite دارد
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                future = self._pool.submit(synthesize, text, path, self.voice, self.speed)
+            except Exception as e:
+                # pool خراب شده (مثلاً پردازش کارگر از بین رفته)؛ در فراخوانی بعدی دوباره ساخته می‌شود
+                print(f"Error synthesizing audio: {e}")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                break
+            future.add_done_callback(lambda f, path=path: self._done(path, f))
+            self._pending[path] = future
+            futures.append(future)
+        return futures
+
+    def _done(self, path, future):
+        self._pending.pop(path, None)
+        if not future.cancelled() and future.exception():
+            print(f"Error synthesizing audio: {future.exception()}")
+
+    def evict(self):
+        """حذف قدیمی‌ترین فایل‌ها (زمان آخرین استفاده) تا حجم کش زیر سقف برسد. خروجی: تعداد حذف‌شده"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        count = size = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                count += 1
+                size += os.path.getsize(os.path.join(root, name))
+        return {"files": count, "bytes": size, "pending": len(self._pending)}
+
+    def close(self, wait_for_pending=False):
+        """توقف process pool (کارهای شروع‌نشده لغو می‌شوند) و اعمال سقف حجم"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait_for_pending, cancel_futures=not wait_for_pending)
+            self._pool = None
+        self.evict()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind pronunciation cache")
+    parser.add_argument("--db", default=review_engine.DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    say = sub.add_parser("say")
+    say.add_argument("text")
+    prefetch = sub.add_parser("prefetch")
+    prefetch.add_argument("--cards", type=int, default=200)
+    sub.add_parser("stats")
+    sub.add_parser("evict")
+    args = parser.parse_args(argv)
+
+    if not available() and args.command in ("say", "prefetch"):
+        print("espeak-ng was not found; install it to enable pronunciation.")
+        return 1
+
+    cache = PronunciationCache(args.db)
+    try:
+        if args.command == "say":
+            wait(cache.prefetch([args.text]))
+            path = cache.cached(args.text)
+            if path:
+                play_file(path)
+        elif args.command == "prefetch":
+            db = review_engine.DatabaseManager(args.db)
+            try:
+                words = [row[0] for row in db.get_cards_for_review(args.cards)]
+            finally:
+                db.close()
+            futures = cache.prefetch(words)
+            wait(futures)
+            print(f"generated {len(futures)} clips for {len(words)} cards")
+        elif args.command == "evict":
+            print(f"removed {cache.evict()} clips")
+        print(cache.stats())
+    finally:
+        cache.close(wait_for_pending=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
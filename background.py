@@ -5,17 +5,19 @@ from PyQt5.QtGui import QPainter, QColor, QFont
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtCore import Qt
 
+from instrument import timed
+
 
 class AnimatedBackground(QWidget):
     """پس‌زمینه‌ای که حروف انگلیسی رنگی رو پایین میاره (تم تیره)"""
 
-    def __init__(self, parent=None, count=35):
+    def __init__(self, parent=None, count=35, interval=50):
         super().__init__(parent)
         self.letters = []
         self.count = count
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_letters)
-        self.timer.start(50)  # به‌روزرسانی در هر 50 میلی‌ثانیه
+        self.timer.start(interval)  # به‌روزرسانی در هر interval میلی‌ثانیه (پیش‌فرض 50)
         self.generate_letters()
         # مهم: برای دیدن حروف باید پس‌زمینه خود ویجت شفاف باشد
         self.setAttribute(Qt.WA_NoSystemBackground)
@@ -44,6 +46,7 @@ class AnimatedBackground(QWidget):
         self.generate_letters()
         super().resizeEvent(event)
 
+    @timed("frame.background")
     def update_letters(self):
         """به‌روزرسانی موقعیت حروف (حرکت به سمت پایین)"""
         h, w = max(1, self.height()), max(1, self.width())
@@ -54,6 +57,7 @@ class AnimatedBackground(QWidget):
                 l["x"] = random.uniform(0, w)
         self.update()
 
+    @timed("paint.background")
     def paintEvent(self, event):
         """رسم حروف"""
         painter = QPainter(self)
@@ -74,13 +78,13 @@ class AnimatedBackground(QWidget):
 class AnimatedBackground2(QWidget):
     """پس‌زمینه‌ای که حروف انگلیسی رنگی رو پایین میاره (تم روشن/سفید)"""
 
-    def __init__(self, parent=None, count=35):
+    def __init__(self, parent=None, count=35, interval=50):
         super().__init__(parent)
         self.letters = []
         self.count = count
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_letters)
-        self.timer.start(50)  # به‌روزرسانی در هر 50 میلی‌ثانیه
+        self.timer.start(interval)  # به‌روزرسانی در هر interval میلی‌ثانیه (پیش‌فرض 50)
         self.generate_letters()
         # مهم: برای دیدن حروف باید پس‌زمینه خود ویجت شفاف باشد
         self.setAttribute(Qt.WA_NoSystemBackground)
@@ -109,6 +113,7 @@ class AnimatedBackground2(QWidget):
         self.generate_letters()
         super().resizeEvent(event)
 
+    @timed("frame.background")
     def update_letters(self):
         """به‌روزرسانی موقعیت حروف (حرکت به سمت پایین)"""
         h, w = max(1, self.height()), max(1, self.width())
@@ -119,6 +124,7 @@ class AnimatedBackground2(QWidget):
                 l["x"] = random.uniform(0, w)
         self.update()
 
+    @timed("paint.background")
     def paintEvent(self, event):
         """رسم حروف"""
         painter = QPainter(self)
@@ -0,0 +1,303 @@
+# benchmark.py - بنچمارک تکرارپذیر مسیرهای داغ با دیتابیس‌های مصنوعی
+#
+# استفاده:
+#   python benchmark.py --sizes 1k,100k --out bench.json
+#   python benchmark.py --sizes 1k,100k,1m --compare baseline.json
+#
+# برای هر اندازه یک فایل "flash cards.db" مصنوعی (با توزیع واقعی تاریخ مرور) ساخته
+# و زمان هر مسیر داغ چند بار اندازه‌گیری می‌شود. خروجی JSON برای مقایسه بین commitها است.
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+
+# تا پیش از ساخت QApplication حالت offscreen را فعال کن (بدون نیاز به نمایشگر)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from review import REVIEW_INTERVALS_DAYS, REVIEW_THRESHOLD
+from migrations import upgrade
+
+SIZE_ALIASES = {"k": 1_000, "m": 1_000_000}
+
+# واژه‌های نمونه برای ساخت کلمات و معانی مصنوعی
+_SYLLABLES = ["ka", "ro", "mi", "te", "sa", "lo", "ven", "dor", "pli", "ax", "un", "bre", "qu", "is", "ent"]
+_PERSIAN_SYLLABLES = ["کتاب", "دار", "می", "خان", "گل", "ستار", "ه", "نو", "رو", "بان", "ی", "گاه"]
+
+# وزن فواصل: بیشتر کارت‌ها در پله‌های پایین هستند
+_INTERVAL_WEIGHTS = [30, 22, 16, 12, 9, 6, 5]
+
+
+def parse_size(text):
+    """'1k' -> 1000 ، '1m' -> 1000000"""
+    text = text.strip().lower()
+    if text[-1] in SIZE_ALIASES:
+        return int(float(text[:-1]) * SIZE_ALIASES[text[-1]])
+    return int(text)
+
+
+def _synthetic_row(rng, code, today):
+    word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+    meaning = " ".join(
+        "".join(rng.choice(_PERSIAN_SYLLABLES) for _ in range(rng.randint(1, 3)))
+        for _ in range(rng.randint(1, 2))
+    )
+    interval = rng.choices(REVIEW_INTERVALS_DAYS, weights=_INTERVAL_WEIGHTS)[0]
+    count = rng.randint(1, REVIEW_THRESHOLD)
+
+    # توزیع تاریخ مرور: حدود ۲۰٪ عقب‌افتاده، ۲٪ بدون تاریخ، بقیه در بازه فاصله فعلی آینده
+    roll = rng.random()
+    if roll < 0.02:
+        next_review = None
+    elif roll < 0.22:
+        next_review = (today - timedelta(days=rng.randint(0, 60))).strftime("%Y-%m-%d 00:00:00")
+    else:
+        next_review = (today + timedelta(days=rng.randint(1, interval))).strftime("%Y-%m-%d 00:00:00")
+    return code, word, next_review, count, interval, meaning
+
+
+def build_synthetic_db(path, size, seed=1234):
+    """ساخت دیتابیس مصنوعی با همان اسکیمای my_table برنامه"""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    today = datetime(2025, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+                 CREATE TABLE "my_table"
+                 (
+                     "code"             INTEGER,
+                     "words"            TEXT,
+                     "next_time_review" TEXT,
+                     "count"            INTEGER,
+                     "review_intervals" INTEGER,
+                     "meaning"          TEXT
+                 )
+                 """)
+    batch = []
+    for code in range(1, size + 1):
+        batch.append(_synthetic_row(rng, code, today))
+        if len(batch) >= 10_000:
+            conn.executemany("INSERT INTO my_table VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO my_table VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    # ارتقای اسکیما (ستون‌های یکسان‌شده، ایندکس‌ها) همین‌جا انجام می‌شود تا در زمان‌سنجی حساب نشود
+    upgrade(conn)
+    conn.close()
+
+
+def measure(func, repeat):
+    """اجرای func به تعداد repeat و بازگرداندن آمار زمانی (میلی‌ثانیه)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+# ======================= Benchmarks =======================
+def bench_database(path, size, repeat, rng):
+    """مسیرهای داغ لایه دیتابیس (بدون Qt)"""
+    import edit
+    import review
+
+    results = {}
+    review_db = review.DatabaseManager(path)
+    edit_db = edit.DatabaseManager(path)
+
+    results["get_cards_for_review[50]"] = measure(lambda: review_db.get_cards_for_review(50), repeat)
+    results["get_cards_for_review[1000]"] = measure(lambda: review_db.get_cards_for_review(1000), repeat)
+
+    cards = review_db.get_cards_for_review(max(repeat, 1))
+
+    def update_one():
+        _, _, code, interval, count, _ = rng.choice(cards)
+        review_db.update_review_stats(code, interval, count)
+
+    results["update_review_stats"] = measure(update_one, repeat)
+
+    results["search_words[word]"] = measure(lambda: edit_db.search_words("dor"), repeat)
+    results["search_words[meaning]"] = measure(lambda: edit_db.search_words("کتاب"), repeat)
+    results["search_words[miss]"] = measure(lambda: edit_db.search_words("zzzzq"), repeat)
+    results["get_all_words"] = measure(edit_db.get_all_words, max(1, repeat // 5))
+    # صفحه‌بندی Show All: صفحه اول، صفحه آخر و تعداد کل
+    results["get_page[first]"] = measure(lambda: edit_db.get_page("word"), repeat)
+    results["get_page[last]"] = measure(lambda: edit_db.get_page("word", before=edit.LAST_PAGE), repeat)
+    results["count_words"] = measure(edit_db.count_words, repeat)
+    due_soon = edit.RowFilter(interval_min=30, due_to=edit.parse_day("+3"))
+    results["get_page[filtered]"] = measure(
+        lambda: edit_db.get_page("next_review", filters=due_soon, matching=edit_db.count_words(due_soon)), repeat)
+    # یک جلسه کامل ۵۰ کارتی روی موتور مرور بدون رابط گرافیکی (store درون‌حافظه‌ای)
+    from review_engine import MemoryStore, ReviewSession
+    due_rows = review_db.get_cards_for_review(1000)
+
+    def simulated_session():
+        session = ReviewSession(MemoryStore(due_rows), num_cards=50, show_time=0, rng=rng)
+        session.load()
+        while not session.finished:
+            session.flip()
+            session.grade_pass()
+            session.advance()
+
+    results["review_session_simulated[50]"] = measure(simulated_session, repeat)
+
+    results["add_word"] = measure(lambda: edit_db.add_word(f"bench{rng.random()}", "آزمون", REVIEW_THRESHOLD),
+                                  repeat)
+
+    review_db.close()
+    edit_db.close()
+    return results
+
+
+def bench_qt(path, size, repeat, max_populate):
+    """مسیرهای داغ رابط گرافیکی در حالت offscreen"""
+    from PyQt5.QtWidgets import QApplication
+    import edit
+    from background import AnimatedBackground
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+
+    # صفحه ویرایش با دیتابیس مصنوعی ساخته می‌شود
+    edit.DB_PATH = path
+    page = edit.EditRemovePage(None, None)
+
+    if size <= max_populate:
+        def show_all():
+            # populate_table جدول را تکه‌تکه پر می‌کند؛ تا پایان کامل صبر کن
+            page.populate_table(page.db.get_all_words())
+            while page.populating:
+                app.processEvents()
+
+        results["get_all_words+populate_table"] = measure(show_all, max(1, repeat // 5))
+
+    def first_page():
+        page.populate_table(page.db.get_page().rows)
+        while page.populating:
+            app.processEvents()
+
+    results["get_page+populate_table"] = measure(first_page, repeat)
+    page.db.close()
+
+    bg = AnimatedBackground(None, count=35)
+    bg.timer.stop()
+    bg.resize(900, 600)
+    bg.generate_letters()
+
+    def frame():
+        # grab() رندر واقعی paintEvent را روی یک pixmap انجام می‌دهد
+        bg.update_letters()
+        bg.grab()
+
+    results["background_frame"] = measure(frame, repeat * 5)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path, threshold):
+    """مقایسه با یک خروجی قبلی؛ خروجی: لیست پسرفت‌ها (نام، قبلی، فعلی، نسبت)"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for size, benches in current["results"].items():
+        for name, stats in benches.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if not old or not old.get("median_ms"):
+                continue
+            ratio = stats["median_ms"] / old["median_ms"]
+            marker = "  REGRESSION" if ratio > threshold else ""
+            print(f"{size:>8} {name:<32} {old['median_ms']:>10.3f} -> {stats['median_ms']:>10.3f} ms "
+                  f"(x{ratio:.2f}){marker}")
+            if ratio > threshold:
+                regressions.append((size, name, old["median_ms"], stats["median_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind hot-path benchmarks")
+    parser.add_argument("--sizes", default="1k,100k", help="comma separated deck sizes, e.g. 1k,100k,1m")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--workdir", default=None, help="where synthetic DBs are kept (default: temp dir)")
+    parser.add_argument("--reuse", action="store_true", help="reuse existing synthetic DBs in --workdir")
+    parser.add_argument("--no-qt", action="store_true", help="skip offscreen Qt benchmarks")
+    parser.add_argument("--max-populate", type=parse_size, default=parse_size("100k"),
+                        help="largest deck for which populate_table is timed")
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", default=None, help="previous JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="median ratio that counts as regression")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="leximind-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    for label in args.sizes.split(","):
+        size = parse_size(label)
+        path = os.path.join(workdir, f"flash cards {size}.db")
+        if not (args.reuse and os.path.exists(path)):
+            start = time.perf_counter()
+            build_synthetic_db(path, size, args.seed)
+            print(f"built {path} in {time.perf_counter() - start:.1f}s")
+        elif args.reuse:
+            print(f"reusing {path}")
+
+        rng = random.Random(args.seed)
+        results = bench_database(path, size, args.repeat, rng)
+        if not args.no_qt:
+            results.update(bench_qt(path, size, args.repeat, args.max_populate))
+        output["results"][label.strip().lower()] = results
+
+        for name, stats in results.items():
+            print(f"{label:>8} {name:<32} median {stats['median_ms']:>10.3f} ms  min {stats['min_ms']:>10.3f} ms")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(output, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
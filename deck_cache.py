@@ -0,0 +1,501 @@
+# deck_cache.py - کش درون‌حافظه‌ای deck (ستونی) با write-through به SQLite
+#
+# جدول my_table یک بار در ساختار ستونی (لیست/array برای هر ستون) بارگذاری می‌شود و
+# پرس‌وجوهای due/search/list از حافظه پاسخ داده می‌شوند. DatabaseManager ها همچنان
+# نوشتن را روی SQLite انجام می‌دهند و بلافاصله کش را با apply_* به‌روز می‌کنند.
+#
+# هم‌گامی با دیتابیس: هر تغییر my_table شمارنده version در sync_meta را بالا می‌برد (trigger های sync.py) و
+# version ردیف را برابر آن می‌کند. کش آخرین شمارنده‌ای را که دیده نگه می‌دارد؛ وقتی PRAGMA data_version یا
+# stat فایل تغییر کند، فقط ردیف‌ها و tombstone های با version بزرگ‌تر (از ایندکس version) به همراه کدهایی که
+# apply_* در این فاصله تغییر داده‌اند دوباره خوانده می‌شوند. پس هر commit، از هر اتصال یا پردازشی، دیده
+# می‌شود و نوشتن‌های خود برنامه هم با دیتابیس تطبیق داده می‌شوند. اگر فایل جایگزین شده، شمارنده عقب رفته
+# یا تعداد تغییرات زیاد باشد، کش کامل بارگذاری می‌شود.
+#
+# هنگام خروج، کش در یک snapshot دودویی (snapshot.py) ذخیره می‌شود؛ بارگذاری بعدی اگر فایل
+# دیتابیس تغییر نکرده باشد، ستون‌ها را مستقیماً از mmap می‌خواند و پرس‌وجوهای due/search را
+# روی آن پاسخ می‌دهد. اولین نوشتن، ستون‌ها را به لیست‌های معمولی تبدیل و mmap را می‌بندد.
+
+import os
+import json
+import heapq
+import threading
+from array import array
+from datetime import datetime
+
+from instrument import timer, count
+from migrations import connect
+from normalize import normalize_text
+import snapshot
+
+# با LEXIMIND_NO_CACHE=1 همه پرس‌وجوها مستقیم به SQLite می‌روند
+CACHE_ENABLED = os.environ.get("LEXIMIND_NO_CACHE", "") in ("", "0")
+
+_COLUMNS = "code, words, meaning, review_intervals, count, next_time_review"
+# بیش از این تعداد ردیف تغییرکرده (یا یک‌چهارم جدول) به جای خواندن تغییرات، بارگذاری کامل
+CATCH_UP_ROWS = 20000
+
+
+def _as_int(value):
+    """تبدیل مقدار به int مانند affinity ستون INTEGER در SQLite"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _code_sort_key(code):
+    # ترتیب ORDER BY code در SQLite: اعداد قبل از متن
+    return (0, code, "") if isinstance(code, (int, float)) else (1, 0, str(code))
+
+
+class DeckCache:
+    """نگه‌داری ستونی my_table در حافظه"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        # اتصال مخصوص کش (فقط برای بارگذاری و تشخیص تغییرات بیرونی)
+        self._conn = connect(db_path, check_same_thread=False)
+        self._stamp = None
+        self._data_version = None
+        # شمارنده version در sync_meta که کش با آن هم‌گام است
+        self._version = None
+        # کدهایی که apply_* پس از آخرین هم‌گامی تغییر داده‌اند (در هم‌گامی بعدی با دیتابیس تطبیق داده می‌شوند)
+        self._touched = set()
+        self.loaded = False
+        self.snapshot_path = snapshot.snapshot_path_for(db_path)
+        # snapshot باز‌شده (تا اولین نوشتن)
+        self._snapshot = None
+        self._reset()
+
+    def _reset(self):
+        self.codes = []
+        self.words = []
+        self.meanings = []
+        self.intervals = array("q")
+        self.counts = array("q")
+        self.next_reviews = []
+        # ستون‌های یکسان‌شده (words_norm / meaning_norm) برای جستجو
+        self._words_norm = []
+        self._meanings_norm = []
+        # 1 برای ردیف‌های زنده، 0 برای ردیف‌های حذف‌شده
+        self._alive = bytearray()
+        # code (به صورت str) -> شماره ردیف؛ None یعنی هنوز ساخته نشده (بارگذاری از snapshot)
+        self._row_of = {}
+        # تعداد ردیف‌های حذف‌شده (تا بارگذاری بعدی)
+        self._deleted = 0
+
+    # -------------------- بارگذاری و اعتبارسنجی --------------------
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _content_version(self):
+        row = self._conn.execute("SELECT value FROM sync_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def _observe(self):
+        """(data_version، stat فایل)؛ پیش از خواندن گرفته می‌شود تا commit های بعد از آن دوباره بررسی شوند"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0], self._file_stamp()
+
+    def load(self):
+        """بارگذاری کامل جدول در ساختار ستونی (از snapshot اگر با فایل دیتابیس بخواند)"""
+        with self._lock, timer("cache.load"):
+            self._close_snapshot()
+            self._reset()
+            self._touched.clear()
+            self._data_version, self._stamp = self._observe()
+            if self._attach_snapshot():
+                return
+            # شمارنده و ردیف‌ها در یک تراکنش خواندنی تا با هم سازگار باشند
+            self._conn.execute("BEGIN")
+            try:
+                self._version = self._content_version()
+                for code, word, meaning, interval, cnt, next_review, word_norm, meaning_norm in self._conn.execute(
+                        f"SELECT {_COLUMNS}, words_norm, meaning_norm FROM my_table"):
+                    self._append(code, word, meaning, interval, cnt, next_review, word_norm, meaning_norm)
+            finally:
+                self._conn.execute("COMMIT")
+            self.loaded = True
+
+    # -------------------- snapshot --------------------
+    def _schema_version(self):
+        return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _attach_snapshot(self):
+        """استفاده مستقیم از ستون‌های snapshot (بدون خواندن my_table)"""
+        snap = snapshot.Snapshot.open(self.snapshot_path, self._file_stamp(), self._schema_version())
+        if snap is None:
+            return False
+        version = self._content_version()
+        if snap.content_version is None or snap.content_version != version:
+            snap.close()
+            return False
+        columns = snap.columns
+        self.codes, self.words, self.meanings = columns["codes"], columns["words"], columns["meanings"]
+        self.next_reviews = columns["next_reviews"]
+        self._words_norm, self._meanings_norm = columns["words_norm"], columns["meanings_norm"]
+        self.intervals, self.counts = snap.intervals, snap.counts
+        self._alive = bytearray(b"\x01") * snap.rows
+        self._row_of = None
+        self._snapshot = snap
+        count("cache.snapshot_hit")
+        self._version = version
+        self.loaded = True
+        return True
+
+    def _close_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _materialize(self):
+        """پیش از اولین نوشتن: تبدیل ستون‌های snapshot به لیست/array و بستن mmap"""
+        if self._snapshot is None:
+            return
+        with timer("cache.materialize"):
+            self._index()
+            self.codes, self.words, self.meanings = list(self.codes), list(self.words), list(self.meanings)
+            self.next_reviews = list(self.next_reviews)
+            self._words_norm, self._meanings_norm = list(self._words_norm), list(self._meanings_norm)
+            self.intervals, self.counts = array("q", self.intervals), array("q", self.counts)
+            self._close_snapshot()
+
+    def _index(self):
+        """code -> شماره ردیف (برای snapshot فقط هنگام نیاز ساخته می‌شود)"""
+        if self._row_of is None:
+            self._row_of = {str(code): i for i, code in enumerate(self.codes)}
+        return self._row_of
+
+    def save_snapshot(self):
+        """
+        نوشتن snapshot از ردیف‌های زنده. ابتدا تغییرات دیتابیس خوانده می‌شوند (ensure_fresh) و snapshot
+        با مهر فایل و شمارنده sync همان هم‌گامی نوشته می‌شود؛ commit های بعد از آن مهر را باطل می‌کنند.
+        (اگر از snapshot بارگذاری شده و نوشتنی انجام نشده، همان فایل معتبر است.)
+        """
+        with self._lock:
+            if not self.loaded:
+                return False
+            self.ensure_fresh()
+            if self._snapshot is not None:
+                return False
+            stamp = self._stamp
+            live = list(self._live_rows())
+            columns = {"intervals": [self.intervals[i] for i in live], "counts": [self.counts[i] for i in live]}
+            for name, column in (("codes", self.codes), ("words", self.words), ("meanings", self.meanings),
+                                 ("next_reviews", self.next_reviews), ("words_norm", self._words_norm),
+                                 ("meanings_norm", self._meanings_norm)):
+                columns[name] = [column[i] for i in live]
+            try:
+                with timer("cache.save_snapshot", rows=len(live)):
+                    snapshot.write(self.snapshot_path, stamp, self._schema_version(), self._version, columns)
+            except OSError as e:
+                print(f"Error saving snapshot: {e}")
+                return False
+            return True
+
+    def ensure_fresh(self):
+        """اگر دیتابیس پس از آخرین هم‌گامی تغییر کرده باشد، تغییرات را می‌خواند (یا کش را دوباره بارگذاری می‌کند)"""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+                return
+            data_version, stamp = self._observe()
+            if data_version == self._data_version and stamp == self._stamp and not self._touched:
+                return
+            replaced = stamp is None or self._stamp is None or stamp[0] != self._stamp[0]
+            if replaced or not self._catch_up():
+                count("cache.invalidate")
+                self.load()
+                return
+            self._data_version, self._stamp = data_version, stamp
+
+    def _catch_up(self):
+        """خواندن ردیف‌هایی که پس از آخرین هم‌گامی تغییر کرده‌اند. خروجی: False اگر بارگذاری کامل لازم است"""
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            version = self._content_version()
+            if version is None or self._version is None or version < self._version:
+                return False
+            if version == self._version and not self._touched:
+                return True
+            touched = json.dumps(sorted(self._touched), ensure_ascii=False)
+            rows = conn.execute(f"""
+                                SELECT {_COLUMNS}, words_norm, meaning_norm
+                                FROM my_table
+                                WHERE version > ?
+                                UNION ALL
+                                SELECT {_COLUMNS}, words_norm, meaning_norm
+                                FROM my_table
+                                WHERE version <= ?
+                                  AND code IN (SELECT value FROM json_each(?))
+                                LIMIT ?
+                                """, (self._version, self._version, touched, CATCH_UP_ROWS + 1)).fetchall()
+            deleted = [code for (code,) in conn.execute(
+                "SELECT code FROM sync_tombstones WHERE version > ? LIMIT ?", (self._version, CATCH_UP_ROWS + 1))]
+            codes = [str(row[0]) for row in rows]
+            if len(codes) + len(deleted) > max(CATCH_UP_ROWS, len(self._alive) // 4):
+                return False
+            # کش ردیف‌ها را با code پیدا می‌کند؛ اگر کد تغییرکرده‌ای در چند ردیف باشد (یا ردیف حذف‌شده هم‌کدی
+            # داشته باشد) ردیف‌ها از هم جدا نمی‌شوند
+            ambiguous = conn.execute("""
+                                     SELECT 1
+                                     FROM my_table
+                                     WHERE code IN (SELECT value FROM json_each(?))
+                                     GROUP BY code
+                                     HAVING COUNT(*) > 1
+                                         OR code IN (SELECT value FROM json_each(?))
+                                     LIMIT 1
+                                     """, (json.dumps(codes + deleted, ensure_ascii=False),
+                                           json.dumps(deleted, ensure_ascii=False))).fetchone()
+        finally:
+            conn.execute("COMMIT")
+        if ambiguous:
+            return False
+        with timer("cache.catch_up", rows=len(codes) + len(deleted)):
+            self._materialize()
+            index = self._index()
+            for code in (self._touched | set(deleted)) - set(codes):
+                self._kill(index.pop(code, None))
+            for row in rows:
+                i = index.get(str(row[0]))
+                if i is None:
+                    self._append(*row)
+                else:
+                    self._set(i, *row[1:])
+        self._version = version
+        self._touched.clear()
+        count("cache.catch_up")
+        return True
+
+    def _set(self, i, word, meaning, interval, cnt, next_review, word_norm=None, meaning_norm=None):
+        # متن‌ها فقط اگر تغییر کرده باشند دوباره یکسان‌سازی می‌شوند
+        if word != self.words[i] or meaning != self.meanings[i] or word_norm is not None:
+            self.words[i] = word
+            self.meanings[i] = meaning
+            self._words_norm[i] = word_norm if word_norm is not None else normalize_text(word)
+            self._meanings_norm[i] = meaning_norm if meaning_norm is not None else normalize_text(meaning)
+        self.intervals[i] = _as_int(interval)
+        self.counts[i] = _as_int(cnt)
+        self.next_reviews[i] = next_review
+
+    def _kill(self, i):
+        if i is not None:
+            # ردیف فقط علامت‌گذاری می‌شود تا شماره ردیف‌های دیگر جابه‌جا نشوند
+            self._alive[i] = 0
+            self._words_norm[i] = ""
+            self._meanings_norm[i] = ""
+            self._deleted += 1
+
+    def _append(self, code, word, meaning, interval, cnt, next_review, word_norm=None, meaning_norm=None):
+        self._row_of[str(code)] = len(self.codes)
+        self._alive.append(1)
+        self.codes.append(code)
+        self.words.append(word)
+        self.meanings.append(meaning)
+        self.intervals.append(_as_int(interval))
+        self.counts.append(_as_int(cnt))
+        self.next_reviews.append(next_review)
+        # هنگام بارگذاری از ستون‌های سایه خوانده می‌شوند؛ برای نوشتن‌های جدید همین‌جا محاسبه می‌شوند
+        self._words_norm.append(word_norm if word_norm is not None else normalize_text(word))
+        self._meanings_norm.append(meaning_norm if meaning_norm is not None else normalize_text(meaning))
+
+    def _row(self, i):
+        return (self.codes[i], self.words[i], self.meanings[i],
+                self.intervals[i], self.counts[i], self.next_reviews[i])
+
+    def _live_rows(self):
+        alive = self._alive
+        return (i for i in range(len(alive)) if alive[i])
+
+    # -------------------- پرس‌وجوها --------------------
+    def row_count(self):
+        self.ensure_fresh()
+        return len(self.codes) - self._deleted
+
+    def contains_code(self, code):
+        self.ensure_fresh()
+        with self._lock:
+            return str(code) in self._index()
+
+    def get_all_words(self):
+        """معادل SELECT ... ORDER BY code"""
+        self.ensure_fresh()
+        with self._lock:
+            rows = [self._row(i) for i in self._live_rows()]
+        rows.sort(key=lambda r: _code_sort_key(r[0]))
+        return rows
+
+    def search_words(self, query):
+        """جستجوی زیررشته در کلمه یا معنی (روی متن یکسان‌شده)"""
+        self.ensure_fresh()
+        q = normalize_text(query)
+        with self._lock:
+            if self._snapshot is not None:
+                return [self._row(i) for i in self._snapshot_matches(q)]
+            words, meanings = self._words_norm, self._meanings_norm
+            return [self._row(i) for i in self._live_rows() if q in words[i] or q in meanings[i]]
+
+    def _snapshot_matches(self, q):
+        """جستجو مستقیم روی بایت‌های snapshot؛ شماره ردیف‌ها به ترتیب"""
+        return sorted(set(self._words_norm.find(q)) | set(self._meanings_norm.find(q)))
+
+    def iter_search_words(self, query, chunk_size=200, scan_size=20000):
+        """
+        نسخه تکه‌تکه search_words: جدول در برش‌های scan_size پیمایش می‌شود (قفل فقط در طول هر برش
+        نگه داشته می‌شود) و نتایج در تکه‌های حداکثر chunk_size تحویل داده می‌شوند.
+        """
+        self.ensure_fresh()
+        q = normalize_text(query)
+        with self._lock:
+            rows = [self._row(i) for i in self._snapshot_matches(q)] if self._snapshot is not None else None
+        if rows is not None:
+            for start in range(0, len(rows), chunk_size):
+                yield rows[start:start + chunk_size]
+            return
+        pending = []
+        start = 0
+        while True:
+            with self._lock:
+                end = min(start + scan_size, len(self._alive))
+                alive, words, meanings = self._alive, self._words_norm, self._meanings_norm
+                for i in range(start, end):
+                    if alive[i] and (q in words[i] or q in meanings[i]):
+                        pending.append(self._row(i))
+            while len(pending) >= chunk_size:
+                yield pending[:chunk_size]
+                pending = pending[chunk_size:]
+            if end <= start or end >= len(self._alive):
+                break
+            start = end
+        if pending:
+            yield pending
+
+    def get_cards_for_review(self, num_cards, today=None):
+        """
+        کارت‌های سررسید (تاریخ گذشته، امروز یا NULL) به ترتیب review_intervals.
+        خروجی: (words, meaning, code, review_intervals, count, next_time_review)
+        """
+        self.ensure_fresh()
+        today = today or datetime.now().strftime("%Y-%m-%d 23:59:59")
+        with self._lock:
+            nxt = self.next_reviews
+            if self._snapshot is not None:
+                # ترتیب ردیف‌ها مانند مسیر معمولی حفظ می‌شود
+                due = sorted(self._snapshot.due_rows(today))
+            else:
+                due = [i for i, (alive, n) in enumerate(zip(self._alive, nxt)) if alive and (n is None or n <= today)]
+            intervals = self.intervals
+            chosen = heapq.nsmallest(num_cards, due, key=intervals.__getitem__)
+            return [(self.words[i], self.meanings[i], self.codes[i],
+                     intervals[i], self.counts[i], nxt[i]) for i in chosen]
+
+    # -------------------- write-through --------------------
+    # نوشتن‌ها فوراً در حافظه دیده می‌شوند و کدهایشان در هم‌گامی بعدی با دیتابیس تطبیق داده می‌شوند
+    def apply_insert(self, code, word, meaning, interval, cnt, next_review, word_norm=None, meaning_norm=None):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._materialize()
+            i = self._index().get(str(code))
+            if i is None:
+                self._append(code, word, meaning, interval, cnt, next_review, word_norm, meaning_norm)
+            else:
+                # ردیف پیش از این در هم‌گامی با دیتابیس خوانده شده است
+                self._set(i, word, meaning, interval, cnt, next_review, word_norm, meaning_norm)
+            self._touched.add(str(code))
+
+    def apply_update(self, code, word, meaning, interval, cnt, next_review):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._materialize()
+            i = self._index().get(str(code))
+            if i is not None:
+                self._set(i, word, meaning, interval, cnt, next_review)
+            self._touched.add(str(code))
+
+    def apply_review(self, code, interval, cnt, next_review):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._materialize()
+            i = self._index().get(str(code))
+            if i is not None:
+                self.intervals[i] = _as_int(interval)
+                self.counts[i] = _as_int(cnt)
+                self.next_reviews[i] = next_review
+            self._touched.add(str(code))
+
+    def apply_delete(self, code):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._materialize()
+            self._kill(self._index().pop(str(code), None))
+            self._touched.add(str(code))
+
+    def apply_changes(self, pairs):
+        """
+        تغییرات گروهی (عملیات گروهی و Undo صفحه Edit) با یک قفل.
+        pairs: [(قبل، بعد)] که هر کدام (code, words, meaning, interval, count, next_time_review) یا None است
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            self._materialize()
+            index = self._index()
+            for old, new in pairs:
+                if new is None:
+                    self._kill(index.pop(str(old[0]), None))
+                    self._touched.add(str(old[0]))
+                    continue
+                code = new[0]
+                i = index.get(str(code))
+                if i is None:
+                    self._append(*new)
+                else:
+                    self._set(i, *new[1:])
+                self._touched.add(str(code))
+
+    def close(self):
+        with self._lock:
+            self._close_snapshot()
+            self._conn.close()
+
+
+# ======================= Registry =======================
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_path):
+    """کش مشترک هر فایل دیتابیس (یا None اگر کش غیرفعال باشد)"""
+    if not CACHE_ENABLED:
+        return None
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = DeckCache(key)
+        return cache
+
+
+def save_snapshots():
+    """ذخیره snapshot همه کش‌ها (هنگام خروج از برنامه، پس از آخرین نوشتن)"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.save_snapshot()
+
+
+def drop_cache(db_path):
+    """حذف کش یک فایل (مثلاً پس از جایگزینی کامل فایل)"""
+    with _caches_lock:
+        cache = _caches.pop(os.path.abspath(db_path), None)
+    if cache:
+        cache.close()
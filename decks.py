@@ -0,0 +1,309 @@
+# decks.py - پشتیبانی از چند deck (جدول جدا برای هر deck یا فایل SQLite جدا که در صورت نیاز ATTACH می‌شود)
+#
+# deck پیش‌فرض همان my_table در "flash cards.db" است. deck های دیگر در جدول decks ثبت می‌شوند:
+#   - بدون فایل: جدولی به نام deck_<id> در همان دیتابیس اصلی
+#   - با فایل: جدول my_table داخل فایل جداگانه که فقط هنگام نیاز با نام deck_<id> ATTACH می‌شود
+#
+# استفاده از خط فرمان:
+#   python decks.py list
+#   python decks.py create "Oxford 3000" --file "oxford.db"
+
+import os
+import sys
+import random
+import string
+import sqlite3
+import argparse
+from collections import OrderedDict
+from datetime import datetime
+
+from instrument import instrument_methods
+import review_engine
+from review_engine import next_review_state
+from migrations import connect
+from deck_cache import get_cache
+
+DEFAULT_DECK = "default"
+
+# SQLite به طور پیش‌فرض حداکثر ۱۰ دیتابیس ATTACH شده را می‌پذیرد
+MAX_ATTACHED = 8
+
+_CARD_TABLE_SQL = """
+                  CREATE TABLE IF NOT EXISTS {table}
+                  (
+                      "code"             INTEGER,
+                      "words"            TEXT,
+                      "next_time_review" TEXT,
+                      "count"            INTEGER,
+                      "review_intervals" INTEGER,
+                      "meaning"          TEXT
+                  )
+                  """
+
+
+@instrument_methods("db.decks")
+class DeckManager:
+    """ثبت deck ها، ATTACH در صورت نیاز و پرس‌وجوی ادغام‌شده کارت‌های سررسید"""
+
+    def __init__(self, db_path=None):
+        # مسیر در زمان اجرا خوانده می‌شود تا تغییر review_engine.DB_PATH (بنچمارک/تست) اعمال شود
+        self.db_path = db_path or review_engine.DB_PATH
+        self.conn = connect(self.db_path)
+        self.cursor = self.conn.cursor()
+        # schema name -> None (ترتیب برای بستن قدیمی‌ترین ATTACH)
+        self._attached = OrderedDict()
+        # کش مشترک deck پیش‌فرض؛ نوشتن‌های این کلاس در my_table هم در آن اعمال می‌شوند
+        self.cache = get_cache(self.db_path)
+        # جدول decks و deck پیش‌فرض در migrations.py ساخته می‌شوند
+
+    def list_decks(self):
+        """خروجی: [(id, name, file, table_name)]"""
+        self.cursor.execute("SELECT id, name, file, table_name FROM decks ORDER BY id")
+        return self.cursor.fetchall()
+
+    def deck_names(self):
+        return [row[1] for row in self.list_decks()]
+
+    def _deck(self, name):
+        self.cursor.execute("SELECT id, name, file, table_name FROM decks WHERE name = ?", (name,))
+        row = self.cursor.fetchone()
+        if row is None:
+            raise KeyError(f"Unknown deck: {name}")
+        return row
+
+    def _resolve_file(self, file):
+        # مسیرهای نسبی نسبت به پوشه دیتابیس اصلی سنجیده می‌شوند
+        if os.path.isabs(file):
+            return file
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_path)), file)
+
+    def create_deck(self, name, file=None):
+        """ساخت deck جدید؛ اگر file داده شود، کارت‌ها در آن فایل جداگانه ذخیره می‌شوند"""
+        self.cursor.execute("INSERT INTO decks (name, file, table_name) VALUES (?, ?, '')", (name, file))
+        deck_id = self.cursor.lastrowid
+        table_name = "my_table" if file else f"deck_{deck_id}"
+        self.cursor.execute("UPDATE decks SET table_name = ? WHERE id = ?", (table_name, deck_id))
+
+        if file:
+            # جدول کارت‌ها داخل فایل جدید ساخته می‌شود
+            deck_conn = sqlite3.connect(self._resolve_file(file))
+            deck_conn.execute(_CARD_TABLE_SQL.format(table="my_table"))
+            deck_conn.execute("CREATE INDEX IF NOT EXISTS idx_my_table_due ON my_table (next_time_review)")
+            deck_conn.commit()
+            deck_conn.close()
+        else:
+            self.cursor.execute(_CARD_TABLE_SQL.format(table=f'"{table_name}"'))
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_due" ON "{table_name}" (next_time_review)')
+        self.conn.commit()
+        return deck_id
+
+    def drop_deck(self, name):
+        """حذف deck از فهرست (فایل جداگانه حذف نمی‌شود)"""
+        deck_id, _, file, table_name = self._deck(name)
+        if deck_id == 1:
+            raise ValueError("The default deck cannot be removed.")
+        self._detach(f"deck_{deck_id}")
+        if not file:
+            self.cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        self.cursor.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+        self.conn.commit()
+
+    # -------------------- ATTACH در صورت نیاز --------------------
+    def table_for(self, name):
+        """نام کامل جدول کارت‌های deck (در صورت نیاز فایل آن ATTACH می‌شود)"""
+        deck_id, _, file, table_name = self._deck(name)
+        if not file:
+            return f'main."{table_name}"'
+
+        schema = f"deck_{deck_id}"
+        if schema in self._attached:
+            self._attached.move_to_end(schema)
+        else:
+            while len(self._attached) >= MAX_ATTACHED:
+                oldest = next(iter(self._attached))
+                self._detach(oldest)
+            # ATTACH داخل تراکنش باز مجاز نیست
+            self.conn.commit()
+            self.cursor.execute("ATTACH DATABASE ? AS " + schema, (self._resolve_file(file),))
+            self._attached[schema] = None
+        return f'{schema}."{table_name}"'
+
+    def _detach(self, schema):
+        if schema in self._attached:
+            self.conn.commit()
+            self.cursor.execute("DETACH DATABASE " + schema)
+            del self._attached[schema]
+
+    # -------------------- کارت‌ها --------------------
+    def get_cards_for_review(self, deck_names, num_cards):
+        """
+        پرس‌وجوی ادغام‌شده کارت‌های سررسید از چند deck.
+        خروجی: (words, meaning, (deck_name, code), review_intervals, count, next_time_review)
+        """
+        today = datetime.now().strftime("%Y-%m-%d 23:59:59")
+        parts, params = [], []
+        for name in deck_names:
+            parts.append(f"""
+                SELECT words, meaning, code, review_intervals, count, next_time_review, ? AS deck
+                FROM {self.table_for(name)}
+                WHERE next_time_review <= ? OR next_time_review IS NULL""")
+            params.extend([name, today])
+        if not parts:
+            return []
+
+        query = " UNION ALL ".join(parts) + " ORDER BY review_intervals ASC LIMIT ?"
+        self.cursor.execute(query, (*params, num_cards))
+        return [(w, m, (deck, code), i, c, n) for w, m, code, i, c, n, deck in self.cursor.fetchall()]
+
+    def update_review_stats(self, deck_code, current_interval, current_count):
+        """مرور موفق برای کارتی از یک deck؛ deck_code = (deck_name, code)"""
+        deck_name, code = deck_code
+        try:
+            final_interval, new_count, next_review_date = next_review_state(current_interval, current_count)
+            self.cursor.execute(f"""
+                                UPDATE {self.table_for(deck_name)}
+                                SET review_intervals = ?,
+                                    count            = ?,
+                                    next_time_review = ?
+                                WHERE code = ?
+                                """, (final_interval, new_count, next_review_date, code))
+            self.conn.commit()
+            if self.cache and deck_name == DEFAULT_DECK:
+                self.cache.apply_review(code, final_interval, new_count, next_review_date)
+            return True
+        except Exception as e:
+            print(f"Error updating review stats: {e}")
+            return False
+
+    def apply_review_batch(self, grades, checkpoint=None):
+        """
+        نوشتن نتایج مرور (review_engine.Grade با code = (deck_name, code)) و review_log در یک تراکنش.
+        checkpoint = (session, seq) مانند review_engine.DatabaseManager.apply_review_batch
+        """
+        reviewed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            # ATTACH (که تراکنش باز را commit می‌کند) پیش از شروع تراکنش انجام می‌شود
+            tables = {name: self.table_for(name) for name in {g.code[0] for g in grades}}
+            with self.conn:
+                for g in grades:
+                    deck_name, code = g.code
+                    self.cursor.execute(f"""
+                                        UPDATE {tables[deck_name]}
+                                        SET review_intervals = ?,
+                                            count            = ?,
+                                            next_time_review = ?
+                                        WHERE code = ?
+                                        """, (g.interval, g.count, g.next_time_review, code))
+                    self.cursor.execute(review_engine.REVIEW_LOG_SQL,
+                                        review_engine.review_log_row(deck_name, g._replace(code=code), reviewed_at))
+                if checkpoint:
+                    self.cursor.execute(review_engine.REVIEW_JOURNAL_SQL, checkpoint)
+            if self.cache:
+                for g in grades:
+                    if g.code[0] == DEFAULT_DECK:
+                        self.cache.apply_review(g.code[1], g.interval, g.count, g.next_time_review)
+            return True
+        except Exception as e:
+            print(f"Error updating review stats: {e}")
+            return False
+
+    def add_word(self, deck_name, word, meaning, initial_count):
+        """افزودن کلمه به یک deck (برای deck پیش‌فرض، edit.DatabaseManager ایندکس تقریبی را هم به‌روز می‌کند)"""
+        table = self.table_for(deck_name)
+        while True:
+            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+            self.cursor.execute(f"SELECT code FROM {table} WHERE code = ?", (code,))
+            if not self.cursor.fetchone():
+                break
+        next_review_date = datetime.now().strftime("%Y-%m-%d 00:00:00")
+        self.cursor.execute(f"""
+                            INSERT INTO {table} (code, words, meaning, review_intervals, count, next_time_review)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            """, (code, word, meaning, 1, initial_count, next_review_date))
+        self.conn.commit()
+        if self.cache and deck_name == DEFAULT_DECK:
+            self.cache.apply_insert(code, word, meaning, 1, initial_count, next_review_date)
+        return code
+
+    def move_cards(self, codes, from_deck, to_deck):
+        """انتقال کارت‌ها بین deck ها در یک تراکنش"""
+        source = self.table_for(from_deck)
+        target = self.table_for(to_deck)
+        moved = 0
+        inserted = []
+        with self.conn:
+            for code in codes:
+                self.cursor.execute(f"""
+                                    INSERT INTO {target} (code, words, meaning, review_intervals, count, next_time_review)
+                                    SELECT code, words, meaning, review_intervals, count, next_time_review
+                                    FROM {source}
+                                    WHERE code = ?
+                                    """, (code,))
+                if to_deck == DEFAULT_DECK and self.cursor.rowcount:
+                    inserted.append(code)
+                self.cursor.execute(f"DELETE FROM {source} WHERE code = ?", (code,))
+                moved += self.cursor.rowcount
+        if self.cache:
+            if from_deck == DEFAULT_DECK:
+                for code in codes:
+                    self.cache.apply_delete(code)
+            for code in inserted:
+                self.cache.apply_insert(*self.cursor.execute(f"""
+                                                             SELECT code, words, meaning, review_intervals, count,
+                                                                    next_time_review
+                                                             FROM {target}
+                                                             WHERE code = ?
+                                                             """, (code,)).fetchone())
+        return moved
+
+    def close(self):
+        self.conn.close()
+
+
+class MultiDeckStore:
+    """store برای ReviewSession که کارت‌ها را از چند deck می‌خواند"""
+
+    def __init__(self, deck_manager, deck_names):
+        self.decks = deck_manager
+        self.deck_names = list(deck_names)
+
+    def get_cards_for_review(self, num_cards):
+        return self.decks.get_cards_for_review(self.deck_names, num_cards)
+
+    def update_review_stats(self, deck_code, current_interval, current_count):
+        return self.decks.update_review_stats(deck_code, current_interval, current_count)
+
+    def apply_review_batch(self, grades, checkpoint=None):
+        return self.decks.apply_review_batch(grades, checkpoint)
+
+    def close(self):
+        self.decks.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind deck management")
+    parser.add_argument("--db", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    create = sub.add_parser("create")
+    create.add_argument("name")
+    create.add_argument("--file", default=None, help="store the deck in its own SQLite file")
+    drop = sub.add_parser("drop")
+    drop.add_argument("name")
+    args = parser.parse_args(argv)
+
+    manager = DeckManager(args.db)
+    try:
+        if args.command == "create":
+            manager.create_deck(args.name, args.file)
+        elif args.command == "drop":
+            manager.drop_deck(args.name)
+        for deck_id, name, file, table_name in manager.list_decks():
+            print(f"{deck_id:>3}  {name:<24} {file or '(main)':<28} {table_name}")
+    finally:
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# dedup.py - پیدا کردن و ادغام کلمات تکراری در my_table
+#
+# دو ردیف تکراری‌اند اگر ستون یکسان‌شده words_norm (normalize.py: حروف کوچک، فاصله، یونیکد،
+# ی/ک عربی) برابر باشد. گروه‌ها با GROUP BY روی ایندکس idx_my_table_words_norm پیدا می‌شوند.
+# ادغام هر گروه: ردیفی که پیشرفته‌ترین وضعیت SRS را دارد نگه داشته می‌شود، معانی متفاوت
+# (بدون تکرار) به آن اضافه و بقیه ردیف‌ها حذف می‌شوند. ادغام با edit.DatabaseManager.merge_duplicates
+# در یک تراکنش و به صورت یک عملیات قابل Undo (history.py) انجام می‌شود.
+#
+#   python dedup.py            فهرست گروه‌های تکراری
+#   python dedup.py --merge    ادغام همه گروه‌ها
+
+import sys
+import argparse
+
+from instrument import instrument_methods
+import review_engine
+from migrations import connect
+from normalize import normalize_text, split_meanings
+
+_COLUMNS = "code, words, meaning, review_intervals, count, next_time_review"
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def srs_rank(row):
+    """
+    کلید مرتب‌سازی «پیشرفت» یک ردیف (code, words, meaning, interval, count, next_time_review):
+    فاصله بزرگ‌تر، سپس count کمتر (نزدیک‌تر به ارتقاء)، سپس تاریخ مرور دیرتر
+    """
+    return _as_int(row[3]), -_as_int(row[4]), row[5] or ""
+
+
+def merge_meanings(rows, keeper):
+    """معنی ردیف نگه‌داشته‌شده به همراه معانی جدید ردیف‌های دیگر (بدون تکرار پس از یکسان‌سازی)"""
+    parts, seen = [], set()
+    for row in [keeper] + [r for r in rows if r is not keeper]:
+        for part in split_meanings(row[2]):
+            key = normalize_text(part)
+            if key not in seen:
+                seen.add(key)
+                parts.append(part)
+    return "، ".join(parts) if parts else keeper[2]
+
+
+def merge_plan(groups):
+    """برای هر گروه: (ردیف نگه‌داشته‌شده، معنی ادغام‌شده، ردیف‌های حذف‌شدنی)"""
+    plan = []
+    for rows in groups:
+        keeper = max(rows, key=srs_rank)
+        plan.append((keeper, merge_meanings(rows, keeper), [row for row in rows if row is not keeper]))
+    return plan
+
+
+@instrument_methods("db.dedup")
+class DuplicateFinder:
+    """تشخیص و ادغام ردیف‌های تکراری"""
+
+    def __init__(self, db_path=None):
+        self.conn = connect(db_path or review_engine.DB_PATH)
+        self.cursor = self.conn.cursor()
+
+    def find_groups(self):
+        """
+        گروه‌های تکراری: [[row, ...], ...] که هر row به شکل
+        (code, words, meaning, review_intervals, count, next_time_review, rowid) است.
+        rowid لازم است چون ردیف‌های کپی‌شده ممکن است code یکسان هم داشته باشند.
+        """
+        # فقط کلیدهای تکراری از ایندکس words_norm خوانده می‌شوند، نه کل جدول
+        groups = {}
+        for row in self.conn.execute(f"""
+                SELECT {_COLUMNS}, rowid, words_norm
+                FROM my_table
+                WHERE words_norm IN (SELECT words_norm
+                                     FROM my_table
+                                     WHERE words_norm != ''
+                                     GROUP BY words_norm
+                                     HAVING COUNT(*) > 1)
+                ORDER BY words_norm"""):
+            groups.setdefault(row[7], []).append(row[:7])
+        return list(groups.values())
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind duplicate finder")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--merge", action="store_true", help="merge every duplicate group")
+    args = parser.parse_args(argv)
+
+    finder = DuplicateFinder(args.db)
+    try:
+        groups = finder.find_groups()
+        for rows in groups:
+            keeper = max(rows, key=srs_rank)
+            print(f"{keeper[1]!r}: {len(rows)} rows, keeping code {keeper[0]} "
+                  f"(interval {keeper[3]}, count {keeper[4]})")
+        print(f"{len(groups)} duplicate groups, {sum(len(rows) - 1 for rows in groups)} extra rows")
+    finally:
+        finder.close()
+    if args.merge and groups:
+        # edit.DatabaseManager ادغام را در تاریخچه Undo ثبت و کش deck و ایندکس تقریبی را به‌روز می‌کند
+        from edit import DatabaseManager
+        db = DatabaseManager(args.db or review_engine.DB_PATH)
+        try:
+            print(f"removed {db.merge_duplicates(groups)} rows")
+        finally:
+            db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
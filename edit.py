@@ -1,17 +1,34 @@
 # edit.py - با رفع مشکل عدم ذخیره کلمات جدید و قابلیت Show All
 
+import html
+import json
 import sqlite3
 import random
 import string
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QMessageBox, QSpinBox, QStackedLayout
+    QTableWidget, QTableWidgetItem, QMessageBox, QSpinBox, QStackedLayout, QComboBox, QProgressBar,
+    QAbstractItemView, QInputDialog, QShortcut
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QTimer
+
+from instrument import instrument_methods, timed
+from deck_cache import get_cache
+from fuzzy import FuzzyIndex
+from migrations import connect
+from normalize import normalize_text
+from decks import DEFAULT_DECK, DeckManager
+import history
+import review_engine
+from dedup import DuplicateFinder, merge_plan
+from workers import QueryExecutor, db_job
+from settings import get_settings
 
 import os
 import sys
+from collections import namedtuple
 # ... بقیه ایمپورت‌ها را دست نزنید
 
 # این قسمت مسیر دیتابیس را برای حالت عادی و حالت PyInstaller تعریف می‌کند
@@ -26,18 +43,143 @@ DB_PATH = os.path.join(base_path, "flash cards.db")
 
 # ... بقیه کد (مانند REVIEW_INTERVALS_DAYS)
 
+# اندازه تکه‌های پر کردن جدول (edit.populate_chunk) و تأخیر/اندازه تکه‌های جستجوی زنده
+# (search.debounce_ms / search.stream_chunk) در settings.py تعریف شده‌اند
+
+# حداکثر فاصله ویرایشی برای «آیا منظورتان ... بود؟» و برای هشدار کلمه تکراری هنگام افزودن
+SUGGEST_DISTANCE = 2
+DUPLICATE_DISTANCE = 1
+
+# کلیدهای مرتب‌سازی صفحه‌بندی Show All و ستون SQL هر کدام؛ همه ایندکس دارند (migrations.py).
+# اندازه صفحه در edit.page_size (settings.py) است.
+SORT_COLUMNS = {
+    "code": "code",
+    "word": "words_norm",
+    "meaning": "meaning_norm",
+    "interval": "review_intervals",
+    "count": "count",
+    "next_review": "next_time_review",
+}
+
+# فیلترهای ستون‌ها در Show All (همه اختیاری و شامل خود مرزها). due_from / due_to تاریخ "YYYY-MM-DD" هستند؛
+# کارت بدون تاریخ مرور همیشه سررسید است و فقط با due_to انتخاب می‌شود.
+RowFilter = namedtuple("RowFilter", ["interval_min", "interval_max", "count_min", "count_max", "due_from", "due_to"],
+                       defaults=(None,) * 6)
+
+# یک صفحه از get_page: ردیف‌ها و کلید (مقدار ستون مرتب‌سازی، rowid) اولین و آخرین ردیف
+Page = namedtuple("Page", ["rows", "first", "last"])
+
+# کلید مرتب‌سازی هر ستون جدول صفحه Edit (کلیک روی عنوان ستون)
+TABLE_SORT_KEYS = ("code", "word", "meaning", "interval", "count", "next_review")
+
+# حداکثر ردیف‌های منطبق با فیلتر که به جای پیمایش ایندکس مرتب‌سازی، پیدا و سپس مرتب می‌شوند
+FILTERED_SORT_ROWS = 5000
+
+# مقدار before در get_page برای گرفتن صفحه آخر
+LAST_PAGE = object()
+
+
+def _keyset_segments(column, key, ascending):
+    """
+    شرط‌های ردیف‌های بعد از key در جهت پیمایش، به ترتیب. NULL ها در ترتیب صعودی اول هستند و
+    مقایسه row value با NULL نتیجه ندارد، پس بخش NULL و غیر NULL جدا پرس‌وجو می‌شوند تا هر کدام
+    فقط یک پیمایش بازه روی ایندکس ستون باشد.
+    """
+    if key is None:
+        return [(None, [])]
+    value, rowid = key
+    if ascending:
+        if value is None:
+            return [(f"{column} IS NULL AND rowid > ?", [rowid]), (f"{column} IS NOT NULL", [])]
+        return [(f"({column}, rowid) > (?, ?)", [value, rowid])]
+    if value is None:
+        return [(f"{column} IS NULL AND rowid < ?", [rowid])]
+    return [(f"({column}, rowid) < (?, ?)", [value, rowid]), (f"{column} IS NULL", [])]
+
+
+def parse_day(text, today=None):
+    """تاریخ "YYYY-MM-DD" یا تعداد روز نسبت به امروز ("+3"، "-7") به "YYYY-MM-DD"؛ متن خالی None"""
+    text = text.strip()
+    if not text:
+        return None
+    if text.lstrip("+-").isdigit():
+        return ((today or date.today()) + timedelta(days=int(text))).isoformat()
+    return date.fromisoformat(text).isoformat()
+
+
+def _target_conditions(codes=None, filters=None):
+    """شرط ردیف‌های هدف عملیات گروهی: کدهای انتخاب‌شده در جدول یا ردیف‌های منطبق با filters"""
+    if codes is not None:
+        return "code IN (SELECT value FROM json_each(?))", [json.dumps(list(codes), ensure_ascii=False)]
+    conditions, params = _filter_conditions(filters)
+    if not conditions:
+        # عملیات گروهی روی کل deck بدون فیلتر انجام نمی‌شود
+        raise ValueError("A bulk operation needs selected rows or at least one filter.")
+    return " AND ".join(conditions), params
+
+
+def _history_labels(db):
+    """(برچسب Undo، برچسب Redo) برای به‌روز کردن دکمه‌ها پس از هر عملیات"""
+    return db.undo_label(), db.redo_label()
+
+
+def _filter_conditions(filters):
+    """شرط‌های SQL (روی ستون‌های ایندکس‌دار) و پارامترهای یک RowFilter"""
+    conditions, params = [], []
+    if filters is None:
+        return conditions, params
+    for column, low, high in (("review_intervals", filters.interval_min, filters.interval_max),
+                              ("count", filters.count_min, filters.count_max)):
+        if low is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(high)
+    # تاریخ‌ها به صورت متن ("YYYY-MM-DD" یا "YYYY-MM-DD 00:00:00") ذخیره شده‌اند و مقایسه متنی درست است
+    if filters.due_from is not None:
+        conditions.append("next_time_review >= ?")
+        params.append(filters.due_from)
+    if filters.due_to is not None:
+        conditions.append("(next_time_review < date(?, '+1 day') OR next_time_review IS NULL)")
+        params.append(filters.due_to)
+    return conditions, params
+
 
 # ======================= Database Layer =======================
+@instrument_methods("db.edit")
 class DatabaseManager:
     """مدیریت دیتابیس"""
 
-    def __init__(self):
-        # اتصال باز می‌شود
-        self.conn = sqlite3.connect(DB_PATH)
+    def __init__(self, db_path=None):
+        # اتصال باز می‌شود (db_path برای بنچمارک و دیتابیس‌های جایگزین)
+        self.conn = connect(db_path or DB_PATH)
         self.cursor = self.conn.cursor()
+        # کش مشترک deck؛ خواندن‌ها از حافظه و نوشتن‌ها write-through
+        self.cache = get_cache(db_path or DB_PATH)
+        self.db_path = db_path or DB_PATH
+        # ایندکس جستجوی تقریبی فقط هنگام نیاز باز می‌شود
+        self._fuzzy = None
+        # وجود ایندکس trigram my_table_fts (یک بار بررسی می‌شود)
+        self._search_index = None
+        # اتصال DeckManager برای عملیات گروهی و Undo (ATTACH deck های فایل جداگانه)
+        self._decks = None
+
+    def _fuzzy_index(self):
+        """ایندکس تقریبی، هم‌گام با آخرین تغییرات my_table (از هر اتصالی)"""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(self.db_path)
+        self._fuzzy.ensure_built()
+        return self._fuzzy
+
+    def _word_of(self, code):
+        self.cursor.execute("SELECT words FROM my_table WHERE code = ?", (code,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
 
     def add_word(self, word, meaning, initial_count):
-        """افزودن کلمه جدید با کد منحصر به فرد و ذخیره تغییرات"""
+        """افزودن کلمه جدید با کد منحصر به فرد و ذخیره تغییرات. خروجی: کد کلمه یا None"""
+        index = self._fuzzy_index()
         code = self._generate_unique_code()
         next_review_date = (datetime.now()).strftime("%Y-%m-%d 00:00:00")
         try:
@@ -47,34 +189,155 @@ class DatabaseManager:
                                 """, (code, word, meaning, 1, initial_count, next_review_date))
             # **تضمین Commit:** ذخیره فوری تغییرات در دیسک
             self.conn.commit()
-            return True
+            if self.cache:
+                self.cache.apply_insert(code, word, meaning, 1, initial_count, next_review_date)
+            try:
+                index.ensure_built()
+            except sqlite3.Error as e:
+                print(f"Error updating fuzzy index: {e}")
+            return code
         except sqlite3.IntegrityError:
-            return False
+            return None
         except Exception as e:
             print(f"Error in add_word: {e}")
-            return False
+            return None
 
     def _generate_unique_code(self):
         """تولید کد منحصر به‌فرد"""
         while True:
             code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+            if self.cache:
+                if not self.cache.contains_code(code):
+                    return code
+                continue
             self.cursor.execute("SELECT code FROM my_table WHERE code = ?", (code,))
             if not self.cursor.fetchone():
                 return code
 
+    def _search_query(self, query):
+        """
+        پرس‌وجوی جستجوی زیررشته‌ای (همان رفتار کش). عبارت‌های سه حرفی و بلندتر از ایندکس trigram
+        my_table_fts (migrations.py) خوانده می‌شوند؛ عبارت کوتاه‌تر یا SQLite بدون FTS5 جدول را پیمایش می‌کند.
+        """
+        q = normalize_text(query)
+        if len(q) >= 3 and self._has_search_index():
+            return ("""
+                    SELECT code, words, meaning, review_intervals, count, next_time_review
+                    FROM my_table
+                    WHERE rowid IN (SELECT rowid FROM my_table_fts WHERE my_table_fts MATCH ?)
+                    """, ('"' + q.replace('"', '""') + '"',))
+        q = f"%{q}%"
+        return ("""
+                SELECT code, words, meaning, review_intervals, count, next_time_review
+                FROM my_table
+                WHERE words_norm LIKE ?
+                   OR meaning_norm LIKE ?
+                """, (q, q))
+
+    def _has_search_index(self):
+        if self._search_index is None:
+            self._search_index = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'my_table_fts'").fetchone() is not None
+        return self._search_index
+
     def search_words(self, query):
         """جستجوی کلمه یا معنی"""
-        q = f"%{query.lower()}%"
-        self.cursor.execute("""
-                            SELECT code, words, meaning, review_intervals, count, next_time_review
+        if self.cache:
+            return self.cache.search_words(query)
+        self.cursor.execute(*self._search_query(query))
+        return self.cursor.fetchall()
+
+    def iter_search_words(self, query, chunk_size=None):
+        """جستجو به صورت تکه‌تکه (generator) تا اولین نتایج بدون انتظار برای کل جدول نمایش داده شوند"""
+        chunk_size = chunk_size or get_settings(self.db_path).get("search.stream_chunk")
+        if self.cache:
+            yield from self.cache.iter_search_words(query, chunk_size)
+            return
+        cursor = self.conn.execute(*self._search_query(query))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    def suggest(self, word, limit=5):
+        """«آیا منظورتان ... بود؟»: نزدیک‌ترین کلمات موجود به word"""
+        try:
+            return [term for term, _, _ in self._fuzzy_index().lookup(word, SUGGEST_DISTANCE, limit)]
+        except sqlite3.Error as e:
+            print(f"Error in suggest: {e}")
+            return []
+
+    def find_similar(self, word, max_distance=DUPLICATE_DISTANCE):
+        """رکوردهایی که کلمه‌شان یکسان یا با فاصله ویرایشی کم با word است: [(code, words, meaning)]"""
+        try:
+            terms = {term for term, _, _ in self._fuzzy_index().lookup(word, max_distance, limit=20)}
+        except sqlite3.Error as e:
+            print(f"Error in find_similar: {e}")
+            return []
+        if not terms:
+            return []
+        # جستجوی دقیق روی ستون ایندکس‌دار words_norm
+        self.cursor.execute(f"""
+                            SELECT code, words, meaning
                             FROM my_table
-                            WHERE LOWER(words) LIKE ?
-                               OR LOWER(meaning) LIKE ?
-                            """, (q, q))
+                            WHERE words_norm IN ({",".join("?" * len(terms))})
+                            """, list(terms))
         return self.cursor.fetchall()
 
+    def count_words(self, filters=None):
+        """تعداد رکوردها (بدون فیلتر از کش بدون پرس‌وجو؛ در غیر این صورت COUNT روی ایندکس)"""
+        conditions, params = _filter_conditions(filters)
+        if self.cache and not conditions:
+            return self.cache.row_count()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.cursor.execute(f"SELECT COUNT(*) FROM my_table {where}", params)
+        return self.cursor.fetchone()[0]
+
+    def get_page(self, sort="code", descending=False, after=None, before=None, limit=None, filters=None,
+                 matching=None):
+        """
+        یک صفحه از رکوردها با keyset pagination (بدون OFFSET؛ هزینه هر صفحه به شماره آن بستگی ندارد).
+        after / before: کلید آخرین / اولین ردیف صفحه فعلی برای صفحه بعد / قبل؛ بدون هیچ‌کدام صفحه اول
+        و before=LAST_PAGE صفحه آخر. ردیف‌های هم‌مقدار با rowid مرتب می‌شوند.
+        filters: RowFilter؛ matching: تعداد ردیف‌های منطبق با filters (count_words) اگر از قبل معلوم باشد
+        """
+        column = SORT_COLUMNS[sort]
+        filter_conditions, filter_params = _filter_conditions(filters)
+        if filter_conditions and matching is not None and matching <= FILTERED_SORT_ROWS:
+            # فیلتر انتخابی: پیمایش ایندکس مرتب‌سازی و رد کردن بیشتر ردیف‌ها کندتر از پیدا کردن همین چند
+            # ردیف با ایندکس فیلتر و مرتب کردن آن‌هاست؛ + استفاده از ایندکس ستون مرتب‌سازی را غیرفعال می‌کند
+            column = f"+{column}"
+        limit = limit or get_settings(self.db_path).get("edit.page_size")
+        backward = before is not None
+        key = before if backward else after
+        # جهت پیمایش ایندکس: صفحه قبلیِ ترتیب نزولی یعنی پیمایش صعودی
+        ascending = backward == descending
+        order = "ASC" if ascending else "DESC"
+        fetched = []
+        for condition, params in _keyset_segments(column, None if key is LAST_PAGE else key, ascending):
+            conditions = filter_conditions + ([condition] if condition else [])
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            self.cursor.execute(f"""
+                                SELECT code, words, meaning, review_intervals, count, next_time_review,
+                                       {SORT_COLUMNS[sort]}, rowid
+                                FROM my_table {where}
+                                ORDER BY {column} {order}, rowid {order}
+                                LIMIT ?
+                                """, filter_params + params + [limit - len(fetched)])
+            fetched += self.cursor.fetchall()
+            if len(fetched) >= limit:
+                break
+        if backward:
+            fetched.reverse()
+        if not fetched:
+            return Page([], None, None)
+        return Page([row[:6] for row in fetched], tuple(fetched[0][6:]), tuple(fetched[-1][6:]))
+
     def get_all_words(self):
         """دریافت تمام رکوردها"""
+        if self.cache:
+            return self.cache.get_all_words()
         self.cursor.execute("""
                             SELECT code, words, meaning, review_intervals, count, next_time_review
                             FROM my_table
@@ -83,27 +346,244 @@ class DatabaseManager:
         return self.cursor.fetchall()
 
     def update_word(self, code, word, meaning, interval, count, last_time):
-        """به‌روزرسانی رکورد و ذخیره تغییرات"""
-        self.cursor.execute("""
-                            UPDATE my_table
-                            SET words            = ?,
-                                meaning          = ?,
-                                review_intervals = ?,
-                                count            = ?,
-                                next_time_review = ?
-                            WHERE code = ?
-                            """, (word, meaning, interval, count, last_time, code))
-        # **تضمین Commit:** ذخیره فوری تغییرات در دیسک
-        self.conn.commit()
+        """به‌روزرسانی رکورد (قابل Undo) و ذخیره تغییرات. خروجی: True اگر رکوردی با این کد وجود داشت"""
+        where, params = _target_conditions([code])
+        return self._bulk(f"Edit {word}", where, params, lambda conn, table, rows_sql, rows_params: conn.execute(
+            f"""
+            UPDATE {table}
+            SET words            = ?,
+                meaning          = ?,
+                review_intervals = ?,
+                count            = ?,
+                next_time_review = ?
+            WHERE rowid IN ({rows_sql})
+            """, (word, meaning, interval, count, last_time, *rows_params))) > 0
+
+    def update_words(self, rows):
+        """
+        ذخیره ردیف‌های ویرایش‌شده جدول (code, word, meaning, interval, count, next_time_review) به صورت یک عملیات
+        قابل Undo؛ فقط ردیف‌هایی که واقعاً تغییر کرده‌اند نوشته می‌شوند. خروجی: تعداد ردیف‌های تغییرکرده
+        """
+        rows = [tuple("" if value is None else str(value) for value in row) for row in rows]
+        where, params = _target_conditions([code for code, *_ in rows])
+        current = {}
+        for row in self.conn.execute(f"""
+                                     SELECT code, words, meaning, review_intervals, count, next_time_review
+                                     FROM my_table
+                                     WHERE {where}
+                                     """, params):
+            current[str(row[0])] = tuple("" if value is None else str(value) for value in row)
+        changed = [row for row in rows if row[0] in current and current[row[0]] != row]
+        if not changed:
+            return 0
+        where, params = _target_conditions([code for code, *_ in changed])
+        return self._bulk("Edit {n} words", where, params, lambda conn, table, rows_sql, rows_params: conn.executemany(
+            f"""
+            UPDATE {table}
+            SET words            = ?,
+                meaning          = ?,
+                review_intervals = ?,
+                count            = ?,
+                next_time_review = ?
+            WHERE code = ?
+              AND rowid IN ({rows_sql})
+            """, [(*values, code, *rows_params) for code, *values in changed]))
 
     def delete_word(self, code):
-        """حذف رکورد و ذخیره تغییرات"""
-        self.cursor.execute("DELETE FROM my_table WHERE code = ?", (code,))
-        # **تضمین Commit:** ذخیره فوری تغییرات در دیسک
-        self.conn.commit()
+        """حذف رکورد (قابل Undo) و ذخیره تغییرات. خروجی: True اگر رکوردی حذف شد"""
+        word = self._word_of(code)
+        return self._delete(f"Delete {word}", [code]) > 0
+
+    # -------------------- عملیات گروهی و Undo --------------------
+    def _deck_manager(self):
+        if self._decks is None:
+            self._decks = DeckManager(self.db_path)
+        return self._decks
+
+    def _bulk(self, label, where, params, write, target_deck=None):
+        """
+        اجرای یک عملیات روی ردیف‌هایی از deck پیش‌فرض که شرط where را دارند در یک تراکنش: before-image ردیف‌ها
+        (history.py)، یک دستور set-based با write(conn, table, rows_sql, rows_params) روی همان ردیف‌ها و سپس
+        وضعیت آن‌ها پس از تغییر.
+        خروجی: تعداد ردیف‌ها
+        """
+        index = self._fuzzy_index()
+        decks = self._deck_manager()
+        conn = decks.conn
+        # ATTACH (که تراکنش باز را commit می‌کند) پیش از شروع تراکنش انجام می‌شود
+        table = decks.table_for(DEFAULT_DECK)
+        target = decks.table_for(target_deck) if target_deck else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            op = history.begin(conn, get_settings(self.db_path).get("edit.undo_depth"))
+            affected = history.save_rows(conn, op, DEFAULT_DECK, table, where, params)
+            if not affected:
+                conn.execute("ROLLBACK")
+                return 0
+            rows_sql, rows_params = history.saved_rowids(op, DEFAULT_DECK)
+            if target:
+                last = conn.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {target}").fetchone()[0]
+                write(conn, table, rows_sql, rows_params, target)
+                history.save_new_rows(conn, op, target_deck, target, last)
+            else:
+                write(conn, table, rows_sql, rows_params)
+            # وضعیت پس از عملیات: Undo فقط ستون‌هایی را برمی‌گرداند که از آن زمان دست نخورده‌اند
+            history.save_rows(conn, op, DEFAULT_DECK, table, f"rowid IN ({rows_sql})", rows_params, phase=1)
+            history.save_removed_rows(conn, op, DEFAULT_DECK, table)
+            history.finish(conn, op, label.replace("{n}", str(affected)))
+            pairs = history.changes(conn, op, DEFAULT_DECK, table)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_changes(index, pairs)
+        return affected
+
+    def _after_changes(self, index, pairs):
+        """به‌روزرسانی کش deck و ایندکس تقریبی پس از commit؛ pairs: [(قبل، بعد)] با None برای ردیف ناموجود"""
+        if self.cache:
+            codes = [str((new or old)[0]) for old, new in pairs]
+            if len(set(codes)) != len(codes):
+                # کش ردیف‌ها را با code پیدا می‌کند؛ ردیف‌های هم‌کد (کپی‌شده) یک‌به‌یک به‌روز نمی‌شوند
+                self.cache.load()
+            else:
+                self.cache.apply_changes(pairs)
+        try:
+            index.ensure_built()
+        except sqlite3.Error as e:
+            print(f"Error updating fuzzy index: {e}")
+
+    def _delete(self, label, codes=None, filters=None):
+        return self._bulk(label, *_target_conditions(codes, filters),
+                          lambda conn, table, rows_sql, rows_params: conn.execute(
+                              f"DELETE FROM {table} WHERE rowid IN ({rows_sql})", rows_params))
+
+    def bulk_delete(self, codes=None, filters=None):
+        """حذف گروهی. خروجی: تعداد ردیف‌های حذف‌شده"""
+        return self._delete("Delete {n} words", codes, filters)
+
+    def bulk_reset(self, codes=None, filters=None):
+        """بازگرداندن وضعیت SRS به کارت تازه: فاصله 1، count = REVIEW_THRESHOLD و مرور از امروز"""
+        today = datetime.now().strftime("%Y-%m-%d 00:00:00")
+        return self._bulk("Reset {n} words", *_target_conditions(codes, filters),
+                          lambda conn, table, rows_sql, rows_params: conn.execute(
+                              f"""
+                              UPDATE {table}
+                              SET review_intervals = 1,
+                                  count            = ?,
+                                  next_time_review = ?
+                              WHERE rowid IN ({rows_sql})
+                              """, (review_engine.REVIEW_THRESHOLD, today, *rows_params)))
+
+    def bulk_set_interval(self, days, codes=None, filters=None):
+        """تنظیم فاصله مرور (روز) بدون تغییر تاریخ مرور بعدی"""
+        return self._bulk(f"Set interval of {{n}} words to {days}", *_target_conditions(codes, filters),
+                          lambda conn, table, rows_sql, rows_params: conn.execute(
+                              f"UPDATE {table} SET review_intervals = ? WHERE rowid IN ({rows_sql})",
+                              (days, *rows_params)))
+
+    def bulk_reschedule(self, day, codes=None, filters=None):
+        """تنظیم تاریخ مرور بعدی ("YYYY-MM-DD")"""
+        return self._bulk(f"Reschedule {{n}} words to {day}", *_target_conditions(codes, filters),
+                          lambda conn, table, rows_sql, rows_params: conn.execute(
+                              f"UPDATE {table} SET next_time_review = ? WHERE rowid IN ({rows_sql})",
+                              (f"{day} 00:00:00", *rows_params)))
+
+    def bulk_move(self, deck, codes=None, filters=None):
+        """انتقال کارت‌ها به deck دیگر (درج در جدول آن deck و حذف از deck پیش‌فرض در همان تراکنش)"""
+        if deck == DEFAULT_DECK:
+            raise ValueError("The cards are already in the default deck.")
+        columns = ", ".join(history.IMAGE_COLUMNS)
+
+        def write(conn, table, rows_sql, rows_params, target):
+            conn.execute(f"""
+                         INSERT INTO {target} ({columns})
+                         SELECT {columns} FROM {table} WHERE rowid IN ({rows_sql}) ORDER BY rowid
+                         """, rows_params)
+            conn.execute(f"DELETE FROM {table} WHERE rowid IN ({rows_sql})", rows_params)
+
+        return self._bulk(f"Move {{n}} words to {deck}", *_target_conditions(codes, filters), write,
+                          target_deck=deck)
+
+    def merge_duplicates(self, groups):
+        """
+        ادغام گروه‌های تکراری (DuplicateFinder.find_groups) به صورت یک عملیات قابل Undo. ردیف‌ها داخل تراکنش
+        دوباره خوانده و گروه‌بندی می‌شوند تا تغییرات پس از پیدا کردن گروه‌ها (مثلاً مرور) از دست نروند.
+        خروجی: تعداد ردیف‌های حذف‌شده
+        """
+        rowids = [row[6] for rows in groups for row in rows]
+        if not rowids:
+            return 0
+        removed = 0
+
+        def write(conn, table, rows_sql, rows_params):
+            nonlocal removed
+            current = {}
+            for row in conn.execute(f"""
+                                    SELECT code, words, meaning, review_intervals, count, next_time_review, rowid,
+                                           words_norm
+                                    FROM {table}
+                                    WHERE rowid IN ({rows_sql})
+                                    """, rows_params):
+                current.setdefault(row[7], []).append(row[:7])
+            for keeper, meaning, others in merge_plan([rows for rows in current.values() if len(rows) > 1]):
+                conn.execute(f"UPDATE {table} SET meaning = ? WHERE rowid = ?", (meaning, keeper[6]))
+                conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", [(row[6],) for row in others])
+                removed += len(others)
+
+        self._bulk("Merge duplicates ({n} words)", "rowid IN (SELECT value FROM json_each(?))",
+                   [json.dumps(rowids)], write)
+        return removed
+
+    def undo_label(self):
+        """برچسب آخرین عملیات قابل Undo (یا None)"""
+        row = history.last_op(self.conn)
+        return row[1] if row else None
+
+    def redo_label(self):
+        """برچسب عملیاتی که Redo برمی‌گرداند (یا None)"""
+        row = history.next_redo(self.conn)
+        return row[1] if row else None
+
+    def undo(self):
+        """برگرداندن آخرین عملیات در یک تراکنش. خروجی: برچسب عملیات (یا None اگر عملیاتی نیست)"""
+        return self._replay(history.last_op, 0)
+
+    def redo(self):
+        """انجام دوباره آخرین عملیات Undo‌شده در یک تراکنش. خروجی: برچسب عملیات (یا None)"""
+        return self._replay(history.next_redo, 1)
+
+    def _replay(self, pick, phase):
+        index = self._fuzzy_index()
+        decks = self._deck_manager()
+        conn = decks.conn
+        picked = pick(conn)
+        if picked is None:
+            return None
+        op, label, _ = picked
+        tables = {deck: decks.table_for(deck) for deck in history.decks_of(conn, op)}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            pairs = []
+            for deck, table in tables.items():
+                history.restore(conn, op, deck, table, phase)
+                if deck == DEFAULT_DECK:
+                    # وضعیت پیش از این کار در phase دیگر ثبت شده است
+                    pairs = history.changes(conn, op, deck, table, 1 - phase)
+            history.mark_undone(conn, op, phase == 0)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_changes(index, pairs)
+        return label
 
     def close(self):
         """بستن اتصال دیتابیس"""
+        if self._fuzzy is not None:
+            self._fuzzy.close()
+        if self._decks is not None:
+            self._decks.close()
         self.conn.close()
 
 
@@ -111,6 +591,7 @@ class DatabaseManager:
 class AddWordPage(QWidget):
     """صفحه افزودن کلمه جدید"""
 
+    @timed("page.AddWordPage")
     def __init__(self, edit_menu_owner, main_window):
         super().__init__()
         self.owner = edit_menu_owner
@@ -161,6 +642,16 @@ class AddWordPage(QWidget):
         self.count_spin.setStyleSheet(input_style)
         layout.addWidget(self.count_spin, alignment=Qt.AlignCenter)
 
+        # انتخاب deck مقصد (deck پیش‌فرض همان my_table است)
+        self.deck_combo = QComboBox()
+        deck_manager = DeckManager(DB_PATH)
+        self.deck_combo.addItems(deck_manager.deck_names())
+        deck_manager.close()
+        self.deck_combo.setCurrentText(DEFAULT_DECK)
+        self.deck_combo.setFixedWidth(350)
+        self.deck_combo.setStyleSheet(input_style.replace("QLineEdit, QSpinBox", "QComboBox"))
+        layout.addWidget(self.deck_combo, alignment=Qt.AlignCenter)
+
         self.add_button = QPushButton("Add Word")
         self.add_button.setFixedSize(180, 50)
         self.add_button.setStyleSheet("""
@@ -200,8 +691,12 @@ class AddWordPage(QWidget):
         self.add_button.clicked.connect(self.add_word)
         self.back_button.clicked.connect(self.go_back_to_menu)
 
-    def add_word(self):
-        """افزودن کلمه جدید به دیتابیس"""
+        # کارهای دیتابیس در thread کارگر اجرا می‌شوند
+        self.executor = QueryExecutor(self)
+        self.executor.busy_changed.connect(lambda busy: self.add_button.setEnabled(not busy))
+
+    def add_word(self, force=False):
+        """افزودن کلمه جدید به دیتابیس (اگر کلمه مشابهی وجود داشته باشد ابتدا تأیید گرفته می‌شود)"""
         word = self.word_input.text().strip()
         meaning = self.meaning_input.text().strip()
         initial_count = self.count_spin.value()
@@ -210,7 +705,42 @@ class AddWordPage(QWidget):
             QMessageBox.warning(self, "Warning", "Please enter both English word and Persian meaning.")
             return
 
-        success = self.db.add_word(word, meaning, initial_count)
+        deck = self.deck_combo.currentText()
+
+        def job(ctx):
+            if deck == DEFAULT_DECK:
+                db = DatabaseManager()
+                try:
+                    if not force:
+                        similar = db.find_similar(word)
+                        if similar:
+                            return similar
+                    return db.add_word(word, meaning, initial_count)
+                finally:
+                    db.close()
+            deck_manager = DeckManager(DB_PATH)
+            try:
+                return bool(deck_manager.add_word(deck, word, meaning, initial_count))
+            except sqlite3.Error as e:
+                print(f"Error in add_word: {e}")
+                return False
+            finally:
+                deck_manager.close()
+
+        self.executor.submit("add_word", job, on_result=self._on_word_added,
+                             on_error=lambda e: self._on_word_added(False))
+
+    def _on_word_added(self, success):
+        """نتیجه افزودن کلمه (در thread رابط گرافیکی)"""
+        if isinstance(success, list):
+            # کلمات مشابه موجود: [(code, words, meaning)]
+            lines = "\n".join(f"  {w} — {m}" for _, w, m in success[:10])
+            confirm = QMessageBox.question(self, "Possible Duplicate",
+                                           f"Similar words already exist:\n{lines}\n\nAdd anyway?",
+                                           QMessageBox.Yes | QMessageBox.No)
+            if confirm == QMessageBox.Yes:
+                self.add_word(force=True)
+            return
         if success:
             QMessageBox.information(self, "Success", "Word added successfully!")
             self.word_input.clear()
@@ -222,7 +752,8 @@ class AddWordPage(QWidget):
                 self.count_spin.setValue(5)
 
             if hasattr(self.owner, "edit_page"):
-                self.owner.edit_page.table.setRowCount(0)
+                self.owner.edit_page.clear_table()
+                self.owner.edit_page._last_search = None
         else:
             QMessageBox.critical(self, "Error", "Failed to add word (possible DB issue).")
 
@@ -244,6 +775,7 @@ class AddWordPage(QWidget):
 class EditRemovePage(QWidget):
     """صفحه جستجو، ویرایش و حذف"""
 
+    @timed("page.EditRemovePage")
     def __init__(self, edit_menu_owner, main_window):
         super().__init__()
         self.owner = edit_menu_owner
@@ -278,6 +810,7 @@ class EditRemovePage(QWidget):
 
         self.search_button = QPushButton("Search")
         self.show_all_button = QPushButton("Show All")
+        self.duplicates_button = QPushButton("Duplicates")
 
         button_style = """
             QPushButton {
@@ -295,16 +828,89 @@ class EditRemovePage(QWidget):
         """
         self.search_button.setStyleSheet(button_style)
         self.show_all_button.setStyleSheet(button_style.replace("30, 144, 255", "95, 158, 160"))
+        self.duplicates_button.setStyleSheet(button_style.replace("30, 144, 255", "218, 165, 32"))
 
         control_layout.addWidget(self.search_input)
         control_layout.addWidget(self.search_button)
         control_layout.addWidget(self.show_all_button)
+        control_layout.addWidget(self.duplicates_button)
         layout.addLayout(control_layout)
+
+        # نشانگر مشغول بودن (وقتی کاری در thread کارگر در حال اجراست)
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setFixedHeight(6)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.setStyleSheet("""
+            QProgressBar { background-color: transparent; border: none; }
+            QProgressBar::chunk { background-color: rgba(30, 144, 255, 0.9); }
+        """)
+        self.busy_bar.setVisible(False)
+        layout.addWidget(self.busy_bar)
+
+        # وضعیت جستجوی زنده (به جای پنجره پیام در هر بار تایپ)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #B0C4DE; font-size: 14px;")
+        # پیشنهادهای «Did you mean» به صورت لینک نمایش داده می‌شوند
+        self.status_label.setTextFormat(Qt.RichText)
+        self.status_label.linkActivated.connect(self.search_input.setText)
+        layout.addWidget(self.status_label)
+        # ----------------------------------------------------
+
+        # ----------------- فیلتر ستون‌ها -----------------
+        # فیلترها و مرتب‌سازی (کلیک روی عنوان ستون) در SQL روی ستون‌های ایندکس‌دار اجرا می‌شوند (get_page)
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(6)
+        filter_style = """
+            QLineEdit, QSpinBox {
+                background-color: rgba(40, 40, 40, 0.85);
+                color: #F0F0F0;
+                padding: 4px;
+                border-radius: 5px;
+                border: 1px solid rgba(100, 100, 100, 0.5);
+                font-size: 14px;
+            }
+        """
+        self.filter_spins = {}
+        for label, name in (("Interval", "interval"), ("Count", "count")):
+            filter_layout.addWidget(self._filter_label(label))
+            for bound in ("min", "max"):
+                spin = QSpinBox()
+                # کمترین مقدار یعنی «بدون شرط»
+                spin.setRange(-1, 99999)
+                spin.setValue(-1)
+                spin.setSpecialValueText(bound)
+                spin.setStyleSheet(filter_style)
+                spin.valueChanged.connect(lambda _: self.filter_timer.start())
+                self.filter_spins[f"{name}_{bound}"] = spin
+                filter_layout.addWidget(spin)
+        filter_layout.addWidget(self._filter_label("Due"))
+        self.due_inputs = {}
+        for name, placeholder in (("due_from", "from"), ("due_to", "to")):
+            line = QLineEdit()
+            line.setPlaceholderText(f"{placeholder}: YYYY-MM-DD / +N")
+            line.setStyleSheet(filter_style)
+            line.textChanged.connect(lambda _: self.filter_timer.start())
+            self.due_inputs[name] = line
+            filter_layout.addWidget(line)
+        self.clear_filters_button = QPushButton("Clear")
+        self.clear_filters_button.setStyleSheet(
+            button_style.replace("30, 144, 255", "100, 100, 100").replace("16px", "14px"))
+        filter_layout.addWidget(self.clear_filters_button)
+        layout.addLayout(filter_layout)
         # ----------------------------------------------------
 
         self.table = QTableWidget()
         self.table.setColumnCount(6)
         self.table.setHorizontalHeaderLabels(["Code", "Word", "Meaning", "Interval", "Count", "Next Review"])
+        # مرتب‌سازی در دیتابیس؛ setSortingEnabled جدول فعال نمی‌شود تا Qt ردیف‌ها را جابه‌جا نکند
+        header = self.table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(0, Qt.AscendingOrder)
+        # انتخاب چند ردیف برای عملیات گروهی (ویرایش سلول‌ها با دوبار کلیک همچنان ممکن است)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
         self.table.setStyleSheet("""
             QTableWidget {
@@ -330,6 +936,60 @@ class EditRemovePage(QWidget):
         """)
         layout.addWidget(self.table)
 
+        # ----------------- صفحه‌بندی Show All -----------------
+        # فقط یک صفحه (edit.page_size ردیف) از دیتابیس خوانده می‌شود؛ جابه‌جایی با keyset (get_page)
+        self.pager = QWidget()
+        pager_layout = QHBoxLayout(self.pager)
+        pager_layout.setContentsMargins(0, 0, 0, 0)
+        self.first_button = QPushButton("«")
+        self.prev_button = QPushButton("‹ Prev")
+        self.page_label = QLabel("")
+        self.page_label.setAlignment(Qt.AlignCenter)
+        self.page_label.setStyleSheet("color: #B0C4DE; font-size: 14px;")
+        self.next_button = QPushButton("Next ›")
+        self.last_button = QPushButton("»")
+        pager_style = button_style.replace("30, 144, 255", "95, 158, 160").replace("16px", "14px")
+        for widget in (self.first_button, self.prev_button, self.next_button, self.last_button):
+            widget.setStyleSheet(pager_style)
+        pager_layout.addStretch()
+        pager_layout.addWidget(self.first_button)
+        pager_layout.addWidget(self.prev_button)
+        pager_layout.addWidget(self.page_label)
+        pager_layout.addWidget(self.next_button)
+        pager_layout.addWidget(self.last_button)
+        pager_layout.addStretch()
+        self.pager.setVisible(False)
+        layout.addWidget(self.pager)
+        # ----------------------------------------------------
+
+        # ----------------- عملیات گروهی -----------------
+        # روی ردیف‌های انتخاب‌شده یا همه ردیف‌های منطبق با فیلترها، با یک دستور SQL در یک تراکنش
+        bulk_layout = QHBoxLayout()
+        bulk_layout.setSpacing(6)
+        self.bulk_combo = QComboBox()
+        for label, action in (("Delete", "delete"), ("Reset SRS", "reset"), ("Set Interval...", "interval"),
+                              ("Reschedule...", "reschedule"), ("Move to Deck...", "move")):
+            self.bulk_combo.addItem(label, action)
+        self.bulk_combo.setStyleSheet(filter_style.replace("QLineEdit, QSpinBox", "QComboBox"))
+        self.bulk_selected_button = QPushButton("Apply to Selected")
+        self.bulk_filter_button = QPushButton("Apply to Filtered")
+        self.undo_button = QPushButton("Undo")
+        self.redo_button = QPushButton("Redo")
+        small_style = button_style.replace("16px", "14px")
+        self.bulk_selected_button.setStyleSheet(small_style.replace("30, 144, 255", "218, 165, 32"))
+        self.bulk_filter_button.setStyleSheet(small_style.replace("30, 144, 255", "218, 165, 32"))
+        self.undo_button.setStyleSheet(small_style.replace("30, 144, 255", "100, 100, 100"))
+        self.redo_button.setStyleSheet(small_style.replace("30, 144, 255", "100, 100, 100"))
+        bulk_layout.addWidget(self._filter_label("Bulk"))
+        bulk_layout.addWidget(self.bulk_combo)
+        bulk_layout.addWidget(self.bulk_selected_button)
+        bulk_layout.addWidget(self.bulk_filter_button)
+        bulk_layout.addStretch()
+        bulk_layout.addWidget(self.undo_button)
+        bulk_layout.addWidget(self.redo_button)
+        layout.addLayout(bulk_layout)
+        # ----------------------------------------------------
+
         btn_layout = QHBoxLayout()
         self.edit_button = QPushButton("Apply Changes")
         self.delete_button = QPushButton("Delete Selected")
@@ -385,24 +1045,126 @@ class EditRemovePage(QWidget):
         # ----------------- اتصال سیگنال‌ها -----------------
         self.search_button.clicked.connect(self.perform_search)
         self.show_all_button.clicked.connect(self.show_all_records)
+        self.duplicates_button.clicked.connect(self.find_duplicates)
         self.edit_button.clicked.connect(self.apply_changes)
         self.delete_button.clicked.connect(self.delete_selected)
         self.back_button.clicked.connect(self.go_back_to_menu)
+        self.first_button.clicked.connect(lambda: self._load_page(0))
+        self.prev_button.clicked.connect(self.previous_page)
+        self.next_button.clicked.connect(self.next_page)
+        self.last_button.clicked.connect(self.last_page)
+        self.clear_filters_button.clicked.connect(self.clear_filters)
+        self.bulk_selected_button.clicked.connect(lambda: self.run_bulk(selected=True))
+        self.bulk_filter_button.clicked.connect(lambda: self.run_bulk(selected=False))
+        self.undo_button.clicked.connect(self.undo_last)
+        self.redo_button.clicked.connect(self.redo_last)
+        QShortcut(QKeySequence.Undo, self).activated.connect(self.undo_last)
+        QShortcut(QKeySequence.Redo, self).activated.connect(self.redo_last)
+        header.sortIndicatorChanged.connect(self._on_sort_changed)
+
+        # کارهای دیتابیس در thread کارگر اجرا می‌شوند؛ جدول به صورت تکه‌تکه پر می‌شود
+        self.executor = QueryExecutor(self)
+        self.executor.busy_changed.connect(self._set_busy)
+        self._populate_generation = 0
+        self._fills_pending = 0
+
+        # جستجوی زنده با debounce؛ آخرین نتیجه کامل برای استفاده مجدد وقتی عبارت طولانی‌تر می‌شود
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.settings = get_settings(DB_PATH)
+        self.search_timer.setInterval(self.settings.get("search.debounce_ms"))
+        self.search_timer.timeout.connect(self.live_search)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        self._last_search = None
+        self._stream_started = False
+        # صفحه فعلی Show All: (شماره صفحه، اندازه صفحه، تعداد کل، Page، فیلترها)
+        self._page = None
+
+        # تغییر فیلترها با همان تأخیر جستجوی زنده صفحه اول را دوباره می‌خواند
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.settings.get("search.debounce_ms"))
+        self.filter_timer.timeout.connect(self.show_all_records)
+        # تأخیر هر دو تایمر با تنظیمات به‌روز می‌شود (release اشتراک را قطع می‌کند)
+        self.settings.subscribe(self._on_debounce_changed, "search.debounce_ms")
+
+        self._update_history(self.db.undo_label(), self.db.redo_label())
+
+    def _on_debounce_changed(self, key, value):
+        self.search_timer.setInterval(value)
+        self.filter_timer.setInterval(value)
+
+    def release(self):
+        """قطع اشتراک تنظیمات و بستن اتصال دیتابیس هنگام خروج از صفحه"""
+        self.settings.unsubscribe(self._on_debounce_changed)
+        try:
+            self.db.close()
+        except Exception:
+            pass
+
+    @property
+    def populating(self):
+        return self._fills_pending > 0
+
+    def _set_busy(self, busy):
+        self.busy_bar.setVisible(busy or self.populating)
 
+    def _run(self, key, func, on_result):
+        """اجرای func(db, ctx) در thread کارگر با یک DatabaseManager مخصوص همان thread"""
+        self.executor.submit(key, db_job(DatabaseManager, func), on_result=on_result,
+                             on_error=lambda e: QMessageBox.critical(self, "Error", f"Database error: {e}"))
+
+    @timed("ui.populate_table")
     def populate_table(self, records):
-        """تابع کمکی برای پر کردن جدول با لیست رکوردها"""
-        self.table.setRowCount(len(records))
-        for row_idx, row_data in enumerate(records):
-            for col_idx, value in enumerate(row_data):
+        """تابع کمکی برای پر کردن جدول با لیست رکوردها (تکه‌تکه، بدون قفل کردن رابط)"""
+        # هر پر کردن جدید، پر کردن قبلی نیمه‌کاره را متوقف می‌کند
+        self.clear_table()
+        self.status_label.setText(f"{len(records)} records")
+
+        if not records:
+            QMessageBox.information(self, "No Records", "No matching records found in the database.")
+            return
+        self.append_rows(records)
+
+    def clear_table(self):
+        self._populate_generation += 1
+        self.table.setRowCount(0)
+
+    def append_rows(self, records):
+        """افزودن رکوردها به انتهای جدول (برای نتایج تکه‌تکه جستجوی زنده)"""
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(records))
+        self._fills_pending += 1
+        self._set_busy(True)
+        self._fill_rows(records, 0, self._populate_generation, start)
+
+    @timed("ui.populate_chunk")
+    def _fill_rows(self, records, start, generation, base=0):
+        if generation != self._populate_generation:
+            self._fill_done()
+            return
+        end = min(start + self.settings.get("edit.populate_chunk"), len(records))
+
+        self.table.setUpdatesEnabled(False)
+        for idx in range(start, end):
+            row_idx = base + idx
+            for col_idx, value in enumerate(records[idx]):
                 item = QTableWidgetItem(str(value) if value is not None else "")
                 if col_idx == 0:
                     item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
                 else:
                     item.setFlags(item.flags() | Qt.ItemIsEditable)
                 self.table.setItem(row_idx, col_idx, item)
+        self.table.setUpdatesEnabled(True)
 
-        if not records:
-            QMessageBox.information(self, "No Records", "No matching records found in the database.")
+        if end < len(records):
+            QTimer.singleShot(0, lambda: self._fill_rows(records, end, generation, base))
+        else:
+            self._fill_done()
+
+    def _fill_done(self):
+        self._fills_pending -= 1
+        self._set_busy(self.executor.busy)
 
     def perform_search(self):
         query = self.search_input.text().strip()
@@ -410,53 +1172,400 @@ class EditRemovePage(QWidget):
             QMessageBox.warning(self, "Warning", "Please enter a search term.")
             return
 
-        results = self.db.search_words(query)
-        self.populate_table(results)
+        # دکمه Search همیشه از دیتابیس می‌خواند (بدون استفاده مجدد از نتایج قبلی)
+        self.search_timer.stop()
+        self._last_search = None
+        self.live_search()
+
+    def live_search(self):
+        """
+        جستجوی زنده: نتایج به صورت تکه‌تکه در جدول ریخته می‌شوند. اگر عبارت جدید شامل عبارت
+        جستجوی قبلی باشد (مثلاً فقط ادامه تایپ شده)، نتایج قبلی فیلتر می‌شوند و دیتابیس خوانده نمی‌شود.
+        """
+        query = self.search_input.text().strip()
+        if not query:
+            # متوقف کردن جستجوی در حال اجرا
+            self.executor.cancel("records")
+            self.status_label.setText("")
+            return
+
+        self.pager.setVisible(False)
+        needle = normalize_text(query)
+        previous = self._last_search
+        if previous and normalize_text(previous[0]) in needle:
+            candidates = previous[1]
+            stream_chunk = self.settings.get("search.stream_chunk")
+
+            def job(ctx):
+                matches, chunk = [], []
+                for row in candidates:
+                    if needle in normalize_text(row[1]) or needle in normalize_text(row[2]):
+                        chunk.append(row)
+                        if len(chunk) >= stream_chunk:
+                            ctx.check()
+                            ctx.progress(chunk)
+                            matches.extend(chunk)
+                            chunk = []
+                if chunk:
+                    ctx.progress(chunk)
+                    matches.extend(chunk)
+                return matches
+        else:
+            def stream(db, ctx):
+                matches = []
+                for chunk in db.iter_search_words(query):
+                    ctx.check()
+                    ctx.progress(chunk)
+                    matches.extend(chunk)
+                return matches
+
+            job = db_job(DatabaseManager, stream)
+
+        self._stream_started = False
+        self.status_label.setText("Searching...")
+        # جستجو و Show All یک key مشترک دارند؛ درخواست جدید نتیجه درخواست قبلی را منسوخ می‌کند
+        self.executor.submit("records", job,
+                             on_result=lambda rows: self._on_search_finished(query, rows),
+                             on_error=lambda e: QMessageBox.critical(self, "Error", f"Database error: {e}"),
+                             on_progress=self._on_search_chunk)
+
+    def _on_search_chunk(self, chunk):
+        # با رسیدن اولین تکه، نتایج قبلی پاک می‌شوند
+        if not self._stream_started:
+            self._stream_started = True
+            self.clear_table()
+        self.append_rows(chunk)
+        self.status_label.setText(f"{self.table.rowCount()} matches so far...")
+
+    def _on_search_finished(self, query, rows):
+        if not self._stream_started:
+            self.clear_table()
+        self._last_search = (query, rows)
+        if rows:
+            self.status_label.setText(f"{len(rows)} matches")
+            return
+        self.status_label.setText("No matching records found.")
+        self._run("suggest", lambda db, ctx: db.suggest(query),
+                  lambda terms: self._on_suggestions(query, terms))
+
+    def _on_suggestions(self, query, terms):
+        """نمایش «Did you mean» (اگر عبارت جستجو در این فاصله تغییر نکرده باشد)"""
+        if not terms or self.search_input.text().strip() != query:
+            return
+        links = ", ".join(f'<a href="{html.escape(t)}" style="color: #87CEFA;">{html.escape(t)}</a>'
+                          for t in terms)
+        self.status_label.setText(f"No matching records found. Did you mean: {links}?")
 
     def show_all_records(self):
-        """نمایش تمام رکوردها در جدول"""
+        """نمایش تمام رکوردها در جدول (صفحه اول)"""
+        # پاک کردن فیلد جستجو نباید جستجوی زنده جدیدی شروع کند
+        self.search_input.blockSignals(True)
         self.search_input.clear()
-        all_records = self.db.get_all_words()
-        self.populate_table(all_records)
+        self.search_input.blockSignals(False)
+        self.search_timer.stop()
+        self._load_page(0)
+
+    @staticmethod
+    def _filter_label(text):
+        label = QLabel(text)
+        label.setStyleSheet("color: #B0C4DE; font-size: 14px;")
+        return label
+
+    def current_filter(self):
+        """RowFilter از مقادیر نوار فیلتر (None اگر هیچ فیلتری تنظیم نشده). ValueError برای تاریخ نامعتبر"""
+        values = {name: (spin.value() if spin.value() >= 0 else None) for name, spin in self.filter_spins.items()}
+        for name, line in self.due_inputs.items():
+            values[name] = parse_day(line.text())
+        filters = RowFilter(**values)
+        return filters if any(value is not None for value in filters) else None
+
+    def clear_filters(self):
+        for widget in list(self.filter_spins.values()) + list(self.due_inputs.values()):
+            widget.blockSignals(True)
+        for spin in self.filter_spins.values():
+            spin.setValue(-1)
+        for line in self.due_inputs.values():
+            line.clear()
+        for widget in list(self.filter_spins.values()) + list(self.due_inputs.values()):
+            widget.blockSignals(False)
+        self.filter_timer.stop()
+        self.show_all_records()
+
+    def _on_sort_changed(self, column, order):
+        # مرتب‌سازی نتایج جستجو را به صفحه‌بندی تبدیل نمی‌کند؛ برای Show All بعدی حفظ می‌شود
+        if not self.pager.isHidden():
+            self._load_page(0)
+
+    def _load_page(self, index, after=None, before=None, limit=None):
+        """خواندن یک صفحه با ترتیب و فیلترهای فعلی در thread کارگر؛ شماره صفحه فقط برای نمایش است"""
+        try:
+            filters = self.current_filter()
+        except ValueError:
+            self.status_label.setText("Due dates must be YYYY-MM-DD or a number of days from today (+3, -7).")
+            return
+        header = self.table.horizontalHeader()
+        sort = TABLE_SORT_KEYS[header.sortIndicatorSection()]
+        descending = header.sortIndicatorOrder() == Qt.DescendingOrder
+        page_size = self.settings.get("edit.page_size")
+
+        def job(db, ctx):
+            total = db.count_words(filters)
+            return total, db.get_page(sort, descending, after, before, limit or page_size, filters, total)
+
+        self._run("records", job, lambda result: self._on_page(index, page_size, filters, *result))
+
+    def _on_page(self, index, page_size, filters, total, page):
+        self._page = (index, page_size, total, page, filters)
+        # بدون نتیجه با فیلتر پیام جداگانه لازم نیست
+        if page.rows or filters is None:
+            self.populate_table(page.rows)
+        else:
+            self.clear_table()
+        pages = max(1, -(-total // page_size))
+        start = index * page_size + 1
+        self.page_label.setText(f"Page {index + 1} of {pages}")
+        matching = " matching the filters" if filters else ""
+        if page.rows:
+            self.status_label.setText(f"Records {start}–{index * page_size + len(page.rows)} of {total}{matching}")
+        else:
+            self.status_label.setText(f"No records{matching}.")
+        self.first_button.setEnabled(index > 0)
+        self.prev_button.setEnabled(index > 0)
+        self.next_button.setEnabled(index < pages - 1)
+        self.last_button.setEnabled(index < pages - 1)
+        self.pager.setVisible(True)
+
+    def next_page(self):
+        index, _, _, page, _ = self._page
+        self._load_page(index + 1, after=page.last)
+
+    def previous_page(self):
+        index, _, _, page, _ = self._page
+        # صفحه اول همیشه از ابتدا خوانده می‌شود (حتی اگر در این فاصله ردیفی اضافه یا حذف شده باشد)
+        if index <= 1:
+            self._load_page(0)
+        else:
+            self._load_page(index - 1, before=page.first)
 
-    def apply_changes(self):
-        row_count = self.table.rowCount()
-        for row in range(row_count):
-            code = self.table.item(row, 0).text()
-            word = self.table.item(row, 1).text()
-            meaning = self.table.item(row, 2).text()
-            interval = self.table.item(row, 3).text()
-            count = self.table.item(row, 4).text()
-            last_time = self.table.item(row, 5).text()
+    def last_page(self):
+        _, page_size, total, _, _ = self._page
+        last = max(0, -(-total // page_size) - 1)
+        # صفحه آخر فقط باقی‌مانده ردیف‌ها را دارد تا مرزهای صفحه‌ها با پیمایش رو به جلو یکی باشد
+        self._load_page(last, before=LAST_PAGE, limit=total - last * page_size or page_size)
 
-            try:
-                self.db.update_word(code, word, meaning, interval, count, last_time)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to update record: {e}")
-                return
+    def find_duplicates(self):
+        """نمایش ردیف‌های تکراری و پیشنهاد ادغام آن‌ها"""
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.search_timer.stop()
+        self.pager.setVisible(False)
+        self.status_label.setText("Looking for duplicates...")
+        self.executor.submit("records", db_job(lambda: DuplicateFinder(DB_PATH), lambda db, ctx: db.find_groups()),
+                             on_result=self._on_duplicates,
+                             on_error=lambda e: QMessageBox.critical(self, "Error", f"Database error: {e}"))
+
+    def _on_duplicates(self, groups):
+        if not groups:
+            self.clear_table()
+            self.status_label.setText("No duplicate words found.")
+            return
+        extra = sum(len(rows) - 1 for rows in groups)
+        self.populate_table([row[:6] for rows in groups for row in rows])
+        self.status_label.setText(f"{len(groups)} duplicate groups, {extra} extra rows")
+
+        confirm = QMessageBox.question(
+            self, "Merge Duplicates",
+            f"Found {len(groups)} words stored more than once ({extra} extra rows).\n"
+            "Merge them? For each word the row with the most advanced review state is kept "
+            "and the other meanings are added to it.",
+            QMessageBox.Yes | QMessageBox.No)
+        if confirm != QMessageBox.Yes:
+            return
+        self._last_search = None
+
+        def merge(db, ctx):
+            # ادغام مثل عملیات گروهی دیگر قابل Undo است
+            return (db.merge_duplicates(groups),) + _history_labels(db)
+
+        self.executor.submit("merge_duplicates", db_job(DatabaseManager, merge),
+                             on_result=lambda result: self._on_duplicates_merged(*result),
+                             on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to merge: {e}"))
 
-        QMessageBox.information(self, "Success", "All changes saved successfully!")
+    def _on_duplicates_merged(self, removed, undo_label, redo_label):
+        self._update_history(undo_label, redo_label)
+        QMessageBox.information(self, "Merged", f"{removed} duplicate rows removed.")
+        self.show_all_records()
+
+    def apply_changes(self):
+        # خواندن مقادیر جدول باید در thread رابط گرافیکی انجام شود
+        rows = []
+        for row in range(self.table.rowCount()):
+            items = [self.table.item(row, col) for col in range(6)]
+            if None in items:
+                # ردیف‌هایی که هنوز پر نشده‌اند
+                continue
+            rows.append([item.text() for item in items])
+
+        def save(db, ctx):
+            # همه ردیف‌های تغییرکرده یک عملیات قابل Undo هستند
+            return (db.update_words(rows),) + _history_labels(db)
+
+        # نتایج جستجوی قبلی دیگر معتبر نیستند
+        self._last_search = None
+        self.executor.submit("apply_changes", db_job(DatabaseManager, save),
+                             on_result=lambda result: self._on_changes_saved(*result),
+                             on_error=lambda e: QMessageBox.critical(
+                                 self, "Error", f"Failed to update record: {e}"))
+
+    def _on_changes_saved(self, changed, undo_label, redo_label):
+        self._update_history(undo_label, redo_label)
+        QMessageBox.information(self, "Success", f"All changes saved successfully! ({changed} records changed)")
+
+    def selected_codes(self):
+        """کد ردیف‌های انتخاب‌شده در جدول"""
+        codes = []
+        for index in self.table.selectionModel().selectedRows():
+            item = self.table.item(index.row(), 0)
+            if item is not None:
+                codes.append(item.text())
+        return codes
 
     def delete_selected(self):
-        row = self.table.currentRow()
-        if row == -1:
+        codes = self.selected_codes()
+        if not codes:
             QMessageBox.warning(self, "Warning", "Please select a record to delete.")
             return
 
-        code = self.table.item(row, 0).text()
-        confirm = QMessageBox.question(self, "Confirm", f"Delete word with code {code}?",
-                                       QMessageBox.Yes | QMessageBox.No)
+        text = f"Delete word with code {codes[0]}?" if len(codes) == 1 else f"Delete {len(codes)} selected words?"
+        confirm = QMessageBox.question(self, "Confirm", text, QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
+            if len(codes) == 1:
+                self._submit_bulk(lambda db: db.delete_word(codes[0]))
+            else:
+                self._submit_bulk(lambda db: db.bulk_delete(codes=codes))
+
+    def run_bulk(self, selected):
+        """اجرای عملیات انتخاب‌شده در نوار Bulk روی ردیف‌های انتخاب‌شده یا منطبق با فیلترها"""
+        action = self.bulk_combo.currentData()
+        if selected:
+            codes, filters = self.selected_codes(), None
+            if not codes:
+                QMessageBox.warning(self, "Warning", "Please select the records first.")
+                return
+            scope = f"{len(codes)} selected words"
+        else:
+            codes = None
             try:
-                self.db.delete_word(code)
-                self.table.removeRow(row)
-                QMessageBox.information(self, "Deleted", "Record deleted successfully.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete record: {e}")
+                filters = self.current_filter()
+            except ValueError:
+                filters = None
+            if filters is None:
+                QMessageBox.warning(self, "Warning", "Set at least one valid filter first.")
+                return
+            # تعداد فقط اگر صفحه فعلی با همین فیلترها خوانده شده باشد معلوم است
+            known = self._page and not self.pager.isHidden() and self._page[4] == filters
+            scope = f"all {self._page[2]} words matching the filters" if known else "all words matching the filters"
+
+        if action == "delete":
+            label, run = "Delete", lambda db: db.bulk_delete(codes, filters)
+        elif action == "reset":
+            label, run = "Reset the review state of", lambda db: db.bulk_reset(codes, filters)
+        elif action == "interval":
+            days, ok = QInputDialog.getInt(self, "Set Interval", "Interval (days):", 1, 1, 100000)
+            if not ok:
+                return
+            label, run = f"Set the interval to {days} days for", lambda db: db.bulk_set_interval(days, codes, filters)
+        elif action == "reschedule":
+            text, ok = QInputDialog.getText(self, "Reschedule", "Next review (YYYY-MM-DD or +N days):")
+            if not ok:
+                return
+            try:
+                day = parse_day(text)
+            except ValueError:
+                day = None
+            if day is None:
+                QMessageBox.warning(self, "Warning", "Enter a date as YYYY-MM-DD or a number of days (+3).")
+                return
+            label, run = f"Reschedule to {day}", lambda db: db.bulk_reschedule(day, codes, filters)
+        else:
+            deck_manager = DeckManager(DB_PATH)
+            names = [name for name in deck_manager.deck_names() if name != DEFAULT_DECK]
+            deck_manager.close()
+            if not names:
+                QMessageBox.warning(self, "Warning", "There is no other deck. Create one with decks.py first.")
+                return
+            deck, ok = QInputDialog.getItem(self, "Move to Deck", "Deck:", names, 0, False)
+            if not ok:
+                return
+            label, run = f"Move to deck {deck}", lambda db: db.bulk_move(deck, codes, filters)
+
+        confirm = QMessageBox.question(self, "Confirm", f"{label} {scope}?\nYou can undo this afterwards.",
+                                       QMessageBox.Yes | QMessageBox.No)
+        if confirm == QMessageBox.Yes:
+            self._submit_bulk(run)
+
+    def _submit_bulk(self, run):
+        """اجرای عملیات گروهی در thread کارگر؛ خروجی کار: (تعداد ردیف‌ها، برچسب Undo، برچسب Redo)"""
+        self._last_search = None
+        self.executor.submit("bulk", db_job(DatabaseManager, lambda db, ctx: (run(db),) + _history_labels(db)),
+                             on_result=lambda result: self._on_bulk_done(*result),
+                             on_error=lambda e: QMessageBox.critical(self, "Error", f"Bulk operation failed: {e}"))
+
+    def _on_bulk_done(self, affected, undo_label, redo_label):
+        self._update_history(undo_label, redo_label)
+        if not affected:
+            QMessageBox.information(self, "Bulk", "No matching records; nothing was changed.")
+            return
+        self._refresh()
+        self.status_label.setText(f"{undo_label}." if undo_label else "")
+
+    def undo_last(self):
+        self._replay("Undo", lambda db: db.undo())
+
+    def redo_last(self):
+        self._replay("Redo", lambda db: db.redo())
+
+    def _replay(self, name, run):
+        """Undo / Redo در thread کارگر؛ دکمه‌ها تا پایان کار غیرفعال‌اند تا دو Undo هم‌زمان اجرا نشوند"""
+        button = self.undo_button if name == "Undo" else self.redo_button
+        if not button.isEnabled():
+            return
+        self.undo_button.setEnabled(False)
+        self.redo_button.setEnabled(False)
+        self._last_search = None
+
+        def failed(e):
+            self._update_history(self.db.undo_label(), self.db.redo_label())
+            QMessageBox.critical(self, "Error", f"{name} failed: {e}")
+
+        self.executor.submit("history", db_job(DatabaseManager, lambda db, ctx: (run(db),) + _history_labels(db)),
+                             on_result=lambda result: self._on_replayed(name, *result),
+                             on_error=failed)
+
+    def _on_replayed(self, name, label, undo_label, redo_label):
+        self._update_history(undo_label, redo_label)
+        self._refresh()
+        if label:
+            self.status_label.setText(f"{name}: {label}.")
+
+    def _update_history(self, undo_label, redo_label):
+        self.undo_button.setEnabled(undo_label is not None)
+        self.undo_button.setToolTip(f"Undo: {undo_label} (Ctrl+Z)" if undo_label else "Nothing to undo")
+        self.redo_button.setEnabled(redo_label is not None)
+        self.redo_button.setToolTip(f"Redo: {redo_label} (Ctrl+Y)" if redo_label else "Nothing to redo")
+
+    def _refresh(self):
+        """خواندن دوباره نمای فعلی (صفحه اول Show All یا نتایج جستجو) پس از تغییر ردیف‌ها"""
+        if not self.pager.isHidden():
+            self._load_page(0)
+        elif self.search_input.text().strip():
+            self.live_search()
+        else:
+            self.clear_table()
 
     def go_back_to_menu(self):
-        # بستن اتصال دیتابیس هنگام خروج از صفحه
-        self.db.close()
+        self.release()
         if hasattr(self.owner, "stack") and hasattr(self.owner, "menu_page"):
             try:
                 self.owner.stack.setCurrentWidget(self.owner.menu_page)
@@ -471,6 +1580,7 @@ class EditRemovePage(QWidget):
 class EditMainMenu(QWidget):
     """صفحه انتخاب Add یا Edit"""
 
+    @timed("page.EditMainMenu")
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -0,0 +1,311 @@
+# fuzzy.py - ایندکس جستجوی تقریبی (مقاوم به غلط تایپی) روی ستون words به روش حذف‌های SymSpell
+#
+# برای هر کلمه (term) خودِ آن و تمام حالت‌های «حذف حداکثر MAX_DISTANCE حرف» از پیشوند PREFIX_LENGTH حرفی
+# آن ذخیره می‌شود. هنگام جستجو، حذف‌های تا همان عمق از پیشوند عبارت ساخته و با یک پرس‌وجوی ایندکس‌دار
+# کاندیداها پیدا می‌شوند (روش حذف متقارن: دو طرف باید تا یک عمق حذف شوند تا فاصله ۲ پیدا شود)؛ سپس
+# فاصله ویرایشی واقعی (Damerau-Levenshtein) بررسی می‌شود. هزینه جستجو به اندازه deck بستگی ندارد،
+# فقط به طول عبارت.
+#
+# ایندکس در فایل جداگانه‌ای کنار دیتابیس ("flash cards.fuzzy.db") نگه داشته می‌شود. جدول sources کلمه هر
+# ردیف my_table (با rowid) را نگه می‌دارد و meta شمارنده version در sync_meta را که ایندکس با آن هم‌گام
+# است؛ refresh فقط ردیف‌ها و tombstone های با version بزرگ‌تر را می‌خواند. پس هر تغییر، از برنامه یا از
+# بیرون (sync، ابزار دیگر)، در ایندکس دیده می‌شود و ساخت کامل فقط وقتی لازم است که نسخه ایندکس عوض شده،
+# شمارنده عقب رفته (جایگزینی فایل) یا تعداد تغییرات زیاد باشد.
+#
+#   python fuzzy.py rebuild
+#   python fuzzy.py lookup "recieve"
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from itertools import combinations
+
+from instrument import instrument_methods
+from migrations import connect
+from normalize import normalize_text
+
+# بیشترین فاصله ویرایشی پشتیبانی‌شده در جستجو
+MAX_DISTANCE = 2
+# فقط حذف‌های این تعداد حرف اول ایندکس می‌شوند (مانند SymSpell، برای محدود کردن حجم ایندکس)
+PREFIX_LENGTH = 7
+# با تغییر نحوه ساخت کلیدها افزایش می‌یابد تا ایندکس‌های قدیمی دوباره ساخته شوند
+INDEX_VERSION = 3
+# بیش از این تعداد ردیف تغییرکرده، ساخت کامل به جای به‌روزرسانی افزایشی
+REFRESH_ROWS = 20000
+
+
+def normalize_term(word):
+    """کلید ایندکس: همان کلید مقایسه normalize.py"""
+    return normalize_text(word)
+
+
+def _deletes(text, depth):
+    """تمام رشته‌های حاصل از حذف حداکثر depth حرف (به همراه خود رشته)"""
+    result = {text}
+    for n in range(1, min(depth, len(text)) + 1):
+        for positions in combinations(range(len(text)), n):
+            result.add("".join(ch for i, ch in enumerate(text) if i not in positions))
+    return result
+
+
+def term_variants(term):
+    """حالت‌هایی که برای یک term در ایندکس ذخیره می‌شوند"""
+    return _deletes(term[:PREFIX_LENGTH], MAX_DISTANCE)
+
+
+def edit_distance(a, b, limit=MAX_DISTANCE):
+    """فاصله Damerau-Levenshtein (نسخه OSA)؛ اگر از limit بیشتر شود limit + 1 برمی‌گرداند"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        prev_prev, prev = prev, current
+    return min(prev[-1], limit + 1)
+
+
+def index_path_for(db_path):
+    """مسیر فایل ایندکس کنار فایل دیتابیس"""
+    root, _ = os.path.splitext(db_path)
+    return root + ".fuzzy.db"
+
+
+@instrument_methods("db.fuzzy")
+class FuzzyIndex:
+    """ایندکس حذف‌ها در یک فایل SQLite جداگانه"""
+
+    def __init__(self, db_path, index_path=None):
+        self.db_path = db_path
+        self.index_path = index_path or index_path_for(db_path)
+        self.conn = sqlite3.connect(self.index_path)
+        self.cursor = self.conn.cursor()
+        self.cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS meta
+            (
+                key   TEXT PRIMARY KEY,
+                value INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS terms
+            (
+                term TEXT PRIMARY KEY,
+                refs INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS deletes
+            (
+                variant TEXT NOT NULL,
+                term    TEXT NOT NULL,
+                PRIMARY KEY (variant, term)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS sources
+            (
+                row  INTEGER PRIMARY KEY,
+                code TEXT,
+                term TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_sources_code ON sources (code);
+        """)
+        self.conn.commit()
+        # اتصال دیتابیس اصلی فقط هنگام نیاز باز می‌شود
+        self._source = None
+
+    # -------------------- ساخت و هم‌گام‌سازی --------------------
+    def _source_conn(self):
+        if self._source is None:
+            self._source = connect(self.db_path)
+        return self._source
+
+    @staticmethod
+    def _source_version(source):
+        row = source.execute("SELECT value FROM sync_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def _meta(self):
+        return dict(self.cursor.execute("SELECT key, value FROM meta").fetchall())
+
+    def is_stale(self):
+        """ایندکس وجود ندارد، با نسخه قدیمی ساخته شده یا تغییرات my_table هنوز در آن اعمال نشده‌اند"""
+        meta = self._meta()
+        return (meta.get("version") != INDEX_VERSION
+                or meta.get("source_version") != self._source_version(self._source_conn()))
+
+    def ensure_built(self):
+        """هم‌گام کردن ایندکس با my_table (افزایشی، یا ساخت کامل اگر لازم باشد)"""
+        if not self.refresh():
+            self.rebuild()
+
+    def rebuild(self):
+        """ساخت کامل ایندکس از روی my_table"""
+        source = self._source_conn()
+        # شمارنده و ردیف‌ها در یک تراکنش خواندنی تا با هم سازگار باشند
+        source.execute("BEGIN")
+        try:
+            version = self._source_version(source)
+            rows = [(row, str(code), term or "") for row, code, term in
+                    source.execute("SELECT rowid, code, words_norm FROM my_table")]
+        finally:
+            source.execute("COMMIT")
+
+        refs = {}
+        for _, _, term in rows:
+            if term:
+                refs[term] = refs.get(term, 0) + 1
+
+        with self.conn:
+            self.cursor.execute("DELETE FROM terms")
+            self.cursor.execute("DELETE FROM deletes")
+            self.cursor.execute("DELETE FROM sources")
+            self.cursor.executemany("INSERT INTO terms (term, refs) VALUES (?, ?)", refs.items())
+            self.cursor.executemany("INSERT OR IGNORE INTO deletes (variant, term) VALUES (?, ?)",
+                                    ((variant, term) for term in refs for variant in term_variants(term)))
+            self.cursor.executemany("INSERT INTO sources (row, code, term) VALUES (?, ?, ?)", rows)
+            self.cursor.execute("DELETE FROM meta")
+            self.cursor.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                    [("version", INDEX_VERSION), ("source_version", version)])
+
+    def refresh(self):
+        """
+        اعمال ردیف‌هایی از my_table که پس از آخرین هم‌گامی تغییر کرده یا حذف شده‌اند (بعد از هر commit صدا زده
+        می‌شود). خروجی: False اگر ساخت کامل لازم است
+        """
+        meta = self._meta()
+        since = meta.get("source_version")
+        if meta.get("version") != INDEX_VERSION or since is None:
+            return False
+        source = self._source_conn()
+        source.execute("BEGIN")
+        try:
+            version = self._source_version(source)
+            if version is None or version < since:
+                return False
+            if version == since:
+                return True
+            changed = source.execute("SELECT rowid, code, words_norm FROM my_table WHERE version > ? LIMIT ?",
+                                     (since, REFRESH_ROWS + 1)).fetchall()
+            stones = [code for (code,) in source.execute(
+                "SELECT code FROM sync_tombstones WHERE version > ? LIMIT ?", (since, REFRESH_ROWS + 1))]
+            # ردیف‌های زنده با کدهای حذف‌شده (اگر کدی در چند ردیف بوده و فقط یکی حذف شده)
+            alive = {row for (row,) in source.execute(
+                "SELECT rowid FROM my_table WHERE code IN (SELECT value FROM json_each(?))",
+                (json.dumps(stones, ensure_ascii=False),))}
+        finally:
+            source.execute("COMMIT")
+        if len(changed) + len(stones) > REFRESH_ROWS:
+            return False
+
+        with self.conn:
+            for row, code, term in changed:
+                code, term = str(code), term or ""
+                old = self.cursor.execute("SELECT code, term FROM sources WHERE row = ?", (row,)).fetchone()
+                if old == (code, term):
+                    continue
+                if old is not None:
+                    self._remove_term(old[1])
+                self._add_term(term)
+                self.cursor.execute("INSERT OR REPLACE INTO sources (row, code, term) VALUES (?, ?, ?)",
+                                    (row, code, term))
+            for code in stones:
+                for row, term in self.cursor.execute("SELECT row, term FROM sources WHERE code = ?",
+                                                     (code,)).fetchall():
+                    if row not in alive:
+                        self._remove_term(term)
+                        self.cursor.execute("DELETE FROM sources WHERE row = ?", (row,))
+            self.cursor.execute("UPDATE meta SET value = ? WHERE key = 'source_version'", (version,))
+        return True
+
+    def _add_term(self, term):
+        if not term:
+            return
+        self.cursor.execute("UPDATE terms SET refs = refs + 1 WHERE term = ?", (term,))
+        if self.cursor.rowcount == 0:
+            self.cursor.execute("INSERT INTO terms (term, refs) VALUES (?, 1)", (term,))
+            self.cursor.executemany("INSERT OR IGNORE INTO deletes (variant, term) VALUES (?, ?)",
+                                    ((variant, term) for variant in term_variants(term)))
+
+    def _remove_term(self, term):
+        if not term:
+            return
+        self.cursor.execute("UPDATE terms SET refs = refs - 1 WHERE term = ?", (term,))
+        self.cursor.execute("SELECT refs FROM terms WHERE term = ?", (term,))
+        row = self.cursor.fetchone()
+        if row is not None and row[0] <= 0:
+            self.cursor.execute("DELETE FROM terms WHERE term = ?", (term,))
+            self.cursor.executemany("DELETE FROM deletes WHERE variant = ? AND term = ?",
+                                    ((variant, term) for variant in term_variants(term)))
+
+    # -------------------- جستجو --------------------
+    def lookup(self, word, max_distance=MAX_DISTANCE, limit=5):
+        """
+        کلمات ایندکس‌شده با فاصله ویرایشی حداکثر max_distance.
+        خروجی: [(term, distance, refs)] مرتب بر اساس فاصله و سپس تعداد تکرار
+        """
+        term = normalize_term(word)
+        if not term:
+            return []
+        variants = list(_deletes(term[:PREFIX_LENGTH], max_distance))
+
+        candidates = {}
+        # محدودیت تعداد پارامترهای SQLite
+        for start in range(0, len(variants), 500):
+            batch = variants[start:start + 500]
+            self.cursor.execute(f"""
+                                SELECT DISTINCT t.term, t.refs
+                                FROM deletes d
+                                         JOIN terms t ON t.term = d.term
+                                WHERE d.variant IN ({",".join("?" * len(batch))})
+                                """, batch)
+            candidates.update(self.cursor.fetchall())
+
+        matches = []
+        for candidate, refs in candidates.items():
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance, refs))
+        matches.sort(key=lambda m: (m[1], -m[2], m[0]))
+        return matches[:limit]
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+        self.conn.close()
+
+
+def main(argv=None):
+    from review_engine import DB_PATH
+
+    parser = argparse.ArgumentParser(description="LexiMind fuzzy word index")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild")
+    lookup = sub.add_parser("lookup")
+    lookup.add_argument("word")
+    lookup.add_argument("--distance", type=int, default=MAX_DISTANCE)
+    args = parser.parse_args(argv)
+
+    index = FuzzyIndex(args.db)
+    try:
+        if args.command == "rebuild":
+            index.rebuild()
+            print(f"indexed {index.cursor.execute('SELECT COUNT(*) FROM terms').fetchone()[0]} terms")
+        else:
+            index.ensure_built()
+            for term, distance, refs in index.lookup(args.word, args.distance):
+                print(f"{term:<30} distance {distance}  rows {refs}")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# history.py - تاریخچه عملیات صفحه Edit برای Undo / Redo با before-image ردیف‌ها
+#
+# هر عملیات (ویرایش یا حذف یک کلمه، ذخیره جدول، عملیات گروهی) یک ردیف در edit_ops دارد. پیش از تغییر،
+# وضعیت ردیف‌هایی که تغییر می‌کنند (rowid و شش ستون کارت) با یک INSERT ... SELECT و در همان تراکنش عملیات
+# در edit_images نوشته می‌شود؛ ردیف‌هایی که عملیات می‌سازد (انتقال به deck دیگر) با present = 0 ثبت
+# می‌شوند. Undo همین تصویرها را با چند دستور set-based (DELETE / UPDATE / INSERT) در یک تراکنش
+# برمی‌گرداند و پیش از آن وضعیت فعلی همان ردیف‌ها را با phase = 1 ثبت می‌کند؛ Redo همین کار را برعکس انجام
+# می‌دهد. فقط ردیف‌های تغییرکرده ذخیره می‌شوند، نه کپی کل دیتابیس؛ تعداد عملیات نگه‌داشته‌شده در
+# edit.undo_depth (settings.py) است و عملیات جدید، عملیات Undo‌شده (Redo) را پاک می‌کند.
+#
+# وضعیت ردیف‌ها پس از عملیات هم (save_rows با phase = 1) ثبت می‌شود. Undo / Redo هر ستون را فقط وقتی
+# برمی‌گرداند که مقدار فعلی آن هنوز همان مقدار پس از عملیات باشد؛ ستونی که بعداً جای دیگری تغییر کرده
+# (مثلاً مرور کارت پس از ویرایش معنی، یا sync) دست نمی‌خورد. ردیفی که جای دیگری حذف شده برگردانده نمی‌شود و
+# ردیف حذف‌شده با عملیات هم اگر کد آن دوباره در جدول وجود داشته باشد برگردانده نمی‌شود.
+#
+# ردیف‌ها با rowid و code شناخته می‌شوند: اگر rowid ردیف حذف‌شده بعداً به ردیف جدیدی رسیده باشد،
+# ردیف برگردانده‌شده rowid تازه می‌گیرد و ردیف جدید دست نمی‌خورد.
+#
+#   python history.py              فهرست آخرین عملیات
+#   python history.py undo
+#   python history.py undo --to 42 برگرداندن عملیات 42 و همه عملیات بعد از آن (مثلاً یک جلسه ویرایش)
+#   python history.py redo
+
+import sys
+import argparse
+from datetime import datetime
+
+import review_engine
+from migrations import connect
+
+IMAGE_COLUMNS = ("code", "words", "meaning", "review_intervals", "count", "next_time_review")
+_COLUMNS = ", ".join(IMAGE_COLUMNS)
+
+
+def begin(conn, depth):
+    """
+    شروع ثبت یک عملیات (داخل تراکنش فراخواننده). عملیات Undo‌شده و عملیات قدیمی‌تر از depth حذف می‌شوند.
+    خروجی: شناسه عملیات
+    """
+    conn.execute("DELETE FROM edit_images WHERE op IN (SELECT id FROM edit_ops WHERE undone = 1)")
+    conn.execute("DELETE FROM edit_ops WHERE undone = 1")
+    op = conn.execute("INSERT INTO edit_ops (label, created_at) VALUES ('', ?)",
+                      (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),)).lastrowid
+    conn.execute("DELETE FROM edit_images WHERE op <= ?", (op - depth,))
+    conn.execute("DELETE FROM edit_ops WHERE id <= ?", (op - depth,))
+    return op
+
+
+def finish(conn, op, label):
+    """برچسب عملیات (مثلاً "Delete 120 words") پس از معلوم شدن تعداد ردیف‌ها"""
+    conn.execute("UPDATE edit_ops SET label = ? WHERE id = ?", (label, op))
+
+
+def save_rows(conn, op, deck, table, where, params=(), phase=0):
+    """before-image ردیف‌های table که شرط where را دارند (پیش از تغییر آن‌ها). خروجی: تعداد ردیف‌ها"""
+    return conn.execute(f"""
+                        INSERT INTO edit_images (op, deck, phase, row, present, {_COLUMNS})
+                        SELECT ?, ?, ?, rowid, 1, {_COLUMNS}
+                        FROM {table}
+                        WHERE {where}
+                        """, (op, deck, phase, *params)).rowcount
+
+
+def save_new_rows(conn, op, deck, table, after_rowid, phase=0):
+    """ردیف‌هایی که عملیات در table ساخته است (rowid بزرگ‌تر از after_rowid)؛ پیش از عملیات وجود نداشتند"""
+    return conn.execute(f"""
+                        INSERT INTO edit_images (op, deck, phase, row, present, {_COLUMNS})
+                        SELECT ?, ?, ?, rowid, 0, {_COLUMNS}
+                        FROM {table}
+                        WHERE rowid > ?
+                        """, (op, deck, phase, after_rowid)).rowcount
+
+
+def save_removed_rows(conn, op, deck, table, phase=1):
+    """ردیف‌های ثبت‌شده (phase 0) که عملیات حذف کرده است: در وضعیت پس از عملیات با present = 0 ثبت می‌شوند"""
+    return conn.execute(f"""
+                        INSERT INTO edit_images (op, deck, phase, row, present, {_COLUMNS})
+                        SELECT i.op, i.deck, ?, i.row, 0, {", ".join("i." + c for c in IMAGE_COLUMNS)}
+                        FROM edit_images i
+                        WHERE i.op = ?
+                          AND i.deck = ?
+                          AND i.phase = 0
+                          AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.rowid = i.row AND t.code IS i.code)
+                        """, (phase, op, deck)).rowcount
+
+
+def saved_rowids(op, deck):
+    """زیرپرس‌وجوی rowid ردیف‌های ثبت‌شده عملیات (برای محدود کردن دستور تغییر به همان ردیف‌ها)"""
+    return "SELECT row FROM edit_images WHERE op = ? AND deck = ? AND phase = 0", (op, deck)
+
+
+def changes(conn, op, deck, table, phase=0):
+    """
+    [(image, current)] برای ردیف‌های ثبت‌شده: image وضعیت ذخیره‌شده (None اگر ردیف پیش از عملیات نبود) و
+    current وضعیت فعلی در table (None اگر ردیف وجود ندارد)؛ هر کدام به شکل IMAGE_COLUMNS
+    """
+    width = len(IMAGE_COLUMNS)
+    result = []
+    for row in conn.execute(f"""
+                            SELECT i.present, {", ".join("i." + c for c in IMAGE_COLUMNS)},
+                                   t.rowid, {", ".join("t." + c for c in IMAGE_COLUMNS)}
+                            FROM edit_images i
+                                     LEFT JOIN {table} t ON t.rowid = i.row AND t.code IS i.code
+                            WHERE i.op = ?
+                              AND i.deck = ?
+                              AND i.phase = ?
+                            """, (op, deck, phase)):
+        image = tuple(row[1:1 + width]) if row[0] else None
+        current = tuple(row[2 + width:]) if row[1 + width] is not None else None
+        result.append((image, current))
+    return result
+
+
+def restore(conn, op, deck, table, phase=0):
+    """
+    برگرداندن ردیف‌های table به تصویرهای phase عملیات op (داخل تراکنش فراخواننده): phase 0 برای Undo و 1 برای
+    Redo. وضعیت فعلی همان ردیف‌ها پیش از تغییر در phase دیگر ثبت می‌شود تا عکس این کار هم ممکن باشد.
+    تصویرهای قبلی phase دیگر (وضعیتی که عملیات یا کار قبلی به جا گذاشته) تا پایان این تابع با phase = 2
+    نگه داشته می‌شوند تا ستون‌هایی که از آن زمان تغییر کرده‌اند برگردانده نشوند.
+    """
+    other = 1 - phase
+    conn.execute("DELETE FROM edit_images WHERE op = ? AND deck = ? AND phase = 2", (op, deck))
+    conn.execute("UPDATE edit_images SET phase = 2 WHERE op = ? AND deck = ? AND phase = ?", (op, deck, other))
+    # وضعیت فعلی ردیف‌هایی که هنوز وجود دارند
+    conn.execute(f"""
+                 INSERT INTO edit_images (op, deck, phase, row, present, {_COLUMNS})
+                 SELECT i.op, i.deck, ?, t.rowid, 1, {", ".join("t." + c for c in IMAGE_COLUMNS)}
+                 FROM edit_images i
+                          JOIN {table} t ON t.rowid = i.row AND t.code IS i.code
+                 WHERE i.op = ?
+                   AND i.deck = ?
+                   AND i.phase = ?
+                 """, (other, op, deck, phase))
+    # ردیف‌هایی که در آن وضعیت وجود نداشتند
+    conn.execute(f"""
+                 DELETE
+                 FROM {table}
+                 WHERE rowid IN (SELECT t.rowid
+                                 FROM edit_images i
+                                          JOIN {table} t ON t.rowid = i.row AND t.code IS i.code
+                                 WHERE i.op = ?
+                                   AND i.deck = ?
+                                   AND i.phase = ?
+                                   AND i.present = 0)
+                 """, (op, deck, phase))
+    # ردیف‌هایی که تغییر کرده‌اند: هر ستون فقط اگر از زمان ثبت تصویر phase 2 تغییر نکرده باشد. ردیفی که در
+    # تصویر phase 2 حذف شده بود (present = 0) و دوباره وجود دارد جای دیگری اضافه شده و دست نمی‌خورد.
+    # (عملیات ثبت‌شده پیش از وجود تصویر پس از عملیات، کل ردیف را برمی‌گردانند)
+    merged = ", ".join(f"""CASE
+                               WHEN a.row IS NULL OR (a.present = 1 AND {table}.{c} IS a.{c}) THEN i.{c}
+                               ELSE {table}.{c} END""" for c in IMAGE_COLUMNS)
+    conn.execute(f"""
+                 UPDATE {table}
+                 SET ({_COLUMNS}) = (SELECT {merged}
+                                     FROM edit_images i
+                                              LEFT JOIN edit_images a
+                                                        ON a.op = i.op AND a.deck = i.deck AND a.phase = 2
+                                                            AND a.row = i.row
+                                     WHERE i.op = ?
+                                       AND i.deck = ?
+                                       AND i.phase = ?
+                                       AND i.row = {table}.rowid)
+                 WHERE rowid IN (SELECT i.row
+                                 FROM edit_images i
+                                          JOIN {table} t ON t.rowid = i.row AND t.code IS i.code
+                                 WHERE i.op = ?
+                                   AND i.deck = ?
+                                   AND i.phase = ?
+                                   AND i.present = 1)
+                 """, (op, deck, phase, op, deck, phase))
+    # ردیف‌هایی که حذف شده‌اند: ابتدا آن‌هایی که rowid قبلی‌شان آزاد است و سپس بقیه با rowid تازه، تا rowid تازه
+    # جای ردیف بعدی را نگیرد. فقط ردیف‌هایی که خود عملیات حذف کرده بود (در تصویر phase 2 نیستند) و فقط اگر ردیفی
+    # با همان کد در این فاصله (مثلاً با sync) اضافه نشده باشد.
+    missing = f"""
+              FROM edit_images i
+              WHERE i.op = ?
+                AND i.deck = ?
+                AND i.phase = ?
+                AND i.present = 1
+                AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.rowid = i.row AND t.code IS i.code)
+                AND NOT EXISTS (SELECT 1
+                                FROM {table} t
+                                WHERE t.code = i.code
+                                  AND t.rowid NOT IN (SELECT row FROM edit_images WHERE op = ? AND deck = ?))
+                AND NOT EXISTS (SELECT 1
+                                FROM edit_images a
+                                WHERE a.op = i.op
+                                  AND a.deck = i.deck
+                                  AND a.phase = 2
+                                  AND a.row = i.row
+                                  AND a.present = 1)
+              """
+    conn.execute(f"""
+                 INSERT INTO {table} (rowid, {_COLUMNS})
+                 SELECT i.row, {", ".join("i." + c for c in IMAGE_COLUMNS)}
+                 {missing}
+                   AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.rowid = i.row)
+                 """, (op, deck, phase, op, deck))
+    # ردیف‌های برگردانده‌شده با همان rowid: در وضعیت قبل از این کار وجود نداشتند
+    conn.execute(f"""
+                 INSERT INTO edit_images (op, deck, phase, row, present, {_COLUMNS})
+                 SELECT i.op, i.deck, ?, i.row, 0, {", ".join("i." + c for c in IMAGE_COLUMNS)}
+                 FROM edit_images i
+                          JOIN {table} t ON t.rowid = i.row AND t.code IS i.code
+                 WHERE i.op = ?
+                   AND i.deck = ?
+                   AND i.phase = ?
+                   AND i.present = 1
+                   AND NOT EXISTS (SELECT 1
+                                   FROM edit_images o
+                                   WHERE o.op = i.op
+                                     AND o.deck = i.deck
+                                     AND o.phase = ?
+                                     AND o.row = i.row)
+                 """, (other, op, deck, phase, other))
+    last = conn.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {table}").fetchone()[0]
+    conn.execute(f"""
+                 INSERT INTO {table} ({_COLUMNS})
+                 SELECT {", ".join("i." + c for c in IMAGE_COLUMNS)}
+                 {missing}
+                 ORDER BY i.row
+                 """, (op, deck, phase, op, deck))
+    save_new_rows(conn, op, deck, table, last, other)
+    conn.execute("DELETE FROM edit_images WHERE op = ? AND deck = ? AND phase = 2", (op, deck))
+
+
+def last_op(conn):
+    """آخرین عملیات قابل Undo: (id, label, created_at) یا None"""
+    return conn.execute("""
+                        SELECT id, label, created_at
+                        FROM edit_ops
+                        WHERE undone = 0
+                        ORDER BY id DESC
+                        LIMIT 1
+                        """).fetchone()
+
+
+def next_redo(conn):
+    """اولین عملیات Undo‌شده (قابل Redo): (id, label, created_at) یا None"""
+    return conn.execute("""
+                        SELECT id, label, created_at
+                        FROM edit_ops
+                        WHERE undone = 1
+                        ORDER BY id
+                        LIMIT 1
+                        """).fetchone()
+
+
+def decks_of(conn, op):
+    return [deck for (deck,) in conn.execute("SELECT DISTINCT deck FROM edit_images WHERE op = ?", (op,))]
+
+
+def mark_undone(conn, op, undone=True):
+    conn.execute("UPDATE edit_ops SET undone = ? WHERE id = ?", (int(undone), op))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind edit history")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("command", nargs="?", choices=["list", "undo", "redo"], default="list")
+    parser.add_argument("--to", type=int, default=None, help="undo/redo every action up to this id")
+    args = parser.parse_args(argv)
+
+    if args.command in ("undo", "redo"):
+        # edit.DatabaseManager کش deck و ایندکس تقریبی را هم به‌روز می‌کند
+        from edit import DatabaseManager
+        db = DatabaseManager(args.db or review_engine.DB_PATH)
+        try:
+            undo = args.command == "undo"
+            done = 0
+            while True:
+                candidate = last_op(db.conn) if undo else next_redo(db.conn)
+                if candidate is None:
+                    break
+                if args.to is None:
+                    if done:
+                        break
+                elif candidate[0] < args.to if undo else candidate[0] > args.to:
+                    break
+                label = db.undo() if undo else db.redo()
+                print(f"{args.command}: {label}")
+                done += 1
+        finally:
+            db.close()
+        if not done:
+            print(f"nothing to {args.command}")
+        return 0
+
+    conn = connect(args.db or review_engine.DB_PATH)
+    try:
+        for op, label, created_at, undone, rows in conn.execute("""
+                SELECT o.id, o.label, o.created_at, o.undone, COUNT(i.row)
+                FROM edit_ops o
+                         LEFT JOIN edit_images i ON i.op = o.id AND i.phase = 0
+                GROUP BY o.id
+                ORDER BY o.id DESC"""):
+            print(f"{op:>5}  {created_at}  {label:<40} {rows:>7} rows{'  (undone)' if undone else ''}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# ingest.py - ورود گروهی کلمات از فایل‌های CSV / TSV با پردازش موازی
+#
+# هر فایل در برش‌های بایتی (هم‌تراز با انتهای خط) تقسیم می‌شود و برش‌ها در یک ProcessPoolExecutor
+# پردازش می‌شوند: جدا کردن ستون‌ها، حذف فاصله‌های اضافه، یکسان‌سازی (normalize_text)، بررسی
+# اعتبار و ساخت کد. پردازش اصلی فقط «نویسنده» است: ردیف‌های آماده را به ترتیب فایل دریافت،
+# تکراری‌ها و کدهای تکراری را کنار می‌گذارد و در دسته‌های BATCH_ROWS تایی در یک تراکنش درج می‌کند.
+# ستون‌های words_norm / meaning_norm و version / modified (sync.py) همراه ردیف درج می‌شوند تا trigger ها
+# برای هر ردیف دوباره اجرا نشوند.
+#
+# قالب هر خط: word,meaning[,count] (در فایل‌های .tsv / .txt با Tab). خط عنوان (word,meaning) رد می‌شود.
+# فیلدهای چندخطی داخل "..." پشتیبانی نمی‌شوند.
+#
+#   python ingest.py words.csv more.tsv --workers 4
+#   python ingest.py words.csv --dry-run        فقط بررسی و گزارش خطاها
+
+import os
+import csv
+import sys
+import random
+import string
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from instrument import timer
+import review_engine
+from deck_cache import get_cache
+from migrations import connect
+from normalize import normalize_text
+from sync import next_version, now_ms
+
+# اندازه تقریبی هر برش (بایت)
+SHARD_BYTES = 1 << 20
+# تعداد ردیف در هر تراکنش درج
+BATCH_ROWS = 5000
+MAX_WORD_LENGTH = 100
+MAX_MEANING_LENGTH = 500
+
+_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def _clean(text):
+    return " ".join(text.split())
+
+
+def _delimiter_for(path):
+    return "," if path.lower().endswith(".csv") else "\t"
+
+
+def shard_file(path, shard_bytes=SHARD_BYTES):
+    """تقسیم فایل به بازه‌های (start, end) بایتی که هر کدام با شروع یک خط آغاز می‌شوند"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        while bounds[-1] + shard_bytes < size:
+            f.seek(bounds[-1] + shard_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    return list(zip(bounds, bounds[1:] + [size]))
+
+
+# ======================= Worker =======================
+def transform_shard(path, start, end, default_count):
+    """
+    پردازش یک برش در پردازش کارگر.
+    خروجی: (rows, errors, line_count) که rows شامل (line, code, word, meaning, count, words_norm, meaning_norm)
+    و errors شامل (line, message) است؛ شماره خط‌ها نسبت به ابتدای برش هستند.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    text = data.decode("utf-8-sig" if start == 0 else "utf-8")
+    lines = text.replace("\r\n", "\n").split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    rng = random.Random()
+    rows, errors = [], []
+    for line_no, fields in enumerate(csv.reader(lines, delimiter=_delimiter_for(path)), 1):
+        if not fields or not any(field.strip() for field in fields):
+            continue
+        word = _clean(fields[0])
+        meaning = _clean(fields[1]) if len(fields) > 1 else ""
+        if start == 0 and line_no == 1 and word.lower() == "word":
+            continue
+        if not word or not meaning:
+            errors.append((line_no, "missing word or meaning"))
+            continue
+        if len(word) > MAX_WORD_LENGTH or len(meaning) > MAX_MEANING_LENGTH:
+            errors.append((line_no, "word or meaning too long"))
+            continue
+        count = default_count
+        if len(fields) > 2 and fields[2].strip():
+            try:
+                count = int(fields[2])
+            except ValueError:
+                count = 0
+            if not 1 <= count <= review_engine.REVIEW_THRESHOLD:
+                errors.append((line_no, f"count must be 1-{review_engine.REVIEW_THRESHOLD}"))
+                continue
+        code = "".join(rng.choices(_CODE_ALPHABET, k=6))
+        rows.append((line_no, code, word, meaning, count, normalize_text(word), normalize_text(meaning)))
+    return rows, errors, len(lines)
+
+
+# ======================= Writer =======================
+class Importer:
+    """ورود موازی فایل‌ها با یک نویسنده"""
+
+    def __init__(self, db_path=None, workers=None, default_count=review_engine.REVIEW_THRESHOLD,
+                 allow_duplicates=False):
+        self.db_path = db_path or review_engine.DB_PATH
+        self.workers = workers or os.cpu_count() or 1
+        self.default_count = default_count
+        self.allow_duplicates = allow_duplicates
+        self.errors = []
+        self.skipped = 0
+
+    def _unique_code(self, code, codes):
+        while code in codes:
+            code = "".join(random.choices(_CODE_ALPHABET, k=6))
+        codes.add(code)
+        return code
+
+    def run(self, paths, dry_run=False, progress=None):
+        """
+        ورود فایل‌ها. progress(done_shards, total_shards) پس از هر برش صدا زده می‌شود.
+        خروجی: تعداد ردیف‌های درج‌شده (یا قابل درج در dry_run)
+        """
+        jobs = [(path, start, end) for path in paths for start, end in shard_file(path)]
+        conn = connect(self.db_path)
+        try:
+            codes = {str(code) for (code,) in conn.execute("SELECT code FROM my_table")}
+            seen = set()
+            if not self.allow_duplicates:
+                seen = {norm for (norm,) in conn.execute("SELECT words_norm FROM my_table")}
+            next_review = datetime.now().strftime("%Y-%m-%d 00:00:00")
+
+            inserted = 0
+            batch = []
+            # شماره خط شروع هر برش = مجموع خط‌های برش‌های قبلی همان فایل
+            line_base = {}
+            # spawn به جای fork تا پردازش‌های کارگر اتصال‌های SQLite و thread های پردازش اصلی را به ارث نبرند
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+                    timer("ingest.run", shards=len(jobs)):
+                results = pool.map(transform_shard, *zip(*jobs), [self.default_count] * len(jobs)) if jobs else []
+                for done, ((path, _, _), (rows, errors, line_count)) in enumerate(zip(jobs, results), 1):
+                    base = line_base.get(path, 0)
+                    line_base[path] = base + line_count
+                    self.errors += [(path, base + line, message) for line, message in errors]
+                    for line, code, word, meaning, count, word_norm, meaning_norm in rows:
+                        if word_norm in seen:
+                            self.skipped += 1
+                            continue
+                        if not self.allow_duplicates:
+                            seen.add(word_norm)
+                        batch.append((self._unique_code(code, codes), word, meaning, count, word_norm, meaning_norm))
+                    if len(batch) >= BATCH_ROWS:
+                        inserted += self._write(conn, batch, next_review, dry_run)
+                        batch = []
+                    if progress:
+                        progress(done, len(jobs))
+                inserted += self._write(conn, batch, next_review, dry_run)
+        finally:
+            conn.close()
+        return inserted
+
+    def _write(self, conn, batch, next_review, dry_run):
+        """درج یک دسته در یک تراکنش و به‌روزرسانی کش"""
+        if not batch or dry_run:
+            return len(batch)
+        with timer("ingest.write", rows=len(batch)), conn:
+            # یک version مشترک برای کل دسته تا trigger ردیابی تغییرات برای هر ردیف اجرا نشود
+            version = next_version(conn)
+            modified = now_ms(conn)
+            conn.executemany("""
+                             INSERT INTO my_table (code, words, meaning, review_intervals, count, next_time_review,
+                                                   words_norm, meaning_norm, modified, version)
+                             VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+                             """, [(code, word, meaning, count, next_review, word_norm, meaning_norm, modified, version)
+                                   for code, word, meaning, count, word_norm, meaning_norm in batch])
+        cache = get_cache(self.db_path)
+        if cache:
+            for code, word, meaning, count, word_norm, meaning_norm in batch:
+                cache.apply_insert(code, word, meaning, 1, count, next_review, word_norm, meaning_norm)
+        return len(batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind bulk import")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--count", type=int, default=review_engine.REVIEW_THRESHOLD,
+                        help="initial count for rows without one")
+    parser.add_argument("--allow-duplicates", action="store_true", help="import words that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, do not write")
+    args = parser.parse_args(argv)
+
+    importer = Importer(args.db, args.workers, args.count, args.allow_duplicates)
+
+    def report(done, total):
+        print(f"\rshards {done}/{total}", end="" if done < total else "\n", flush=True)
+
+    inserted = importer.run(args.files, args.dry_run, report)
+    for path, line, message in importer.errors[:50]:
+        print(f"{path}:{line}: {message}")
+    if len(importer.errors) > 50:
+        print(f"... {len(importer.errors) - 50} more errors")
+    action = "would import" if args.dry_run else "imported"
+    print(f"{action} {inserted} words, skipped {importer.skipped} duplicates, {len(importer.errors)} invalid lines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# instrument.py - لایه سبک اندازه‌گیری زمان (تایمر، شمارنده و لاگ ساختاریافته JSONL)
+
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import functools
+import threading
+from collections import deque
+
+# این قسمت مسیر پیش‌فرض فایل لاگ را مانند DB_PATH تعریف می‌کند
+if getattr(sys, 'frozen', False):
+    # در حالت EXE پوشه موقت PyInstaller پاک می‌شود، پس لاگ کنار فایل اجرایی نوشته می‌شود
+    base_path = os.path.dirname(sys.executable)
+else:
+    base_path = os.path.abspath(os.path.dirname(__file__))
+
+# فعال‌سازی فقط با متغیر محیطی LEXIMIND_TRACE=1
+# وقتی غیرفعال است، دکوراتورها تابع اصلی را بدون هیچ لفافه‌ای برمی‌گردانند (هزینه صفر).
+ENABLED = os.environ.get("LEXIMIND_TRACE", "") not in ("", "0")
+LOG_PATH = os.environ.get("LEXIMIND_TRACE_LOG") or os.path.join(base_path, "leximind_timing.jsonl")
+
+# تعداد نمونه‌های نگه‌داری‌شده برای محاسبه p50/p95 هر رویداد
+SAMPLE_WINDOW = 500
+
+
+class Recorder:
+    """جمع‌آوری نمونه‌های زمانی و شمارنده‌ها و نوشتن آن‌ها در فایل JSONL"""
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.samples = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._log_file = None
+
+    def record(self, name, elapsed_ms, **fields):
+        """ثبت یک نمونه زمانی (میلی‌ثانیه)"""
+        with self._lock:
+            bucket = self.samples.get(name)
+            if bucket is None:
+                bucket = self.samples[name] = deque(maxlen=SAMPLE_WINDOW)
+            bucket.append(elapsed_ms)
+            self._write({"ts": round(time.time(), 6), "kind": "timer", "name": name,
+                         "ms": round(elapsed_ms, 3), **fields})
+
+    def count(self, name, n=1, **fields):
+        """افزایش یک شمارنده"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            self._write({"ts": round(time.time(), 6), "kind": "counter", "name": name,
+                         "value": self.counters[name], **fields})
+
+    def percentiles(self):
+        """خروجی: {name: (n, p50, p95)} برای تمام رویدادهای ثبت‌شده"""
+        with self._lock:
+            snapshot = {name: sorted(bucket) for name, bucket in self.samples.items()}
+        result = {}
+        for name, values in snapshot.items():
+            if values:
+                result[name] = (len(values), percentile(values, 0.50), percentile(values, 0.95))
+        return result
+
+    def _write(self, event):
+        if not self.log_path:
+            return
+        try:
+            if self._log_file is None:
+                self._log_file = open(self.log_path, "a", encoding="utf-8")
+            self._log_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            # خطای نوشتن لاگ نباید برنامه را متوقف کند
+            self.log_path = None
+
+    def flush(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+
+def percentile(sorted_values, q):
+    """انتخاب صدک q از لیست مرتب‌شده (nearest-rank)"""
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+recorder = Recorder(LOG_PATH if ENABLED else None)
+atexit.register(recorder.close)
+
+
+# ======================= API =======================
+class _Timer:
+    """context manager اندازه‌گیری زمان یک بلوک کد"""
+    __slots__ = ("name", "fields", "start")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = (time.perf_counter() - self.start) * 1000.0
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        recorder.record(self.name, elapsed, **self.fields)
+        return False
+
+
+class _NullTimer:
+    """نسخه بی‌اثر تایمر برای حالت غیرفعال"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name, **fields):
+    """
+    استفاده: with timer("db.search", query=q): ...
+    در حالت غیرفعال یک شیء مشترک بی‌اثر برمی‌گرداند.
+    """
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, fields)
+
+
+def count(name, n=1, **fields):
+    """افزایش شمارنده name (در حالت غیرفعال هیچ کاری نمی‌کند)"""
+    if ENABLED:
+        recorder.count(name, n, **fields)
+
+
+def timed(name=None):
+    """دکوراتور اندازه‌گیری زمان یک تابع. اگر غیرفعال باشد خود تابع برگردانده می‌شود."""
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(label, (time.perf_counter() - start) * 1000.0)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(prefix):
+    """
+    دکوراتور کلاس: تمام متدهای عمومی کلاس (به جز __init__ و متدهای خصوصی) را با timed می‌پوشاند.
+    نام رویداد: prefix.method_name
+    """
+
+    def decorator(cls):
+        if not ENABLED:
+            return cls
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not callable(value):
+                continue
+            setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+
+    return decorator
@@ -0,0 +1,199 @@
+# journal.py - journal ترتیبی پاسخ‌های مرور برای نوشتن دسته‌ای بدون از دست دادن پاسخ‌ها
+#
+# ReviewWriter هر پاسخ را ابتدا به انتهای این فایل اضافه می‌کند (پاسخ‌های هم‌زمان با یک fsync) و
+# دیتابیس را فقط در دسته‌های بزرگ commit می‌کند. هر commit دیتابیس (session, seq) آخرین ردیف
+# journal را در جدول review_journal و در همان تراکنش ثبت می‌کند و پس از آن فایل خالی می‌شود.
+# اگر برنامه پیش از commit بسته شود، ردیف‌های بعد از آن seq هنگام شروع بعدی (recover) در یک تراکنش
+# در دیتابیس نوشته می‌شوند؛ پس هر پاسخ دقیقاً یک بار در review_log ثبت می‌شود.
+#
+# قالب فایل ("flash cards.review-journal" کنار دیتابیس):
+#   خط اول: {"journal": 1, "session": "..."}
+#   هر پاسخ: crc32 (8 رقم hex)، یک فاصله و [seq, deck, code, interval, count, next_time_review,
+#            result, response_ms, reviewed_at] به صورت JSON
+# خط ناقص یا خراب انتهای فایل (نوشتن نیمه‌کاره هنگام قطع برق) و هر چه بعد از آن است نادیده گرفته می‌شود.
+# فقط یک نویسنده (صفحه مرور برنامه اصلی) از journal استفاده می‌کند.
+#
+#   python journal.py              وضعیت journal
+#   python journal.py recover
+
+import os
+import sys
+import glob
+import json
+import uuid
+import zlib
+import argparse
+
+import review_engine
+from review_engine import Grade
+from decks import DEFAULT_DECK, DeckManager
+
+FORMAT_VERSION = 1
+
+
+def journal_path_for(db_path):
+    """مسیر journal کنار فایل دیتابیس"""
+    root, _ = os.path.splitext(db_path)
+    return root + ".review-journal"
+
+
+def _entry(seq, grade):
+    deck, code = grade.code if isinstance(grade.code, tuple) else (None, grade.code)
+    payload = json.dumps([seq, deck, code, grade.interval, grade.count, grade.next_time_review,
+                          grade.result, grade.response_ms, grade.reviewed_at], ensure_ascii=False).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def read_journal(path):
+    """خروجی: (session, [(seq, deck, Grade)]) یا (None, []) اگر فایل نباشد یا سرآیند آن خراب باشد"""
+    try:
+        with open(path, "rb") as f:
+            lines = f.read().split(b"\n")
+    except OSError:
+        return None, []
+    try:
+        header = json.loads(lines[0])
+        session = header["session"] if header.get("journal") == FORMAT_VERSION else None
+    except (ValueError, KeyError, TypeError):
+        session = None
+    if session is None:
+        return None, []
+
+    entries = []
+    # آخرین عنصر split یا خالی است یا خط ناقص
+    for line in lines[1:-1]:
+        crc, _, payload = line.partition(b" ")
+        try:
+            if int(crc, 16) != zlib.crc32(payload):
+                break
+            seq, deck, code, interval, cnt, next_review, result, response_ms, reviewed_at = json.loads(payload)
+        except ValueError:
+            break
+        entries.append((seq, deck, Grade(code, interval, cnt, next_review, result, response_ms, reviewed_at)))
+    return session, entries
+
+
+def recover(db_path=None):
+    """
+    نوشتن پاسخ‌های journal ها که هنوز در دیتابیس نیستند (پس از بسته شدن ناگهانی برنامه) و حذف فایل‌ها.
+    خروجی: تعداد پاسخ‌های بازیابی‌شده (یا None اگر نوشتن در دیتابیس ناموفق بود و فایل حفظ شد)
+    """
+    db_path = db_path or review_engine.DB_PATH
+    base = journal_path_for(db_path)
+    total = 0
+    # journal اصلی و journal هایی که پس از بازیابی ناموفق با پسوند جدا ساخته شده‌اند
+    for path in sorted(glob.glob(glob.escape(base) + "*")):
+        recovered = _recover_file(db_path, path)
+        if recovered is None:
+            return None
+        total += recovered
+    return total
+
+
+def _recover_file(db_path, path):
+    session, entries = read_journal(path)
+    recovered = 0
+    if entries:
+        manager = DeckManager(db_path)
+        try:
+            row = manager.conn.execute("SELECT session, seq FROM review_journal WHERE id = 1").fetchone()
+            applied = row[1] if row and row[0] == session else 0
+            decks = set(manager.deck_names())
+            grades = []
+            for seq, deck, grade in entries:
+                deck = deck or DEFAULT_DECK
+                if seq <= applied:
+                    continue
+                if deck not in decks:
+                    print(f"Error recovering review journal: unknown deck {deck}")
+                    continue
+                grades.append(grade._replace(code=(deck, grade.code)))
+            if grades:
+                if not manager.apply_review_batch(grades, (session, entries[-1][0])):
+                    return None
+                recovered = len(grades)
+        finally:
+            manager.close()
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"Error removing review journal: {e}")
+    return recovered
+
+
+class GradeJournal:
+    """journal یک جلسه مرور؛ فقط از thread نویسنده (ReviewWriter) استفاده می‌شود"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or review_engine.DB_PATH
+        self.path = journal_path_for(self.db_path)
+        # باقی‌مانده اجرای قبلی پیش از بازنویسی فایل در دیتابیس نوشته می‌شود
+        if recover(self.db_path) is None:
+            # فایل قبلی حفظ می‌شود و این جلسه journal جداگانه می‌گیرد
+            self.path = f"{self.path}.{uuid.uuid4().hex[:8]}"
+        self.session = uuid.uuid4().hex
+        self.seq = 0
+        self._file = open(self.path, "wb")
+        self._write_header()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_header(self):
+        self._file.write(json.dumps({"journal": FORMAT_VERSION, "session": self.session}).encode("utf-8") + b"\n")
+        self._sync()
+
+    def append(self, grades):
+        """افزودن پاسخ‌ها با یک write و یک fsync"""
+        chunks = []
+        for grade in grades:
+            self.seq += 1
+            chunks.append(_entry(self.seq, grade))
+        self._file.write(b"".join(chunks))
+        self._sync()
+
+    def checkpoint(self):
+        """(session, seq) آخرین پاسخ نوشته‌شده در journal؛ همراه تراکنش دیتابیس ثبت می‌شود"""
+        return self.session, self.seq
+
+    def reset(self):
+        """خالی کردن فایل پس از commit دیتابیس (seq ادامه پیدا می‌کند)"""
+        self._file.seek(0)
+        self._file.truncate()
+        self._write_header()
+
+    def close(self, remove=True):
+        """remove=False: فایل برای بازیابی در اجرای بعدی باقی می‌ماند"""
+        self._file.close()
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                print(f"Error removing review journal: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind review journal")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("command", nargs="?", choices=["status", "recover"], default="status")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or review_engine.DB_PATH
+    if args.command == "recover":
+        recovered = recover(db_path)
+        if recovered is None:
+            print("recovery failed; the journal was kept")
+            return 1
+        print(f"recovered {recovered} answers")
+        return 0
+    session, entries = read_journal(journal_path_for(db_path))
+    if session is None:
+        print("no journal (last session closed cleanly)")
+    else:
+        print(f"session {session}: {len(entries)} answers not yet confirmed in the database")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
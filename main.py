@@ -1,13 +1,23 @@
 # main.py - کد نهایی با تاریخ و دکمه About فقط در منوی اصلی و بستن ایمن دیتابیس
 
 import sys
+import sqlite3
+import multiprocessing
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QStackedWidget,
-    QDialog, QLabel, QTextEdit, QGridLayout
+    QDialog, QLabel, QTextEdit, QGridLayout, QShortcut, QMessageBox, QProgressDialog
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QTimer
+from PyQt5.QtGui import QKeySequence
 from background import AnimatedBackground, AnimatedBackground2
-from review import ReviewPage
+import instrument
+from instrument import timed
+import migrations
+import deck_cache
+import journal
+import settings
+from settings import get_settings
+from review import ReviewPage, DB_PATH
 from edit import EditMainMenu
 from edit import AddWordPage, EditRemovePage
 
@@ -175,6 +185,45 @@ class AboutDialog(QDialog):
         layout.addWidget(close_button, alignment=Qt.AlignCenter)
 
 
+# ------------------------------------------------------------------
+# **Overlay زمان‌سنجی (فقط وقتی LEXIMIND_TRACE فعال است)**
+# ------------------------------------------------------------------
+class TimingOverlay(QLabel):
+    """نمایش p50/p95 رویدادهای ثبت‌شده در گوشه پنجره (با F12 نمایش/مخفی می‌شود)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.setStyleSheet("""
+            QLabel {
+                color: #7CFC00;
+                background-color: rgba(0, 0, 0, 190);
+                font-family: 'Consolas', 'Courier New', monospace;
+                font-size: 12px;
+                padding: 6px;
+                border-radius: 6px;
+            }
+        """)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        """بازسازی متن جدول صدک‌ها از روی recorder"""
+        stats = instrument.recorder.percentiles()
+        lines = [f"{'event':<32}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}"]
+        for name in sorted(stats):
+            n, p50, p95 = stats[name]
+            lines.append(f"{name[:31]:<32}{n:>6}{p50:>10.2f}{p95:>10.2f}")
+        for name, value in sorted(instrument.recorder.counters.items()):
+            lines.append(f"{name[:31]:<32}{value:>6}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.raise_()
+
+
 # ------------------------------------------------------------------
 
 
@@ -185,8 +234,11 @@ class MainWindow(QWidget):
         self.resize(900, 600)
 
         # **تعریف و تنظیم پس‌زمینه‌ها**
-        self.bg = AnimatedBackground(self, count=35)
-        self.bg2 = AnimatedBackground2(self, count=35)  # <-- پس‌زمینه دوم/روشن
+        # تعداد حروف و فاصله فریم‌ها از تنظیمات خوانده می‌شود
+        ui = get_settings()
+        letters, frame_ms = ui.get("ui.background_letters"), ui.get("ui.background_frame_ms")
+        self.bg = AnimatedBackground(self, count=letters, interval=frame_ms)
+        self.bg2 = AnimatedBackground2(self, count=letters, interval=frame_ms)  # <-- پس‌زمینه دوم/روشن
         self.current_theme = "dark"  # تم پیش‌فرض
 
         self.bg.setGeometry(0, 0, self.width(), self.height())
@@ -213,6 +265,14 @@ class MainWindow(QWidget):
         self.setLayout(layout)
         self.stack.raise_()
 
+        # Overlay زمان‌سنجی فقط در حالت trace ساخته می‌شود
+        self.timing_overlay = None
+        if instrument.ENABLED:
+            self.timing_overlay = TimingOverlay(self)
+            self.timing_overlay.move(10, 10)
+            QShortcut(QKeySequence(Qt.Key_F12), self).activated.connect(
+                lambda: self.timing_overlay.setVisible(not self.timing_overlay.isVisible()))
+
     def resizeEvent(self, event):
         # **تنظیم اندازه برای هر دو پس‌زمینه**
         self.bg.setGeometry(0, 0, self.width(), self.height())
@@ -365,20 +425,26 @@ class MainWindow(QWidget):
         # مطمئن شو که stack در بالاترین لایه قرار دارد
         self.stack.raise_()
 
+    @timed("nav.show_review")
     def show_review(self):
         from review import ReviewPage
         # بستن و حذف صفحه قبلی اگر وجود داشت (برای جلوگیری از انباشتگی و بستن اتصال دیتابیس قبلی)
         if self.review_page:
             self.close_review_page_db()
             self.stack.removeWidget(self.review_page)
+            self.review_page.deleteLater()
 
         self.review_page = ReviewPage(self)
         self.stack.addWidget(self.review_page)
         self.stack.setCurrentWidget(self.review_page)
 
+    @timed("nav.show_edit")
     def show_edit(self):
-        # بستن اتصالات دیتابیس EditMenu قبلی
-        self.close_edit_menu_db()
+        # بستن اتصالات دیتابیس EditMenu قبلی و حذف صفحه آن
+        if self.edit_menu:
+            self.close_edit_menu_db()
+            self.stack.removeWidget(self.edit_menu)
+            self.edit_menu.deleteLater()
 
         # ساخت instance جدید از EditMainMenu برای اطمینان از اتصالات دیتابیس جدید
         self.edit_menu = EditMainMenu(self)
@@ -386,11 +452,8 @@ class MainWindow(QWidget):
         self.stack.setCurrentWidget(self.edit_menu)
 
     def close_review_page_db(self):
-        if self.review_page and hasattr(self.review_page, 'db'):
-            try:
-                self.review_page.db.close()
-            except Exception:
-                pass
+        if self.review_page:
+            self.review_page.release()
 
     def close_edit_menu_db(self):
         """بستن اتصالات Edit/Add"""
@@ -400,11 +463,7 @@ class MainWindow(QWidget):
                     self.edit_menu.add_page.db.close()
                 except Exception:
                     pass
-            if hasattr(self.edit_menu.edit_page, 'db'):
-                try:
-                    self.edit_menu.edit_page.db.close()
-                except Exception:
-                    pass
+            self.edit_menu.edit_page.release()
 
     def close_db_connections(self):
         """بستن تمام اتصالات دیتابیس قبل از خروج برنامه"""
@@ -421,7 +480,16 @@ class MainWindow(QWidget):
         self.close()
 
     def closeEvent(self, event):
+        # نتایج مرورِ در صف جلسه‌های باز پیش از بستن اتصالات نوشته می‌شوند
+        for i in range(self.stack.count()):
+            page = self.stack.widget(i)
+            if hasattr(page, "writer"):
+                page.writer.close()
         self.close_db_connections()  # بستن اتصالات هنگام کلیک روی دکمه X
+        instrument.recorder.flush()
+        settings.flush_all()
+        # پس از آخرین نوشتن: snapshot کش deck برای شروع سریع اجرای بعدی
+        deck_cache.save_snapshots()
         # **توقف تایمرهای هر دو پس‌زمینه**
         if hasattr(self.bg, "timer"):
             self.bg.timer.stop()
@@ -433,8 +501,50 @@ class MainWindow(QWidget):
 # ------------------------------------------------------------------
 # نقطه ورودی اصلی برنامه
 # ------------------------------------------------------------------
+def run_migrations():
+    """ارتقای اسکیمای دیتابیس پیش از ساخت صفحات (با نوار پیشرفت برای بازنویسی‌های طولانی)"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not migrations.pending_migrations(conn):
+            return True
+        dialog = QProgressDialog("Upgrading database...", None, 0, 0)
+        dialog.setWindowTitle("LexiMind")
+        dialog.setMinimumDuration(500)
+
+        def report(description, done, total):
+            dialog.setLabelText(f"Upgrading database: {description}")
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            QApplication.processEvents()
+
+        migrations.upgrade(conn, report)
+        dialog.close()
+        return True
+    except Exception as e:
+        print(f"Error upgrading database: {e}")
+        QMessageBox.critical(None, "Error", f"Failed to upgrade the database:\n{e}")
+        return False
+    finally:
+        conn.close()
+
+
+def recover_review_journal():
+    """پاسخ‌های جلسه مرور قبلی که پیش از بسته شدن ناگهانی برنامه در دیتابیس نوشته نشده بودند"""
+    recovered = journal.recover(DB_PATH)
+    if recovered is None:
+        QMessageBox.warning(None, "Warning", "Some answers from the last review session could not be saved.\n"
+                                             "They are kept and will be retried next time.")
+    elif recovered:
+        print(f"Recovered {recovered} review answers from the journal")
+
+
 if __name__ == '__main__':
+    # process pool تلفظ (audio.py) در نسخه EXE به این فراخوانی نیاز دارد
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
+    if not run_migrations():
+        sys.exit(1)
+    recover_review_journal()
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
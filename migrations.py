@@ -0,0 +1,517 @@
+# migrations.py - ارتقای نسخه‌دار اسکیمای دیتابیس (PRAGMA user_version)
+#
+# هر مرحله (Migration) یک شماره نسخه دارد و مراحل به ترتیب، هر کدام در یک تراکنش، اجرا می‌شوند؛
+# user_version در همان تراکنش به‌روز می‌شود، پس هر مرحله دقیقاً یک بار اعمال می‌شود.
+# بازنویسی‌های بزرگ (پر کردن ستون جدید، کپی جدول برای تغییر نوع ستون) با ctx.chunked در برش‌های
+# rowid و هر برش در تراکنش جداگانه انجام می‌شوند تا دیتابیس‌های بزرگ چند دقیقه قفل نشوند.
+# چنین مراحلی باید تکرارپذیر باشند (مثلاً WHERE column IS NULL) تا اجرای نیمه‌کاره از سر گرفته شود.
+#
+# همه اتصال‌های برنامه با connect() باز می‌شوند: توابع SQL ثبت و اسکیمای فایل (یک بار در هر
+# پردازش) به آخرین نسخه ارتقا داده می‌شود.
+#
+#   python migrations.py            نمایش نسخه فعلی و مراحل باقی‌مانده
+#   python migrations.py upgrade
+
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+from collections import namedtuple
+
+from instrument import timer
+from normalize import register_functions
+
+# تعداد ردیف در هر برش بازنویسی
+CHUNK_ROWS = 20_000
+
+Migration = namedtuple("Migration", ["version", "description", "apply"])
+
+
+class MigrationContext:
+    """امکانات در اختیار هر مرحله: اجرای SQL داخل تراکنش و بازنویسی تکه‌تکه با گزارش پیشرفت"""
+
+    def __init__(self, conn, migration, progress=None):
+        self.conn = conn
+        self.migration = migration
+        self._progress = progress
+        self.reported = False
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def columns(self, table):
+        return {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+
+    def report(self, done, total):
+        self.reported = True
+        if self._progress:
+            self._progress(self.migration.description, done, total)
+
+    def chunked(self, sql, table="my_table", chunk_rows=CHUNK_ROWS):
+        """
+        اجرای sql روی بازه‌های rowid جدول table؛ sql باید شرط «rowid >= :lo AND rowid < :hi» را داشته باشد.
+        تراکنش جاری ابتدا commit می‌شود، هر برش در تراکنش خودش اجرا و در پایان تراکنش جدیدی باز می‌شود.
+        """
+        self.conn.execute("COMMIT")
+        lo, hi = self.conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+        if lo is not None:
+            total = hi - lo + 1
+            start = lo
+            while start <= hi:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute(sql, {"lo": start, "hi": start + chunk_rows})
+                self.conn.execute("COMMIT")
+                start += chunk_rows
+                self.report(min(start - lo, total), total)
+        self.conn.execute("BEGIN IMMEDIATE")
+
+
+# ======================= Steps =======================
+def _create_base_tables(ctx):
+    """my_table و settings (تا پیش از این فرض می‌شد my_table وجود دارد)"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS my_table
+                (
+                    "code"             INTEGER,
+                    "words"            TEXT,
+                    "next_time_review" TEXT,
+                    "count"            INTEGER,
+                    "review_intervals" INTEGER,
+                    "meaning"          TEXT
+                )
+                """)
+    # این جدول فقط یک ردیف برای ذخیره آخرین تنظیمات خواهد داشت
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS settings
+                (
+                    id        INTEGER PRIMARY KEY,
+                    num_cards INTEGER,
+                    show_time INTEGER,
+                    card_side TEXT
+                )
+                """)
+
+
+def _create_decks_table(ctx):
+    """ثبت deck ها؛ deck پیش‌فرض همان my_table است"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS decks
+                (
+                    id         INTEGER PRIMARY KEY,
+                    name       TEXT UNIQUE NOT NULL,
+                    file       TEXT,
+                    table_name TEXT NOT NULL
+                )
+                """)
+    # 'default' همان decks.DEFAULT_DECK است
+    ctx.execute("INSERT OR IGNORE INTO decks (id, name, file, table_name) VALUES (1, 'default', NULL, 'my_table')")
+
+
+def _add_normalized_columns(ctx):
+    """ستون‌های سایه یکسان‌شده words_norm / meaning_norm، trigger های محاسبه هنگام نوشتن و ایندکس‌ها"""
+    existing = ctx.columns("my_table")
+    for column in ("words_norm", "meaning_norm"):
+        if column not in existing:
+            ctx.execute(f"ALTER TABLE my_table ADD COLUMN {column} TEXT")
+    ctx.chunked("""
+                UPDATE my_table
+                SET words_norm   = normalize_text(words),
+                    meaning_norm = normalize_text(meaning)
+                WHERE rowid >= :lo AND rowid < :hi
+                  AND (words_norm IS NULL OR meaning_norm IS NULL)
+                """)
+    for event in ("INSERT", "UPDATE OF words, meaning"):
+        name = "my_table_norm_insert" if event == "INSERT" else "my_table_norm_update"
+        ctx.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {name}
+                        AFTER {event} ON my_table
+                    BEGIN
+                        UPDATE my_table
+                        SET words_norm   = normalize_text(NEW.words),
+                            meaning_norm = normalize_text(NEW.meaning)
+                        WHERE rowid = NEW.rowid;
+                    END
+                    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_words_norm ON my_table (words_norm)")
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_meaning_norm ON my_table (meaning_norm)")
+
+
+def _add_due_index(ctx):
+    """ایندکس تاریخ مرور برای پرس‌وجوی کارت‌های سررسید (deck های دیگر از ابتدا این ایندکس را دارند)"""
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_due ON my_table (next_time_review)")
+
+
+def _create_app_settings(ctx):
+    """تنظیمات کلید/مقدار (settings.py) و انتقال ردیف تنظیمات قدیمی Review"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS app_settings
+                (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """)
+    for key, column in (("review.num_cards", "num_cards"), ("review.show_time", "show_time"),
+                        ("review.card_side", "card_side")):
+        ctx.execute(f"""
+                    INSERT OR IGNORE INTO app_settings (key, value)
+                    SELECT ?, {column} FROM settings WHERE id = 1 AND {column} IS NOT NULL
+                    """, (key,))
+
+
+def _create_review_log(ctx):
+    """تاریخچه پاسخ‌ها: نتیجه (pass/fail)، زمان پاسخ و وضعیت SRS پس از هر مرور"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS review_log
+                (
+                    id          INTEGER PRIMARY KEY,
+                    deck        TEXT    NOT NULL,
+                    code        TEXT    NOT NULL,
+                    reviewed_at TEXT    NOT NULL,
+                    result      TEXT    NOT NULL,
+                    response_ms INTEGER,
+                    interval    INTEGER,
+                    count       INTEGER
+                )
+                """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_review_log_card ON review_log (deck, code)")
+
+
+def _skip_prenormalized_inserts(ctx):
+    """
+    trigger درج فقط وقتی ستون‌های یکسان‌شده خالی باشند اجرا می‌شود؛
+    ingest.py این ستون‌ها را در پردازش‌های کارگر محاسبه و همراه ردیف درج می‌کند.
+    """
+    ctx.execute("DROP TRIGGER IF EXISTS my_table_norm_insert")
+    ctx.execute("""
+                CREATE TRIGGER my_table_norm_insert
+                    AFTER INSERT ON my_table
+                    WHEN NEW.words_norm IS NULL OR NEW.meaning_norm IS NULL
+                BEGIN
+                    UPDATE my_table
+                    SET words_norm   = normalize_text(NEW.words),
+                        meaning_norm = normalize_text(NEW.meaning)
+                    WHERE rowid = NEW.rowid;
+                END
+                """)
+
+
+# زمان فعلی به میلی‌ثانیه (Unix) در SQL
+NOW_MS_SQL = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+def _track_changes(ctx):
+    """
+    ردیابی تغییرات برای sync.py: ستون‌های modified (زمان آخرین تغییر، میلی‌ثانیه) و version (شمارنده
+    محلی تغییرات) در my_table، جدول sync_tombstones برای ردیف‌های حذف‌شده و trigger هایی که هر نوشتن
+    (ویرایش، مرور، ورود گروهی، حذف) را ثبت می‌کنند. ردیف‌های موجود version = 0 و modified = 0 دارند.
+    نوشتن‌هایی که version را خودشان تعیین می‌کنند (sync و ingest) از trigger ها رد می‌شوند.
+    """
+    existing = ctx.columns("my_table")
+    for column in ("modified", "version"):
+        if column not in existing:
+            ctx.execute(f"ALTER TABLE my_table ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_version ON my_table (version)")
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS sync_meta
+                (
+                    key   TEXT PRIMARY KEY,
+                    value
+                )
+                """)
+    ctx.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('version', 0)")
+    ctx.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('device_id', lower(hex(randomblob(8))))")
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS sync_tombstones
+                (
+                    code       TEXT PRIMARY KEY,
+                    deleted_at INTEGER NOT NULL,
+                    version    INTEGER NOT NULL
+                )
+                """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_sync_tombstones_version ON sync_tombstones (version)")
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS sync_peers
+                (
+                    peer      TEXT PRIMARY KEY,
+                    pulled    INTEGER NOT NULL,
+                    pushed    INTEGER NOT NULL,
+                    synced_at TEXT
+                )
+                """)
+
+    bump = "UPDATE sync_meta SET value = value + 1 WHERE key = 'version';"
+    current = "(SELECT value FROM sync_meta WHERE key = 'version')"
+    triggers = {
+        "my_table_sync_insert": f"""
+            AFTER INSERT ON my_table
+            WHEN NEW.version = 0
+        BEGIN
+            {bump}
+            UPDATE my_table SET version = {current}, modified = {NOW_MS_SQL} WHERE rowid = NEW.rowid;
+        END""",
+        "my_table_sync_update": f"""
+            AFTER UPDATE OF words, meaning, review_intervals, count, next_time_review ON my_table
+            WHEN NEW.version = OLD.version
+        BEGIN
+            {bump}
+            UPDATE my_table SET version = {current}, modified = {NOW_MS_SQL} WHERE rowid = NEW.rowid;
+        END""",
+        "my_table_sync_delete": f"""
+            AFTER DELETE ON my_table
+        BEGIN
+            {bump}
+            INSERT OR REPLACE INTO sync_tombstones (code, deleted_at, version)
+            VALUES (CAST(OLD.code AS TEXT), {NOW_MS_SQL}, {current});
+        END""",
+        # کدی که دوباره درج شود دیگر حذف‌شده نیست
+        "my_table_sync_revive": """
+            AFTER INSERT ON my_table
+        BEGIN
+            DELETE FROM sync_tombstones WHERE code = CAST(NEW.code AS TEXT);
+        END""",
+    }
+    for name, body in triggers.items():
+        ctx.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def _create_review_journal(ctx):
+    """آخرین ردیف journal پاسخ‌ها (journal.py) که در دیتابیس نوشته شده است؛ فقط یک ردیف"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS review_journal
+                (
+                    id      INTEGER PRIMARY KEY,
+                    session TEXT    NOT NULL,
+                    seq     INTEGER NOT NULL
+                )
+                """)
+
+
+def _add_sort_indexes(ctx):
+    """ایندکس ستون‌های مرتب‌سازی صفحه‌بندی Show All (edit.SORT_COLUMNS)؛ words_norm و تاریخ مرور قبلاً ایندکس دارند"""
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_code ON my_table (code)")
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_interval ON my_table (review_intervals)")
+
+
+def _add_count_index(ctx):
+    """
+    ایندکس count برای مرتب‌سازی و فیلتر ستون‌های صفحه Edit (edit.RowFilter) و آمار ایندکس‌ها (ANALYZE)
+    تا SQLite بین ایندکس ستون مرتب‌سازی و ایندکس فیلترها درست انتخاب کند
+    """
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_my_table_count ON my_table (count)")
+    ctx.execute("ANALYZE my_table")
+
+
+def _create_edit_history(ctx):
+    """عملیات صفحه Edit و before-image ردیف‌های تغییرکرده برای Undo (history.py)"""
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS edit_ops
+                (
+                    id         INTEGER PRIMARY KEY,
+                    label      TEXT    NOT NULL,
+                    created_at TEXT    NOT NULL,
+                    undone     INTEGER NOT NULL DEFAULT 0
+                )
+                """)
+    ctx.execute("""
+                CREATE TABLE IF NOT EXISTS edit_images
+                (
+                    op               INTEGER NOT NULL,
+                    deck             TEXT    NOT NULL,
+                    row              INTEGER NOT NULL,
+                    present          INTEGER NOT NULL,
+                    code,
+                    words            TEXT,
+                    meaning          TEXT,
+                    review_intervals INTEGER,
+                    count            INTEGER,
+                    next_time_review TEXT
+                )
+                """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_edit_images_op ON edit_images (op, deck, row)")
+
+
+def _add_redo_images(ctx):
+    """
+    ستون phase در edit_images برای Redo: 0 وضعیت ردیف‌ها پیش از عملیات و 1 وضعیت آن‌ها پیش از Undo.
+    ایندکس با phase ساخته می‌شود تا پرس‌وجوهای هر phase فقط ردیف‌های همان phase را بخوانند.
+    """
+    if "phase" not in ctx.columns("edit_images"):
+        ctx.execute("ALTER TABLE edit_images ADD COLUMN phase INTEGER NOT NULL DEFAULT 0")
+    ctx.execute("DROP INDEX IF EXISTS idx_edit_images_op")
+    ctx.execute("CREATE INDEX IF NOT EXISTS idx_edit_images_phase ON edit_images (op, deck, phase, row)")
+
+
+def _create_search_index(ctx):
+    """
+    ایندکس trigram (FTS5) روی words_norm / meaning_norm برای جستجوی زیررشته‌ای بدون پیمایش کل جدول.
+    trigger ها ردیف ایندکس را با مقدار فعلی جدول جایگزین می‌کنند، پس ترتیب اجرای آن‌ها نسبت به
+    trigger های یکسان‌سازی اهمیتی ندارد. اگر SQLite از FTS5/trigram پشتیبانی نکند (پیش از 3.34)
+    ایندکس ساخته نمی‌شود و جستجو مثل قبل جدول را پیمایش می‌کند.
+    """
+    try:
+        ctx.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS my_table_fts
+                        USING fts5(words_norm, meaning_norm, tokenize = 'trigram')
+                    """)
+    except sqlite3.OperationalError:
+        return
+    reindex = """
+              DELETE FROM my_table_fts WHERE rowid = {row}.rowid;
+              INSERT INTO my_table_fts (rowid, words_norm, meaning_norm)
+              SELECT rowid, words_norm, meaning_norm FROM my_table WHERE rowid = {row}.rowid;
+              """
+    ctx.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS my_table_fts_insert
+                    AFTER INSERT ON my_table
+                BEGIN
+                    {reindex.format(row="NEW")}
+                END
+                """)
+    ctx.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS my_table_fts_update
+                    AFTER UPDATE OF words_norm, meaning_norm ON my_table
+                BEGIN
+                    DELETE FROM my_table_fts WHERE rowid = OLD.rowid;
+                    {reindex.format(row="NEW")}
+                END
+                """)
+    ctx.execute("""
+                CREATE TRIGGER IF NOT EXISTS my_table_fts_delete
+                    AFTER DELETE ON my_table
+                BEGIN
+                    DELETE FROM my_table_fts WHERE rowid = OLD.rowid;
+                END
+                """)
+    # ردیف‌هایی که بین برش‌ها نوشته شوند را trigger ها ایندکس می‌کنند
+    ctx.chunked("""
+                INSERT INTO my_table_fts (rowid, words_norm, meaning_norm)
+                SELECT rowid, words_norm, meaning_norm
+                FROM my_table
+                WHERE rowid >= :lo AND rowid < :hi
+                  AND NOT EXISTS (SELECT 1 FROM my_table_fts f WHERE f.rowid = my_table.rowid)
+                """)
+
+
+# مراحل به ترتیب نسخه؛ مرحله جدید همیشه به انتها اضافه می‌شود و مراحل قبلی تغییر نمی‌کنند.
+# همه مراحل تکرارپذیرند چون دیتابیس‌های قدیمی (user_version = 0) ممکن است بخشی از آن‌ها را داشته باشند.
+MIGRATIONS = [
+    Migration(1, "Create card and settings tables", _create_base_tables),
+    Migration(2, "Create deck registry", _create_decks_table),
+    Migration(3, "Add normalized search columns", _add_normalized_columns),
+    Migration(4, "Index review dates", _add_due_index),
+    Migration(5, "Move settings to key/value table", _create_app_settings),
+    Migration(6, "Create review log", _create_review_log),
+    Migration(7, "Skip normalization trigger for pre-normalized inserts", _skip_prenormalized_inserts),
+    Migration(8, "Track row changes for sync", _track_changes),
+    Migration(9, "Create review journal checkpoint", _create_review_journal),
+    Migration(10, "Index sort columns for paging", _add_sort_indexes),
+    Migration(11, "Index count column for filters", _add_count_index),
+    Migration(12, "Create edit history for undo", _create_edit_history),
+    Migration(13, "Keep redo images in edit history", _add_redo_images),
+    Migration(14, "Index normalized columns for substring search", _create_search_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn):
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def upgrade(conn, progress=None):
+    """
+    اعمال مراحل باقی‌مانده. progress(description, done, total) برای نمایش پیشرفت صدا زده می‌شود.
+    خروجی: نسخه نهایی
+    """
+    register_functions(conn)
+    if not pending_migrations(conn):
+        return current_version(conn)
+
+    previous_isolation = conn.isolation_level
+    conn.commit()
+    # مدیریت دستی تراکنش‌ها
+    conn.isolation_level = None
+    try:
+        for migration in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            # پس از گرفتن قفل دوباره بررسی می‌شود (ممکن است پردازش دیگری همین مرحله را اعمال کرده باشد)
+            if migration.version <= current_version(conn):
+                conn.execute("COMMIT")
+                continue
+            ctx = MigrationContext(conn, migration, progress)
+            try:
+                with timer("db.migrate", version=migration.version):
+                    migration.apply(ctx)
+                    conn.execute(f"PRAGMA user_version = {migration.version:d}")
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            if not ctx.reported:
+                ctx.report(1, 1)
+    finally:
+        conn.isolation_level = previous_isolation
+    return current_version(conn)
+
+
+# PRAGMA هایی که روی هر اتصال جدید اعمال می‌شوند (settings.py مقادیر آن‌ها را تعیین می‌کند)
+PRAGMAS = {}
+
+_upgraded = set()
+_upgraded_lock = threading.Lock()
+
+
+def connect(db_path, **kwargs):
+    """
+    sqlite3.connect به همراه ثبت توابع SQL و ارتقای اسکیما (یک بار برای هر فایل در هر پردازش).
+    هر اتصالی که در my_table می‌نویسد باید از این تابع استفاده کند، وگرنه trigger ها با خطای
+    "no such function" متوقف می‌شوند.
+    """
+    conn = sqlite3.connect(db_path, **kwargs)
+    register_functions(conn)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    key = os.path.abspath(db_path)
+    with _upgraded_lock:
+        if key not in _upgraded:
+            try:
+                upgrade(conn)
+            except Exception:
+                conn.close()
+                raise
+            _upgraded.add(key)
+    return conn
+
+
+def main(argv=None):
+    from review_engine import DB_PATH
+
+    parser = argparse.ArgumentParser(description="LexiMind schema migrations")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("command", nargs="?", choices=["status", "upgrade"], default="status")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        print(f"schema version {current_version(conn)} (latest {LATEST_VERSION})")
+        for migration in pending_migrations(conn):
+            print(f"  pending {migration.version}: {migration.description}")
+        if args.command == "upgrade":
+            def report(description, done, total):
+                print(f"\r{description}: {done}/{total}", end="" if done < total else "\n", flush=True)
+
+            print(f"upgraded to version {upgrade(conn, report)}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# normalize.py - یکسان‌سازی متن برای مقایسه کلمات و معانی (تشخیص تکراری، جستجو، ایندکس تقریبی)
+#
+# متن اصلی هیچ‌وقت تغییر نمی‌کند؛ این توابع فقط «کلید مقایسه» می‌سازند:
+#   - NFKC (یکسان‌سازی شکل‌های سازگار یونیکد، مثل حروف چسبان عربی)
+#   - ی و ک عربی به ی و ک فارسی
+#   - حذف اعراب (فتحه، کسره، تشدید، ...) و کشیده (ـ)
+#   - حذف نیم‌فاصله (ZWNJ) و سایر نویسه‌های بی‌عرض
+#   - حروف کوچک (casefold) و یکسان‌سازی فاصله‌ها
+
+import re
+import unicodedata
+
+# نویسه‌های عربی که با معادل فارسی جایگزین می‌شوند
+_PERSIAN_LETTERS = str.maketrans({
+    "\u064a": "\u06cc",  # ي -> ی
+    "\u0649": "\u06cc",  # ى -> ی
+    "\u0643": "\u06a9",  # ك -> ک
+    "\u0629": "\u0647",  # ة -> ه
+    "\u06c0": "\u0647",  # ۀ -> ه
+})
+
+# اعراب، علامت الف کوچک، کشیده و نویسه‌های بی‌عرض (ZWNJ، ZWJ، نشانه جهت، BOM)
+_STRIP = re.compile("[\u064b-\u065f\u0670\u0640\u200b-\u200f\ufeff]")
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """کلید مقایسه برای هر متن (کلمه انگلیسی یا معنی فارسی)"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = text.translate(_PERSIAN_LETTERS)
+    text = _STRIP.sub("", text)
+    return _SPACES.sub(" ", text).strip().casefold()
+
+
+def split_meanings(meaning):
+    """جدا کردن معانی چندگانه (با ، یا , یا ؛) برای ادغام بدون تکرار"""
+    return [part.strip() for part in re.split("[،,؛;]", meaning or "") if part.strip()]
+
+
+# ======================= SQLite =======================
+def register_functions(conn):
+    """
+    ثبت normalize_text در اتصال. trigger های my_table (migrations.py) به آن نیاز دارند؛
+    اتصال‌های برنامه با migrations.connect باز می‌شوند که این کار را انجام می‌دهد.
+    """
+    conn.create_function("normalize_text", 1, normalize_text, deterministic=True)
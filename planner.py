@@ -0,0 +1,212 @@
+# planner.py - برنامه‌ریز روزانه مرورها: fuzz و پخش بار بین روزها
+#
+# next_review_state همیشه «امروز + فاصله» را برمی‌گرداند؛ کارت‌هایی که با هم اضافه یا مرور شده‌اند
+# همه در یک روز سررسید می‌شوند. DailyPlanner برای فاصله‌های 3 روز به بالا، از بین روزهای نزدیک
+# روز ایده‌آل (± planner.fuzz_percent درصد فاصله) روزی را انتخاب می‌کند که کمترین کارت سررسید
+# را دارد و در صورت امکان زیر planner.daily_target می‌ماند.
+# تعداد کارت‌های سررسید هر روز یک بار با ایندکس idx_my_table_due خوانده و سپس در حافظه به‌روز می‌شود.
+# load می‌تواند در thread کارگر اجرا شود: شمارش‌ها در dict جدید خوانده و زیر قفل جایگزین می‌شوند.
+#
+#   python planner.py                      پیش‌بینی تعداد مرورهای 14 روز آینده
+#   python planner.py smooth --days 7      پخش کارت‌های عقب‌افتاده در 7 روز
+
+import sys
+import math
+import random
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from instrument import instrument_methods
+import review_engine
+from deck_cache import get_cache
+from migrations import connect
+from settings import get_settings
+
+# فاصله‌های کوتاه‌تر از این مقدار (روز) جابه‌جا نمی‌شوند
+MIN_FUZZ_INTERVAL = 3
+
+
+def _day(date):
+    return date.strftime("%Y-%m-%d")
+
+
+@instrument_methods("db.planner")
+class DailyPlanner:
+    """
+    انتخاب تاریخ مرور بعدی با توجه به بار روزهای آینده.
+    اگر reload داده شود، پس از عوض شدن روز به جای خواندن هم‌زمان از دیتابیس صدا زده می‌شود
+    (مثلاً برای اجرای load در thread کارگر) و تا رسیدن شمارش‌های تازه همان شمارش‌های قبلی،
+    که بر اساس تاریخ هستند، استفاده می‌شوند.
+    """
+
+    def __init__(self, db_path=None, daily_target=None, fuzz_percent=None, rng=None, reload=None):
+        self.db_path = db_path or review_engine.DB_PATH
+        settings = get_settings(self.db_path)
+        self.daily_target = settings.get("planner.daily_target") if daily_target is None else daily_target
+        self.fuzz_percent = settings.get("planner.fuzz_percent") if fuzz_percent is None else fuzz_percent
+        self.rng = rng or random
+        self.reload = reload
+        # "YYYY-MM-DD" -> تعداد کارت‌های سررسید؛ با _lock خوانده و نوشته می‌شود
+        self._counts = None
+        self._today = None
+        self._lock = threading.Lock()
+
+    def fuzz_days(self, interval):
+        """بیشترین جابه‌جایی مجاز (روز) برای یک فاصله"""
+        if interval < MIN_FUZZ_INTERVAL or not self.fuzz_percent:
+            return 0
+        return max(1, round(interval * self.fuzz_percent / 100))
+
+    # -------------------- تعداد سررسیدها --------------------
+    def due_counts(self, start, days):
+        """تعداد کارت‌های سررسید در هر روز از start تا start + days (پرس‌وجوی بازه‌ای روی ایندکس)"""
+        end = start + timedelta(days=days)
+        conn = connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                                SELECT substr(next_time_review, 1, 10) AS day, COUNT(*)
+                                FROM my_table
+                                WHERE next_time_review >= ?
+                                  AND next_time_review < ?
+                                GROUP BY day
+                                """, (_day(start), _day(end))).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def load(self, now=None):
+        """
+        خواندن بار روزهای آینده (تا بزرگ‌ترین فاصله به همراه fuzz).
+        می‌تواند در thread کارگر صدا زده شود تا اولین schedule منتظر دیتابیس نماند.
+        """
+        now = now or datetime.now()
+        longest = review_engine.REVIEW_INTERVALS_DAYS[-1]
+        counts = self.due_counts(now, longest + self.fuzz_days(longest) + 2)
+        with self._lock:
+            self._counts = counts
+            self._today = _day(now)
+        return counts
+
+    # -------------------- زمان‌بندی --------------------
+    def schedule(self, interval, now=None):
+        """
+        تاریخ مرور بعدی ("%Y-%m-%d 00:00:00") برای فاصله interval روز؛
+        کارت انتخاب‌شده در شمارش همان روز ثبت می‌شود.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            stale = self._counts is None or self._today != _day(now)
+            if stale and self._counts is not None and self.reload:
+                # تا پایان reload دوباره درخواست نمی‌شود
+                self._today = _day(now)
+                stale = False
+                reload = self.reload
+            else:
+                reload = None
+        if reload:
+            reload()
+        elif stale:
+            self.load(now)
+
+        interval = int(interval)
+        spread = self.fuzz_days(interval)
+        # هیچ کارتی زودتر از فردا زمان‌بندی نمی‌شود
+        offsets = [d for d in range(interval - spread, interval + spread + 1) if d >= 1] or [interval]
+        days = [_day(now + timedelta(days=d)) for d in offsets]
+
+        with self._lock:
+            counts = self._counts
+            candidates = days
+            if self.daily_target:
+                candidates = [day for day in days if counts.get(day, 0) < self.daily_target] or days
+            least = min(counts.get(day, 0) for day in candidates)
+            chosen = self.rng.choice([day for day in candidates if counts.get(day, 0) == least])
+            counts[chosen] = counts.get(chosen, 0) + 1
+        return f"{chosen} 00:00:00"
+
+    # -------------------- پخش کارت‌های عقب‌افتاده --------------------
+    def smooth_backlog(self, days, now=None):
+        """
+        پخش کارت‌های سررسید (امروز، گذشته یا NULL) در days روز از امروز؛ کارت‌های ضعیف‌تر
+        (فاصله کوتاه‌تر) زودتر می‌آیند و بار فعلی روزهای آینده هم در نظر گرفته می‌شود.
+        همه تغییرات در یک تراکنش. خروجی: تعداد کارت‌های جابه‌جا‌شده.
+        """
+        now = now or datetime.now()
+        days = max(1, int(days))
+        conn = connect(self.db_path)
+        try:
+            backlog = conn.execute("""
+                                   SELECT rowid, code, review_intervals, count, next_time_review
+                                   FROM my_table
+                                   WHERE next_time_review <= ?
+                                      OR next_time_review IS NULL
+                                   ORDER BY review_intervals, next_time_review
+                                   """, (now.strftime("%Y-%m-%d 23:59:59"),)).fetchall()
+            if not backlog:
+                return 0
+
+            # امروز فقط کارت‌های عقب‌افتاده را دارد؛ روزهای بعد بار فعلی خودشان را هم دارند
+            existing = self.due_counts(now + timedelta(days=1), days - 1)
+            day_list = [_day(now + timedelta(days=d)) for d in range(days)]
+            quota = math.ceil((len(backlog) + sum(existing.values())) / days)
+
+            updates = []
+            position = 0
+            for d, day in enumerate(day_list):
+                room = len(backlog) - position if d == days - 1 else max(quota - existing.get(day, 0), 0)
+                for rowid, code, interval, cnt, _ in backlog[position:position + room]:
+                    # کارت‌های روز اول (امروز) همان‌طور سررسید باقی می‌مانند
+                    if d > 0:
+                        updates.append((f"{day} 00:00:00", rowid, code, interval, cnt))
+                position += room
+
+            with conn:
+                conn.executemany("UPDATE my_table SET next_time_review = ? WHERE rowid = ?",
+                                 [(next_review, rowid) for next_review, rowid, _, _, _ in updates])
+        except sqlite3.Error as e:
+            print(f"Error smoothing backlog: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        cache = get_cache(self.db_path)
+        if cache:
+            for next_review, _, code, interval, cnt in updates:
+                cache.apply_review(code, interval, cnt, next_review)
+        with self._lock:
+            self._counts = None
+        return len(updates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind daily review planner")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("command", nargs="?", choices=["forecast", "smooth"], default="forecast")
+    parser.add_argument("--days", type=int, default=None,
+                        help="forecast length (default 14) or number of days to spread the backlog over (default 7)")
+    args = parser.parse_args(argv)
+
+    planner = DailyPlanner(args.db)
+    if args.command == "smooth":
+        print(f"moved {planner.smooth_backlog(args.days or 7)} overdue cards")
+
+    today = datetime.now()
+    counts = planner.due_counts(today, args.days or 14)
+    conn = connect(planner.db_path)
+    try:
+        overdue = conn.execute("SELECT COUNT(*) FROM my_table WHERE next_time_review < ? OR next_time_review IS NULL",
+                               (_day(today),)).fetchone()[0]
+    finally:
+        conn.close()
+    print(f"overdue   {overdue:5d}")
+    for d in range(args.days or 14):
+        day = _day(today + timedelta(days=d))
+        n = counts.get(day, 0)
+        print(f"{day} {n:5d} {'#' * min(n, 60)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
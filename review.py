@@ -1,165 +1,26 @@
 # review.py (با استایل‌های جذاب و منطق Count-DOWN SRS)
 
-import sqlite3
-import random
-from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLabel, QSpinBox,
     QComboBox, QHBoxLayout, QPushButton, QGraphicsDropShadowEffect, QStackedLayout,
-    QGraphicsOpacityEffect, QShortcut, QMessageBox
+    QGraphicsOpacityEffect, QShortcut, QMessageBox, QListWidget, QListWidgetItem, QCheckBox
 )
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSlot
+from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QColor, QFont, QKeySequence
 
-import os
-import sys
-
-# ... بقیه ایمپورت‌ها را دست نزنید
-
-# این قسمت مسیر دیتابیس را برای حالت عادی و حالت PyInstaller تعریف می‌کند
-if getattr(sys, 'frozen', False):
-    # اگر برنامه در حالت EXE اجرا می‌شود، مسیر را از پوشه موقت PyInstaller بگیرید
-    base_path = sys._MEIPASS
-else:
-    # اگر برنامه به صورت عادی اجرا می‌شود، مسیر فعلی فایل را بگیرید
-    base_path = os.path.abspath(os.path.dirname(__file__))
-
-DB_PATH = os.path.join(base_path, "flash cards.db")
-
-# فواصل تکرار بر اساس روز (Days)
-REVIEW_INTERVALS_DAYS = [1, 3, 7, 14, 30, 60, 120]
-
-# **مقدار ثابت آستانه**: مقدار اولیه count و مقداری که count پس از ارتقاء به آن ریست می‌شود.
-REVIEW_THRESHOLD = 5  # مقدار پیش‌فرض را 5 قرار دادم
-
-
-# ======================= Database Layer =======================
-class DatabaseManager:
-    """مدیریت دیتابیس و منطق SRS"""
-
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.cursor = self.conn.cursor()
-        self.create_settings_table()  # ایجاد جدول تنظیمات
-
-    # -------------------- متدهای جدید برای تنظیمات --------------------
-    def create_settings_table(self):
-        """ایجاد جدول 'settings' اگر وجود نداشته باشد."""
-        # این جدول فقط یک ردیف برای ذخیره آخرین تنظیمات خواهد داشت
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS settings
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY,
-                                num_cards
-                                INTEGER,
-                                show_time
-                                INTEGER,
-                                card_side
-                                TEXT
-                            )
-                            """)
-        self.conn.commit()
-
-    def load_settings(self):
-        """بارگذاری تنظیمات ذخیره‌شده یا بازگرداندن مقادیر پیش‌فرض."""
-        self.cursor.execute("SELECT num_cards, show_time, card_side FROM settings WHERE id = 1")
-        row = self.cursor.fetchone()
-
-        # مقادیر پیش‌فرض
-        default_settings = {
-            'num_cards': 10,
-            'show_time': 3,
-            'card_side': "front"
-        }
-
-        if row:
-            # اگر تنظیمات ذخیره‌شده وجود دارد
-            return {
-                'num_cards': row[0],
-                'show_time': row[1],
-                'card_side': row[2]
-            }
-
-        # اگر تنظیمات وجود ندارد، با پیش‌فرض شروع کن
-        self.save_settings(default_settings['num_cards'], default_settings['show_time'], default_settings['card_side'])
-        return default_settings
-
-    def save_settings(self, num_cards, show_time, card_side):
-        """ذخیره تنظیمات فعلی در دیتابیس."""
-        # همیشه ردیف 1 را به‌روزرسانی/جایگزین می‌کند
-        self.cursor.execute("""
-            INSERT OR REPLACE INTO settings (id, num_cards, show_time, card_side)
-            VALUES (1, ?, ?, ?)
-        """, (num_cards, show_time, card_side))
-        self.conn.commit()
-
-    # ------------------------------------------------------------------
-
-    def get_cards_for_review(self, num_cards):
-        """
-        بازیابی کارت‌ها برای مرور: کلماتی که تاریخ مرور آن‌ها گذشته یا امروز است.
-        خروجی: (words, meaning, code, review_intervals, count, next_time_review)
-        """
-        today = datetime.now().strftime("%Y-%m-%d 23:59:59")
-
-        query = """
-                SELECT words, meaning, code, review_intervals, count, next_time_review
-                FROM my_table
-                WHERE next_time_review <= ? \
-                   OR next_time_review IS NULL
-                ORDER BY review_intervals ASC LIMIT ? \
-                """
-        self.cursor.execute(query, (today, num_cards,))
-        return self.cursor.fetchall()
-
-    def update_review_stats(self, code, current_interval, current_count):
-        """
-        **منطق SRS Count-down (کاهش شمارنده)**
-        این متد تنها زمانی فراخوانی می‌شود که مرور موفق (Next) باشد.
-        """
-        try:
-            current_interval = int(current_interval)
-            current_count = int(current_count)
+from instrument import timed, timer
 
-            final_interval = current_interval
-
-            # 1. کاهش شمارنده
-            new_count = current_count - 1
-
-            # 2. بررسی شرط ارتقاء (اگر به 0 رسید)
-            if new_count <= 0:
-
-                # ارتقاء به پله بعدی
-                if current_interval in REVIEW_INTERVALS_DAYS:
-                    current_index = REVIEW_INTERVALS_DAYS.index(current_interval)
-                    if current_index < len(REVIEW_INTERVALS_DAYS) - 1:
-                        final_interval = REVIEW_INTERVALS_DAYS[current_index + 1]
-
-                # ریست کردن شمارنده به مقدار آستانه
-                new_count = REVIEW_THRESHOLD
-
-                # 3. تعیین تاریخ تکرار بعدی (Time-based Scheduling)
-            next_review_date = (datetime.now() + timedelta(days=final_interval)).strftime("%Y-%m-%d 00:00:00")
-
-            # 4. به‌روزرسانی دیتابیس
-            self.cursor.execute("""
-                                UPDATE my_table
-                                SET review_intervals = ?,
-                                    count            = ?,
-                                    next_time_review = ?
-                                WHERE code = ?
-                                """, (final_interval, new_count, next_review_date, code))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            print(f"Error updating review stats: {e}")
-            return False
-
-    def close(self):
-        self.conn.close()
+# لایه دیتابیس و منطق جلسه مرور در review_engine (بدون وابستگی به Qt) قرار دارد؛
+# این نام‌ها برای سازگاری با import های قبلی (main.py و edit.py) از اینجا هم در دسترس هستند.
+from review_engine import (
+    DB_PATH, REVIEW_INTERVALS_DAYS, REVIEW_THRESHOLD, DatabaseManager, ReviewSession, ReviewWriter
+)
+from decks import DEFAULT_DECK, DeckManager, MultiDeckStore
+from planner import DailyPlanner
+from journal import GradeJournal
+import audio
+from workers import QueryExecutor, db_job
+from settings import get_settings
 
 
 # ──────────────────────────────────────────────
@@ -168,19 +29,35 @@ class DatabaseManager:
 class ReviewPage(QWidget):
     """صفحه‌ی Review (فرم تنظیمات)"""
 
+    @timed("page.ReviewPage")
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.db = DatabaseManager()
+        # تنظیمات یک بار بارگذاری شده و در حافظه نگه داشته می‌شوند
+        self.settings = get_settings()
         self.setup_ui()
         self.load_settings_to_ui()
+        # اگر تنظیمات Review از جای دیگری تغییر کند، فرم به‌روز می‌شود (release اشتراک را قطع می‌کند)
+        self.settings.subscribe(self._on_settings_changed, "review.")
+
+    def _on_settings_changed(self, key, value):
+        self.load_settings_to_ui()
+
+    def release(self):
+        """قطع اشتراک تنظیمات و بستن اتصال دیتابیس پیش از حذف صفحه"""
+        self.settings.unsubscribe(self._on_settings_changed)
+        try:
+            self.db.close()
+        except Exception:
+            pass
 
     def load_settings_to_ui(self):
         """تنظیمات ذخیره‌شده را در فیلدهای فرم بارگذاری می‌کند."""
-        settings = self.db.load_settings()
-        self.num_cards.setValue(settings['num_cards'])
-        self.show_time.setValue(settings['show_time'])
-        self.card_side.setCurrentText(settings['card_side'])
+        self.num_cards.setValue(self.settings.get("review.num_cards"))
+        self.show_time.setValue(self.settings.get("review.show_time"))
+        self.card_side.setCurrentText(self.settings.get("review.card_side"))
+        self.rapid.setChecked(self.settings.get("review.rapid"))
 
     def setup_ui(self):
         self.setStyleSheet("background: transparent;")
@@ -288,6 +165,51 @@ class ReviewPage(QWidget):
         card_side_widget.addWidget(caption_card_side)
 
         form_layout.addRow(QLabel("Card side:").setStyleSheet(label_style), card_side_widget)
+
+        # === 4. deck ها ===
+        self.deck_list = QListWidget()
+        self.deck_list.setFixedSize(220, 90)
+        self.deck_list.setStyleSheet("""
+            QListWidget {
+                font-size: 16px;
+                border-radius: 10px;
+                border: 2px solid #5F9EA0;
+                color: white;
+                background-color: rgba(40, 40, 40, 0.9);
+            }
+        """)
+        deck_manager = DeckManager()
+        for name in deck_manager.deck_names():
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if name == DEFAULT_DECK else Qt.Unchecked)
+            self.deck_list.addItem(item)
+        deck_manager.close()
+
+        deck_widget = QVBoxLayout()
+        deck_widget.addWidget(self.deck_list)
+        caption_decks = QLabel("Check the decks this session should draw due cards from.")
+        caption_decks.setStyleSheet(caption_style)
+        deck_widget.addWidget(caption_decks)
+
+        label_decks = QLabel("Decks:")
+        label_decks.setStyleSheet(label_style)
+        form_layout.addRow(label_decks, deck_widget)
+
+        # === 5. حالت سریع ===
+        self.rapid = QCheckBox("Rapid mode")
+        self.rapid.setStyleSheet("QCheckBox { color: white; font-size: 18px; }")
+
+        rapid_widget = QVBoxLayout()
+        rapid_widget.addWidget(self.rapid)
+        caption_rapid = QLabel(
+            "No animations or delays: **J**/→ passes and **K**/← fails the card and moves on at once.")
+        caption_rapid.setStyleSheet(caption_style)
+        rapid_widget.addWidget(caption_rapid)
+
+        label_rapid = QLabel("Rapid:")
+        label_rapid.setStyleSheet(label_style)
+        form_layout.addRow(label_rapid, rapid_widget)
         center_layout.addWidget(form_widget)
 
         main_layout.addStretch(1)
@@ -332,17 +254,20 @@ class ReviewPage(QWidget):
 
     # 🌟 جدید: متد خصوصی برای ذخیره تنظیمات بدون پیام
     def _save_settings_to_db(self):
-        """مقادیر فیلدها را در دیتابیس ذخیره می‌کند (بدون نمایش پیام)."""
-        num = self.num_cards.value()
-        t = self.show_time.value()
-        side = self.card_side.currentText()
-
-        self.db.save_settings(num, t, side)
+        """مقادیر فیلدها را در تنظیمات ثبت می‌کند (نوشتن در دیتابیس با تأخیر و فقط در صورت تغییر)."""
+        self.settings.update({
+            "review.num_cards": self.num_cards.value(),
+            "review.show_time": self.show_time.value(),
+            "review.card_side": self.card_side.currentText(),
+            "review.rapid": self.rapid.isChecked(),
+        })
 
     # 🌟 متد ذخیره تنظیمات (فقط برای دکمه Save)
     def save_settings(self):
         """مقادیر فیلدها را در دیتابیس ذخیره کرده و پیام موفقیت نمایش می‌دهد."""
         self._save_settings_to_db()
+        # ذخیره صریح کاربر فوراً نوشته می‌شود
+        self.settings.flush()
         QMessageBox.information(self, "Settings Saved", "Review settings have been saved successfully!")
 
     def create_back_button(self):
@@ -396,8 +321,10 @@ class ReviewPage(QWidget):
         num = self.num_cards.value()
         t = self.show_time.value()
         side = self.card_side.currentText()
+        decks = [self.deck_list.item(i).text() for i in range(self.deck_list.count())
+                 if self.deck_list.item(i).checkState() == Qt.Checked]
 
-        page = CardViewerPage(self.main_window, num, t, side)
+        page = CardViewerPage(self.main_window, num, t, side, decks, rapid=self.rapid.isChecked())
         self.main_window.stack.addWidget(page)
         self.main_window.stack.setCurrentWidget(page)
 
@@ -406,50 +333,122 @@ class ReviewPage(QWidget):
 # صفحه نمایش کارت‌ها
 # ──────────────────────────────────────────────
 class CardViewerPage(QWidget):
-    def __init__(self, main_window, num_cards=50, show_time=3, side="front"):
+    # خطای نوشتن از thread نویسنده به thread رابط گرافیکی
+    write_failed = pyqtSignal()
+
+    @timed("page.CardViewerPage")
+    def __init__(self, main_window, num_cards=50, show_time=3, side="front", decks=None, rapid=False):
         super().__init__()
         self.main_window = main_window
         self.num_cards = num_cards
         self.show_time = show_time
         self.side = side
+        self.decks = decks or [DEFAULT_DECK]
+        # حالت سریع: انیمیشن با مدت review.rapid_fade_ms (پیش‌فرض 0)، بدون تأخیر 1 ثانیه‌ای پس از Next
+        # و خلاصه پایان جلسه بدون پنجره modal
+        self.rapid = rapid
+        self.fade_ms = get_settings().get("review.rapid_fade_ms" if rapid else "ui.fade_ms")
 
-        # کارت‌ها شامل: (word, meaning, code, interval, count, next_time_review)
-        self.cards = []
-        self.current_index = 0
-        self.showing_front = (self.side == "front")
         self.db = DatabaseManager()
 
+        # فقط deck پیش‌فرض: مسیر سریع (کش)؛ چند deck: پرس‌وجوی ادغام‌شده روی جداول/فایل‌های ATTACH شده
+        store = self.db
+        store_factory = DatabaseManager
+        # تاریخ مرور بعدی با fuzz و پخش بار روزانه (planner فقط بار my_table را می‌شمارد)؛
+        # بار روزها در load_cards و پس از عوض شدن روز در thread کارگر خوانده می‌شود
+        self.planner = DailyPlanner(reload=self._reload_planner)
+        if self.decks != [DEFAULT_DECK]:
+            self.planner = None
+            store = MultiDeckStore(DeckManager(), self.decks)
+            decks = self.decks
+            store_factory = lambda: MultiDeckStore(DeckManager(), decks)
+
+        # نتایج مرور در thread جداگانه و به صورت دسته‌ای نوشته می‌شوند تا نمایش کارت بعدی منتظر دیتابیس نماند؛
+        # با journal هر پاسخ فوراً در فایل journal و دیتابیس در دسته‌های بزرگ‌تر
+        journal_factory = GradeJournal if get_settings().get("review.journal") else None
+        self._write_error_shown = False
+        self.write_failed.connect(self._on_write_failed)
+        self.writer = ReviewWriter(store_factory, journal_factory, on_error=lambda batch: self.write_failed.emit())
+
+        # تمام منطق جلسه (صف کارت‌ها، وضعیت Flip و امتیازدهی) در ReviewSession است؛
+        # این ویجت فقط آن را نمایش می‌دهد و تایمرها را اجرا می‌کند.
+        self.session = ReviewSession(store, num_cards, show_time, side, writer=self.writer, planner=self.planner)
+
         # timer برای حالت اتوماتیک (تایمر اصلی نمایش سمت اول)
         self.main_timer = QTimer(self)
         self.main_timer.timeout.connect(self.flip_to_back_auto)
 
         # تایمر جدید برای نمایش سمت دوم یا نمایش 1 ثانیه‌ای بعد از next
         self.flip_timer = QTimer(self)
-        self.flip_timer.timeout.connect(lambda: self._advance_card())
+        self.flip_timer.timeout.connect(self._time_up)
 
-        # بارگذاری داده‌ها و ساخت UI
-        self.load_cards()
+        # تلفظ: فایل‌های صوتی کارت‌های پیش رو در پس‌زمینه ساخته و فقط فایل‌های آماده پخش می‌شوند
+        self.audio = None
+        if get_settings().get("audio.enabled") and audio.available():
+            self.audio = audio.PronunciationCache()
+
+        # ساخت UI و سپس بارگذاری کارت‌ها در thread کارگر
+        self.executor = QueryExecutor(self)
         self.setup_ui()
+        self.load_cards()
+
+    def _on_write_failed(self):
+        """هشدار (یک بار در هر جلسه) وقتی نتایج مرور در دیتابیس نوشته نشوند"""
+        if self._write_error_shown:
+            return
+        self._write_error_shown = True
+        QMessageBox.warning(self, "Save Error", "Some review results could not be saved to the database.")
+
+    # کارت‌ها شامل: (word, meaning, code, interval, count, next_time_review)
+    @property
+    def cards(self):
+        return self.session.cards
+
+    @property
+    def current_index(self):
+        return self.session.current_index
+
+    @property
+    def showing_front(self):
+        return self.session.showing_front
+
+    def load_cards(self):
+        """خواندن کارت‌ها از دیتابیس (با تمام ستون‌های SRS) در thread کارگر"""
+        self.stats_label.setText("Loading cards...")
+        num_cards, decks, planner = self.num_cards, self.decks, self.planner
+
+        if decks == [DEFAULT_DECK]:
+            def load(db, ctx):
+                # بار روزهای آینده هم در thread کارگر خوانده می‌شود
+                planner.load()
+                return db.get_cards_for_review(num_cards)
+
+            job = db_job(DatabaseManager, load)
+        else:
+            job = db_job(DeckManager, lambda db, ctx: db.get_cards_for_review(decks, num_cards))
+
+        self.executor.submit("load_cards", job, on_result=self._on_cards_loaded,
+                             on_error=lambda e: self._on_cards_loaded([]))
+
+    def _reload_planner(self):
+        planner = self.planner
+        self.executor.submit("planner_load", lambda ctx: planner.load())
+
+    def _on_cards_loaded(self, rows):
+        """شروع جلسه پس از رسیدن کارت‌ها از thread کارگر"""
+        self.session.set_cards(rows)
 
         # اگر کارت وجود داشته باشه، شروع کن
         if self.cards:
             self.show_card()
+            self._prefetch_audio()
+            self.speak()
             if self.show_time > 0:
                 self.main_timer.start(self.show_time * 1000)
         else:
             QMessageBox.information(self, "No Cards", "No cards found for review. Returning to main menu.")
             self.main_window.stack.setCurrentWidget(self.main_window.main_menu)
 
-    def load_cards(self):
-        """خواندن کارت‌ها از دیتابیس (با تمام ستون‌های SRS)"""
-        rows = self.db.get_cards_for_review(self.num_cards)
-
-        if rows:
-            if self.num_cards and self.num_cards < len(rows):
-                rows = rows[: self.num_cards]
-            random.shuffle(rows)
-        self.cards = rows
-
     def setup_ui(self):
         # لایه‌بندی کلی
         main_layout = QVBoxLayout(self)
@@ -577,7 +576,18 @@ class CardViewerPage(QWidget):
             QPushButton:hover { background-color: rgba(205, 92, 92, 220); } /* Indian Red */
         """)
 
-        for btn in (self.back_btn, self.flip_btn, self.next_btn, self.pause_btn):
+        buttons = [self.back_btn, self.flip_btn, self.next_btn, self.pause_btn]
+        if self.rapid:
+            self.next_btn.setText("Pass (J)")
+            self.fail_btn = QPushButton("Fail (K)")
+            self.fail_btn.setStyleSheet(button_base_style + """
+                QPushButton { background-color: rgba(178, 34, 34, 180); } /* Firebrick */
+                QPushButton:hover { background-color: rgba(139, 0, 0, 220); } /* Dark Red */
+            """)
+            self.fail_btn.clicked.connect(self.fail_card)
+            buttons.insert(3, self.fail_btn)
+
+        for btn in buttons:
             btn.setFixedSize(190, 65)
             btn_layout.addWidget(btn)
 
@@ -596,6 +606,12 @@ class CardViewerPage(QWidget):
     def go_back_to_menu(self):
         self.main_timer.stop()
         self.flip_timer.stop()
+        # نتایج باقی‌مانده در صف نوشته می‌شوند
+        self.writer.close()
+        if self.audio:
+            self.audio.close()
+        if self.session.store is not self.db:
+            self.session.store.close()
         self.main_window.stack.setCurrentWidget(self.main_window.main_menu)
 
     def add_shortcuts(self):
@@ -605,6 +621,14 @@ class CardViewerPage(QWidget):
         QShortcut(QKeySequence(Qt.Key_F), self).activated.connect(self.flip_card)
         QShortcut(QKeySequence(Qt.Key_N), self).activated.connect(lambda: self.next_card(from_timer=False))
         QShortcut(QKeySequence(Qt.Key_P), self).activated.connect(self.toggle_timer)
+        QShortcut(QKeySequence(Qt.Key_S), self).activated.connect(self.speak)
+
+        if self.rapid:
+            for key in (Qt.Key_J, Qt.Key_Right):
+                QShortcut(QKeySequence(key), self).activated.connect(lambda: self.next_card(from_timer=False))
+            for key in (Qt.Key_K, Qt.Key_Left):
+                QShortcut(QKeySequence(key), self).activated.connect(self.fail_card)
+            QShortcut(QKeySequence(Qt.Key_Space), self).activated.connect(self.flip_card)
 
     def show_card(self):
         """نمایش متن، جهت‌دهی و اطلاعات SRS."""
@@ -646,7 +670,14 @@ class CardViewerPage(QWidget):
 
     def flip_card(self):
         """انیمیشن هم‌زمان fade out کارت فعلی و fade in کارت بعدی."""
-        if not self.cards:
+        if not self.cards or self.session.finished:
+            return
+
+        if self.fade_ms <= 0:
+            # بدون انیمیشن: show_card شفافیت‌ها را مستقیماً تنظیم می‌کند
+            self.session.flip()
+            self.show_card()
+            self.speak()
             return
 
         # ... کدهای انیمیشن
@@ -663,64 +694,83 @@ class CardViewerPage(QWidget):
         next_effect.setOpacity(0.0)
         self.stack.setCurrentWidget(next_widget)
 
+        fade_ms = self.fade_ms
         fade_out = QPropertyAnimation(current_effect, b"opacity", self)
-        fade_out.setDuration(320)
+        fade_out.setDuration(fade_ms)
         fade_out.setStartValue(1.0)
         fade_out.setEndValue(0.0)
 
         fade_in = QPropertyAnimation(next_effect, b"opacity", self)
-        fade_in.setDuration(320)
+        fade_in.setDuration(fade_ms)
         fade_in.setStartValue(0.0)
         fade_in.setEndValue(1.0)
 
         fade_out.start()
         fade_in.start()
 
-        self.showing_front = not self.showing_front
+        self.session.flip()
         self.show_card()
+        self.speak()
+
+    def speak(self):
+        """پخش تلفظ کلمه اگر سمت انگلیسی نمایش داده می‌شود و فایل آن از قبل ساخته شده باشد."""
+        if not self.audio or self.session.finished or not self.showing_front:
+            return
+        path = self.audio.cached(self.session.current.word)
+        if path:
+            audio.play_file(path)
+
+    def _prefetch_audio(self):
+        """ساخت صدای کارت‌های بعدی در process pool (پیش از رسیدن به آن‌ها)"""
+        if self.audio:
+            ahead = get_settings().get("audio.prefetch_ahead")
+            self.audio.prefetch([card.word for card in self.cards[self.current_index:self.current_index + ahead]])
 
     @pyqtSlot()
     def flip_to_back_auto(self):
         """در حالت خودکار، کارت را به سمت دیگر (پشتی) برمی‌گرداند یا به کارت بعدی می‌رود."""
 
         # اگر در حال نمایش سمت اول هستیم (بر اساس تنظیمات) Flip کن
-        if self.showing_front == (self.side == "front"):
+        if self.session.on_first_side:
             self.main_timer.stop()
             self.flip_card()
             self.flip_timer.start(self.show_time * 1000)
         else:
-            # اگر در سمت دوم هستیم (و تایمر تمام شده): مرور موفق نبوده، فقط برو به کارت بعدی.
-            self.main_timer.stop()
-            self.flip_timer.stop()
-            self._advance_card()  # بدون به روز رسانی دیتابیس
+            # اگر در سمت دوم هستیم (و تایمر تمام شده): مرور موفق نبوده
+            self._time_up()
+
+    def _time_up(self):
+        """
+        پایان زمان نمایش سمت دوم: اگر Next زده نشده، کلمه یادش نبوده و مرور ناموفق ثبت می‌شود؛
+        سپس کارت بعدی (بعد از Next فقط تأخیر 1 ثانیه‌ای تمام شده است).
+        """
+        if self.session.state == ReviewSession.BACK:
+            self.session.grade_fail()
+        self._advance_card()
 
     def next_card(self, from_timer=False):
         """
         هندل کردن فشار دکمه Next (N) توسط کاربر:
-        1. به‌روزرسانی آمار SRS (کاهش count).
+        1. به‌روزرسانی آمار SRS (کاهش count) از طریق ReviewSession.
         2. حرکت به کارت بعدی.
         """
-        if not self.cards:
+        if not self.cards or self.session.finished:
+            return
+
+        if self.rapid:
+            # حالت سریع: ثبت مرور (در صف writer) و نمایش فوری کارت بعدی
+            with timer("review.card_to_card", result="pass"):
+                self.session.grade_pass()
+                self._advance_card()
             return
 
         # 1. اگر کاربر دکمه Next را در حالی که سمت اول کارت نمایش داده می‌شود، بزند:
-        if not from_timer and self.showing_front == (self.side == "front"):
+        if not from_timer and self.session.on_first_side:
             self.main_timer.stop()
             self.flip_card()  # فلپ به سمت دوم (پیش‌نمایش سریع)
 
-            # --- به‌روزرسانی دیتابیس در اینجا (چون Next زده شده = مرور موفق)
-            word, meaning, code, current_interval, current_count, last_review_time = self.cards[self.current_index]
-            self.db.update_review_stats(code, current_interval, current_count)
-
-            # به‌روزرسانی لیست داخلی (Fetch مجدد) برای نمایش آمار جدید در کارت بعدی
-            new_data = self.db.cursor.execute("""
-                                              SELECT words, meaning, code, review_intervals, count, next_time_review
-                                              FROM my_table
-                                              WHERE code = ?
-                                              """, (code,)).fetchone()
-            if new_data:
-                self.cards[self.current_index] = new_data
-            # -------------------------------------------------------------------
+            # ثبت مرور موفق؛ session کارت را در لیست داخلی هم به‌روز می‌کند (بدون SELECT مجدد)
+            self.session.grade_pass()
 
             self.flip_timer.stop()
             self.flip_timer.start(1000)  # تایمر 1 ثانیه‌ای برای رفتن به کارت بعدی
@@ -730,6 +780,14 @@ class CardViewerPage(QWidget):
         # 2. اگر next از تایمر 1 ثانیه‌ای آمده یا کاربر در حال نمایش سمت دوم next زده:
         self._advance_card()
 
+    def fail_card(self):
+        """حالت سریع (K): ثبت مرور ناموفق (lapse) و نمایش فوری کارت بعدی."""
+        if not self.cards or self.session.finished:
+            return
+        with timer("review.card_to_card", result="fail"):
+            self.session.grade_fail()
+            self._advance_card()
+
     def _advance_card(self):
         """
         فقط حرکت به کارت بعدی. این متد آمار SRS را دستکاری نمی‌کند.
@@ -738,30 +796,41 @@ class CardViewerPage(QWidget):
         if not self.cards:
             return
 
-        # برو به کارت بعدی
-        next_index = self.current_index + 1
-
         # توقف تایمرها
         self.main_timer.stop()
         self.flip_timer.stop()
 
-        if next_index >= len(self.cards):
+        if not self.session.advance():
             # اتمام مرور
+            if self.rapid:
+                self.show_summary()
+                return
             QMessageBox.information(self, "Review Complete",
                                     f"Review session for {len(self.cards)} cards has been completed! Returning to main menu.")
             self.go_back_to_menu()
             return
 
-        self.current_index = next_index
-
-        # وقتی کارت بعدی میاد، از تنظیم اولیه side پیروی کن
-        self.showing_front = (self.side == "front")
         self.show_card()
+        self.speak()
+        self._prefetch_audio()
 
         # شروع تایمر برای کارت جدید اگر در حالت اتوماتیک هستیم
         if self.show_time > 0 and self.pause_btn.text() == "Pause (P)":
             self.main_timer.start(self.show_time * 1000)
 
+    def show_summary(self):
+        """خلاصه پایان جلسه روی خود کارت (بدون پنجره modal)؛ Esc به منوی اصلی برمی‌گردد."""
+        summary = self.session.summary()
+        self.stack.setCurrentWidget(self.card_english)
+        self.effect_english.setOpacity(1.0)
+        self.effect_farsi.setOpacity(0.0)
+        self.card_english.setStyleSheet(self.card_english.styleSheet().replace("font-size: 200px", "font-size: 60px"))
+        self.card_english.setText(f"Done!\n{summary['passed']} passed · {summary['failed']} failed")
+        self.stats_label.setText(f"Reviewed {summary['total']} cards, skipped {summary['skipped']} | "
+                                 f"Press Esc to return to the menu")
+        for btn in (self.flip_btn, self.next_btn, self.pause_btn, self.fail_btn):
+            btn.setEnabled(False)
+
     def toggle_timer(self):
         """تغییر وضعیت مکث/ادامه برای هر دو تایمر."""
         if self.main_timer.isActive() or self.flip_timer.isActive():
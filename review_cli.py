@@ -0,0 +1,116 @@
+# review_cli.py - رابط خط فرمان برای مرور کارت‌ها (روی همان ReviewSession که CardViewerPage استفاده می‌کند)
+#
+# استفاده:
+#   python review_cli.py                 مرور تعاملی کارت‌های امروز
+#   python review_cli.py --cards 20 --side back
+#   python review_cli.py --simulate 5000 مرور شبیه‌سازی‌شده روی یک deck درون‌حافظه‌ای (load test)
+
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from planner import DailyPlanner
+from review_engine import (
+    DatabaseManager, MemoryStore, ReviewSession, REVIEW_INTERVALS_DAYS, REVIEW_THRESHOLD
+)
+
+HELP_TEXT = "[Enter/f] flip   [n] next (remembered)   [x] forgot   [s] skip   [q] quit"
+
+
+def run_interactive(db_path, num_cards, side):
+    """مرور تعاملی در ترمینال"""
+    db = DatabaseManager(db_path)
+    session = ReviewSession(db, num_cards=num_cards, show_time=0, side=side, planner=DailyPlanner(db.db_path))
+    try:
+        if not session.load():
+            print("No cards found for review.")
+            return 0
+
+        print(HELP_TEXT)
+        while not session.finished:
+            card = session.current
+            shown = card.word if session.showing_front else card.meaning
+            print(f"\n[{session.current_index + 1}/{len(session.cards)}] {shown}")
+            command = input("> ").strip().lower()
+
+            if command in ("", "f"):
+                session.flip()
+            elif command == "n":
+                new_card = session.grade_pass()
+                if new_card:
+                    print(f"    {card.word} = {card.meaning}  "
+                          f"(interval {new_card.interval}d, remaining {new_card.count}/{REVIEW_THRESHOLD})")
+                session.advance()
+            elif command == "x":
+                new_card = session.grade_fail()
+                if new_card:
+                    print(f"    {card.word} = {card.meaning}  (back to {new_card.interval}d, due tomorrow)")
+                session.advance()
+            elif command == "s":
+                session.advance()
+            elif command == "q":
+                break
+            else:
+                print(HELP_TEXT)
+
+        summary = session.summary()
+        print(f"\nReviewed {summary['passed'] + summary['failed']} of {summary['total']} cards "
+              f"({summary['failed']} forgotten), skipped {summary['skipped']}.")
+        return 0
+    finally:
+        db.close()
+
+
+def synthetic_rows(size, rng):
+    """ردیف‌های مصنوعی که همه امروز سررسید دارند"""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d 00:00:00")
+    return [(f"word{i}", f"معنی{i}", i, rng.choice(REVIEW_INTERVALS_DAYS), rng.randint(1, REVIEW_THRESHOLD), yesterday)
+            for i in range(size)]
+
+
+def run_simulation(sessions, deck_size, num_cards, pass_rate, seed):
+    """اجرای sessions جلسه مرور شبیه‌سازی‌شده و گزارش توان عملیاتی"""
+    rng = random.Random(seed)
+    rows = synthetic_rows(deck_size, rng)
+
+    reviewed = 0
+    start = time.perf_counter()
+    for _ in range(sessions):
+        store = MemoryStore(rows)
+        session = ReviewSession(store, num_cards=num_cards, show_time=0, rng=rng)
+        session.load()
+        while not session.finished:
+            session.flip()
+            if rng.random() < pass_rate:
+                session.grade_pass()
+            else:
+                session.grade_fail()
+            session.advance()
+            reviewed += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{sessions} sessions, {reviewed} answers in {elapsed:.3f}s "
+          f"({sessions / elapsed:,.0f} sessions/s, {reviewed / elapsed:,.0f} answers/s)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind terminal review")
+    parser.add_argument("--db", default=None, help="database path (default: flash cards.db)")
+    parser.add_argument("--cards", type=int, default=10, help="maximum cards in this session")
+    parser.add_argument("--side", choices=["front", "back"], default="front")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N", help="run N simulated sessions")
+    parser.add_argument("--deck-size", type=int, default=200, help="synthetic deck size for --simulate")
+    parser.add_argument("--pass-rate", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        return run_simulation(args.simulate, args.deck_size, args.cards, args.pass_rate, args.seed)
+    return run_interactive(args.db, args.cards, args.side)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,579 @@
+# review_engine.py - موتور مرور بدون رابط گرافیکی (صف کارت‌ها، وضعیت Flip، امتیازدهی و ذخیره SRS)
+#
+# این ماژول هیچ وابستگی به PyQt ندارد تا هم CardViewerPage و هم رابط خط فرمان (review_cli.py)
+# و بنچمارک‌ها از همین منطق استفاده کنند.
+
+import time
+import queue
+import random
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from instrument import instrument_methods, timer
+from deck_cache import get_cache
+from migrations import connect
+from settings import get_settings
+
+import os
+import sys
+
+# این قسمت مسیر دیتابیس را برای حالت عادی و حالت PyInstaller تعریف می‌کند
+if getattr(sys, 'frozen', False):
+    # اگر برنامه در حالت EXE اجرا می‌شود، مسیر را از پوشه موقت PyInstaller بگیرید
+    base_path = sys._MEIPASS
+else:
+    # اگر برنامه به صورت عادی اجرا می‌شود، مسیر فعلی فایل را بگیرید
+    base_path = os.path.abspath(os.path.dirname(__file__))
+
+DB_PATH = os.path.join(base_path, "flash cards.db")
+
+# فواصل تکرار بر اساس روز (Days)
+REVIEW_INTERVALS_DAYS = [1, 3, 7, 14, 30, 60, 120]
+
+# **مقدار ثابت آستانه**: مقدار اولیه count و مقداری که count پس از ارتقاء به آن ریست می‌شود.
+REVIEW_THRESHOLD = 5  # مقدار پیش‌فرض را 5 قرار دادم
+
+# ترتیب ستون‌ها همان ترتیب خروجی get_cards_for_review است تا با tuple های قبلی سازگار بماند
+Card = namedtuple("Card", ["word", "meaning", "code", "interval", "count", "next_time_review"])
+
+# نتیجه یک پاسخ: وضعیت SRS جدید کارت به همراه نتیجه ("pass" / "fail")، زمان پاسخ (میلی‌ثانیه)
+# و زمان مرور ("%Y-%m-%d %H:%M:%S"؛ اگر None باشد زمان نوشتن در دیتابیس ثبت می‌شود)
+Grade = namedtuple("Grade", ["code", "interval", "count", "next_time_review", "result", "response_ms",
+                             "reviewed_at"], defaults=(None,))
+
+REVIEW_LOG_SQL = """
+                 INSERT INTO review_log (deck, code, reviewed_at, result, response_ms, interval, count)
+                 VALUES (?, ?, ?, ?, ?, ?, ?)
+                 """
+
+# آخرین ردیف journal (journal.py) که همراه همین تراکنش در دیتابیس نوشته شده است: (session, seq)
+REVIEW_JOURNAL_SQL = "INSERT OR REPLACE INTO review_journal (id, session, seq) VALUES (1, ?, ?)"
+
+
+def next_review_state(current_interval, current_count, now=None):
+    """
+    **منطق SRS Count-down (کاهش شمارنده)** برای یک مرور موفق.
+    خروجی: (final_interval, new_count, next_review_date)
+    """
+    current_interval = int(current_interval)
+    current_count = int(current_count)
+    now = now or datetime.now()
+
+    final_interval = current_interval
+
+    # 1. کاهش شمارنده
+    new_count = current_count - 1
+
+    # 2. بررسی شرط ارتقاء (اگر به 0 رسید)
+    if new_count <= 0:
+
+        # ارتقاء به پله بعدی
+        if current_interval in REVIEW_INTERVALS_DAYS:
+            current_index = REVIEW_INTERVALS_DAYS.index(current_interval)
+            if current_index < len(REVIEW_INTERVALS_DAYS) - 1:
+                final_interval = REVIEW_INTERVALS_DAYS[current_index + 1]
+
+        # ریست کردن شمارنده به مقدار آستانه
+        new_count = REVIEW_THRESHOLD
+
+    # 3. تعیین تاریخ تکرار بعدی (Time-based Scheduling)
+    next_review_date = (now + timedelta(days=final_interval)).strftime("%Y-%m-%d 00:00:00")
+    return final_interval, new_count, next_review_date
+
+
+def next_fail_state(current_interval, current_count, now=None):
+    """
+    مرور ناموفق (lapse): فاصله یک پله پایین می‌آید، شمارنده به آستانه برمی‌گردد
+    و کارت فردا دوباره نمایش داده می‌شود.
+    خروجی: (final_interval, new_count, next_review_date)
+    """
+    current_interval = int(current_interval)
+    now = now or datetime.now()
+
+    if current_interval in REVIEW_INTERVALS_DAYS:
+        current_index = REVIEW_INTERVALS_DAYS.index(current_interval)
+        final_interval = REVIEW_INTERVALS_DAYS[max(current_index - 1, 0)]
+    else:
+        final_interval = REVIEW_INTERVALS_DAYS[0]
+
+    next_review_date = (now + timedelta(days=REVIEW_INTERVALS_DAYS[0])).strftime("%Y-%m-%d 00:00:00")
+    return final_interval, REVIEW_THRESHOLD, next_review_date
+
+
+def review_log_row(deck, grade, reviewed_at):
+    """پارامترهای REVIEW_LOG_SQL برای یک Grade"""
+    return (deck, str(grade.code), grade.reviewed_at or reviewed_at, grade.result, grade.response_ms,
+            grade.interval, grade.count)
+
+
+# ======================= Database Layer =======================
+@instrument_methods("db.review")
+class DatabaseManager:
+    """مدیریت دیتابیس و منطق SRS"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        self.conn = connect(self.db_path)
+        self.cursor = self.conn.cursor()
+        # کش مشترک deck؛ خواندن‌ها از حافظه و نوشتن‌ها write-through
+        self.cache = get_cache(self.db_path)
+
+    # -------------------- متدهای جدید برای تنظیمات --------------------
+    # تنظیمات در settings.py نگه داشته می‌شوند؛ این متدها برای سازگاری باقی مانده‌اند
+    def load_settings(self):
+        """تنظیمات Review از حافظه (بدون خواندن دیتابیس)"""
+        values = get_settings(self.db_path).values("review.")
+        return {
+            'num_cards': values["review.num_cards"],
+            'show_time': values["review.show_time"],
+            'card_side': values["review.card_side"]
+        }
+
+    def save_settings(self, num_cards, show_time, card_side):
+        """تغییر تنظیمات Review؛ نوشتن در دیتابیس با تأخیر و تجمیع‌شده انجام می‌شود"""
+        get_settings(self.db_path).update({
+            "review.num_cards": num_cards,
+            "review.show_time": show_time,
+            "review.card_side": card_side,
+        })
+
+    # ------------------------------------------------------------------
+
+    def get_cards_for_review(self, num_cards):
+        """
+        بازیابی کارت‌ها برای مرور: کلماتی که تاریخ مرور آن‌ها گذشته یا امروز است.
+        خروجی: (words, meaning, code, review_intervals, count, next_time_review)
+        """
+        if self.cache:
+            return self.cache.get_cards_for_review(num_cards)
+
+        today = datetime.now().strftime("%Y-%m-%d 23:59:59")
+
+        query = """
+                SELECT words, meaning, code, review_intervals, count, next_time_review
+                FROM my_table
+                WHERE next_time_review <= ? \
+                   OR next_time_review IS NULL
+                ORDER BY review_intervals ASC LIMIT ? \
+                """
+        self.cursor.execute(query, (today, num_cards,))
+        return self.cursor.fetchall()
+
+    def update_review_stats(self, code, current_interval, current_count):
+        """
+        به‌روزرسانی آمار SRS پس از یک مرور موفق (Next).
+        محاسبه در next_review_state انجام می‌شود.
+        """
+        try:
+            final_interval, new_count, next_review_date = next_review_state(current_interval, current_count)
+
+            # به‌روزرسانی دیتابیس
+            self.cursor.execute("""
+                                UPDATE my_table
+                                SET review_intervals = ?,
+                                    count            = ?,
+                                    next_time_review = ?
+                                WHERE code = ?
+                                """, (final_interval, new_count, next_review_date, code))
+            self.conn.commit()
+            if self.cache:
+                self.cache.apply_review(code, final_interval, new_count, next_review_date)
+            return True
+        except Exception as e:
+            print(f"Error updating review stats: {e}")
+            return False
+
+    def apply_review_batch(self, grades, checkpoint=None):
+        """
+        نوشتن نتایج مرور (Grade، موفق و ناموفق) و تاریخچه آن‌ها در review_log در یک تراکنش.
+        checkpoint = (session, seq): آخرین ردیف journal که این دسته شامل آن است (در همان تراکنش ثبت می‌شود)
+        """
+        reviewed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with self.conn:
+                self.cursor.executemany("""
+                                        UPDATE my_table
+                                        SET review_intervals = ?,
+                                            count            = ?,
+                                            next_time_review = ?
+                                        WHERE code = ?
+                                        """, [(g.interval, g.count, g.next_time_review, g.code) for g in grades])
+                # deck پیش‌فرض (همان decks.DEFAULT_DECK)
+                self.cursor.executemany(REVIEW_LOG_SQL, [review_log_row("default", g, reviewed_at) for g in grades])
+                if checkpoint:
+                    self.cursor.execute(REVIEW_JOURNAL_SQL, checkpoint)
+            if self.cache:
+                for g in grades:
+                    self.cache.apply_review(g.code, g.interval, g.count, g.next_time_review)
+            return True
+        except Exception as e:
+            print(f"Error updating review stats: {e}")
+            return False
+
+    def close(self):
+        self.conn.close()
+
+
+# ======================= In-memory Store =======================
+class MemoryStore:
+    """
+    ذخیره‌ساز درون‌حافظه‌ای با همان رابط DatabaseManager (برای شبیه‌سازی و بنچمارک).
+    rows: لیست tuple هایی با ترتیب ستون‌های Card
+    """
+
+    def __init__(self, rows=()):
+        self.rows = {row[2]: Card(*row) for row in rows}
+        self.writes = 0
+
+    def get_cards_for_review(self, num_cards):
+        today = datetime.now().strftime("%Y-%m-%d 23:59:59")
+        due = [c for c in self.rows.values() if c.next_time_review is None or c.next_time_review <= today]
+        due.sort(key=lambda c: c.interval)
+        return due[:num_cards]
+
+    def update_review_stats(self, code, current_interval, current_count):
+        final_interval, new_count, next_review_date = next_review_state(current_interval, current_count)
+        self.rows[code] = self.rows[code]._replace(interval=final_interval, count=new_count,
+                                                   next_time_review=next_review_date)
+        self.writes += 1
+        return True
+
+    def apply_review_batch(self, grades, checkpoint=None):
+        for g in grades:
+            self.rows[g.code] = self.rows[g.code]._replace(interval=g.interval, count=g.count,
+                                                           next_time_review=g.next_time_review)
+        self.writes += 1
+        return True
+
+    def close(self):
+        pass
+
+
+# ======================= Write-behind =======================
+class ReviewWriter:
+    """
+    نوشتن نتایج مرور در پس‌زمینه تا ذخیره در دیتابیس روی مسیر نمایش کارت بعدی نباشد.
+    نتایج در یک thread جداگانه جمع و هر FLUSH_WINDOW_S ثانیه (یا هنگام close) در یک تراکنش
+    با store.apply_review_batch نوشته می‌شوند. store_factory در همان thread صدا زده می‌شود
+    چون اتصال sqlite3 متعلق به thread سازنده است.
+
+    با journal_factory (journal.GradeJournal): هر پاسخ بلافاصله در journal ترتیبی نوشته می‌شود
+    (پاسخ‌هایی که هم‌زمان برسند با یک fsync؛ group commit) و دیتابیس فقط هر JOURNALED_FLUSH_S ثانیه
+    یا هر JOURNALED_BATCH پاسخ یک تراکنش می‌گیرد. اگر برنامه پیش از آن بسته شود، پاسخ‌ها در اجرای
+    بعدی از journal بازیابی می‌شوند.
+
+    on_error(batch) در thread نویسنده صدا زده می‌شود وقتی نوشتن یک دسته ناموفق است
+    (batch خالی یعنی اتصال store باز نشد و پاسخ‌های بعدی پذیرفته نمی‌شوند).
+    """
+
+    FLUSH_WINDOW_S = 0.5
+    JOURNALED_FLUSH_S = 5.0
+    JOURNALED_BATCH = 500
+
+    def __init__(self, store_factory, journal_factory=None, on_error=None):
+        self._factory = store_factory
+        self._journal_factory = journal_factory
+        self._on_error = on_error
+        self._queue = queue.Queue()
+        self.written = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="ReviewWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, grade):
+        """خروجی False یعنی thread نویسنده متوقف شده و پاسخ نوشته نخواهد شد"""
+        if not self._thread.is_alive():
+            return False
+        self._queue.put(grade)
+        return True
+
+    def _report(self, batch):
+        if self._on_error:
+            self._on_error(batch)
+
+    def _run(self):
+        try:
+            store = self._factory()
+        except Exception as e:
+            print(f"Error opening review store: {e}")
+            self._report([])
+            return
+        try:
+            if self._journal_factory:
+                self._run_journaled(store)
+            else:
+                self._run_batches(store)
+        finally:
+            store.close()
+
+    def _write(self, store, batch, checkpoint=None):
+        with timer("review.write_batch", rows=len(batch)):
+            ok = store.apply_review_batch(batch, checkpoint) if checkpoint else store.apply_review_batch(batch)
+        if ok:
+            self.written += len(batch)
+        else:
+            self.failed += len(batch)
+            self._report(batch)
+        return ok
+
+    def _run_batches(self, store):
+        while True:
+            item = self._queue.get()
+            stop = item is None
+            batch = [] if stop else [item]
+            # جمع کردن نتایج رسیده در پنجره زمانی برای نوشتن در یک تراکنش
+            deadline = time.monotonic() + self.FLUSH_WINDOW_S
+            while not stop:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(store, batch)
+            if stop:
+                return
+
+    def _run_journaled(self, store):
+        journal = self._journal_factory()
+        # پاسخ‌هایی که در journal هستند ولی هنوز در دیتابیس نه
+        pending = []
+        deadline = None
+        stop = False
+        try:
+            while not stop:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                batch = []
+                try:
+                    item = self._queue.get(timeout=timeout)
+                    if item is None:
+                        stop = True
+                    else:
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+                # group commit: هر چه تا این لحظه در صف رسیده با همان fsync نوشته می‌شود
+                while not stop:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                    else:
+                        batch.append(item)
+
+                force = stop
+                if batch:
+                    try:
+                        with timer("review.journal_append", rows=len(batch)):
+                            journal.append(batch)
+                    except OSError as e:
+                        # بدون journal پاسخ‌ها همین حالا در دیتابیس نوشته می‌شوند
+                        print(f"Error writing review journal: {e}")
+                        force = True
+                    pending += batch
+                    if deadline is None:
+                        deadline = time.monotonic() + self.JOURNALED_FLUSH_S
+
+                if pending and (force or len(pending) >= self.JOURNALED_BATCH or time.monotonic() >= deadline):
+                    if self._write(store, pending, journal.checkpoint()):
+                        pending = []
+                        journal.reset()
+                        deadline = None
+                    else:
+                        # در journal باقی می‌مانند و دوباره تلاش می‌شود
+                        deadline = time.monotonic() + self.JOURNALED_FLUSH_S
+        finally:
+            # اگر چیزی نوشته نشده باقی مانده باشد فایل برای بازیابی در اجرای بعدی حفظ می‌شود
+            journal.close(remove=not pending)
+
+    def close(self, timeout=5.0):
+        """نوشتن نتایج باقی‌مانده و پایان thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+# ======================= Review Session =======================
+class ReviewSession:
+    """
+    ماشین حالت یک جلسه مرور:
+        FRONT  -> سمت اول کارت نمایش داده می‌شود
+        BACK   -> سمت دوم نمایش داده می‌شود (پس از Flip یا پایان تایمر)
+        GRADED -> مرور موفق ثبت شده و منتظر رفتن به کارت بعدی است
+        DONE   -> کارت‌ها تمام شده‌اند
+
+    store باید متدهای get_cards_for_review و apply_review_batch را داشته باشد.
+    اگر writer (ReviewWriter) داده شود، نتیجه به جای نوشتن هم‌زمان در store به صف آن فرستاده می‌شود؛
+    اگر writer پاسخ را نپذیرد امتیاز ثبت نمی‌شود و خطای دسته‌هایی که بعداً نوشته نشوند از on_error آن می‌رسد.
+    زمان پاسخ از لحظه نمایش کارت با clock (پیش‌فرض time.monotonic) اندازه‌گیری می‌شود.
+    اگر planner (planner.DailyPlanner) داده شود، تاریخ مرور بعدی کارت‌های موفق با fuzz و پخش بار تعیین می‌شود.
+    on_graded(old_card, new_card) پس از هر ذخیره موفق صدا زده می‌شود (hook ذخیره‌سازی).
+    """
+
+    FRONT = "front"
+    BACK = "back"
+    GRADED = "graded"
+    DONE = "done"
+
+    def __init__(self, store, num_cards=50, show_time=3, side="front", rng=None, on_graded=None, writer=None,
+                 clock=None, planner=None):
+        self.store = store
+        self.writer = writer
+        self.planner = planner
+        self.clock = clock or time.monotonic
+        self.num_cards = num_cards
+        self.show_time = show_time
+        self.side = side
+        self.rng = rng or random
+        self.on_graded = on_graded
+
+        self.cards = []
+        self.current_index = 0
+        self.state = self.DONE
+        # True یعنی سمت انگلیسی (front) روی صفحه است
+        self.showing_front = (self.side == "front")
+
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+        self._shown_at = self.clock()
+
+    # -------------------- صف کارت‌ها --------------------
+    def load(self):
+        """خواندن کارت‌ها از store، محدود کردن به num_cards و به‌هم‌ریختن ترتیب"""
+        return self.set_cards(self.store.get_cards_for_review(self.num_cards))
+
+    def set_cards(self, rows):
+        """
+        شروع جلسه با ردیف‌هایی که بیرون از session خوانده شده‌اند
+        (مثلاً در thread کارگر، چون اتصال store متعلق به thread رابط گرافیکی است).
+        """
+        rows = list(rows)
+        if rows:
+            if self.num_cards and self.num_cards < len(rows):
+                rows = rows[: self.num_cards]
+            self.rng.shuffle(rows)
+        self.cards = [Card(*row) for row in rows]
+        self.current_index = 0
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+        self._reset_card_state()
+        return self.cards
+
+    def _reset_card_state(self):
+        self.state = self.FRONT if self.cards else self.DONE
+        # وقتی کارت بعدی میاد، از تنظیم اولیه side پیروی کن
+        self.showing_front = (self.side == "front")
+        self._shown_at = self.clock()
+
+    @property
+    def current(self):
+        if self.state == self.DONE or not self.cards:
+            return None
+        return self.cards[self.current_index]
+
+    @property
+    def finished(self):
+        return self.state == self.DONE
+
+    @property
+    def on_first_side(self):
+        """آیا سمت اول کارت (بر اساس تنظیم side) نمایش داده می‌شود؟"""
+        return self.showing_front == (self.side == "front")
+
+    # -------------------- انتقال‌های حالت --------------------
+    def flip(self):
+        """برگرداندن کارت به سمت دیگر"""
+        if self.finished:
+            return False
+        self.showing_front = not self.showing_front
+        if self.state == self.FRONT:
+            self.state = self.BACK
+        return True
+
+    def grade_pass(self, response_ms=None):
+        """
+        ثبت مرور موفق (Next) برای کارت فعلی:
+        اگر هنوز سمت اول نمایش داده می‌شود، کارت برگردانده می‌شود.
+        خروجی: کارت به‌روز‌شده یا None
+        """
+        return self._grade("pass", next_review_state, response_ms)
+
+    def grade_fail(self, response_ms=None):
+        """
+        ثبت مرور ناموفق (کلمه یادش نبود) برای کارت فعلی: فاصله کاهش و شمارنده ریست می‌شود.
+        خروجی: کارت به‌روز‌شده یا None
+        """
+        return self._grade("fail", next_fail_state, response_ms)
+
+    def _grade(self, result, next_state, response_ms):
+        card = self.current
+        if card is None or self.state == self.GRADED:
+            return None
+
+        if response_ms is None:
+            response_ms = int((self.clock() - self._shown_at) * 1000)
+        if self.on_first_side:
+            self.flip()
+
+        final_interval, new_count, next_review_date = next_state(card.interval, card.count)
+        if self.planner and result == "pass":
+            next_review_date = self.planner.schedule(final_interval)
+        grade = Grade(card.code, final_interval, new_count, next_review_date, result, response_ms,
+                      datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        if self.writer:
+            if not self.writer.submit(grade):
+                return None
+        elif not self.store.apply_review_batch([grade]):
+            return None
+
+        # به‌روزرسانی لیست داخلی بدون SELECT مجدد
+        new_card = card._replace(interval=final_interval, count=new_count, next_time_review=next_review_date)
+        self.cards[self.current_index] = new_card
+        self.state = self.GRADED
+        if result == "pass":
+            self.passed += 1
+        else:
+            self.failed += 1
+        if self.on_graded:
+            self.on_graded(card, new_card)
+        return new_card
+
+    def timeout(self):
+        """
+        پایان زمان نمایش در حالت خودکار.
+        خروجی: "flipped" اگر از سمت اول به سمت دوم رفتیم، "advanced" اگر به کارت بعدی رفتیم.
+        """
+        if self.finished:
+            return "done"
+        if self.on_first_side:
+            self.flip()
+            return "flipped"
+        # سمت دوم و تایمر تمام شده بدون Next: کلمه یادش نبوده (lapse)
+        self.grade_fail()
+        self.advance()
+        return "advanced"
+
+    def advance(self):
+        """حرکت به کارت بعدی. خروجی False یعنی جلسه تمام شد."""
+        if self.finished:
+            return False
+        # کارتی که بدون امتیاز رد شده، به‌عنوان skip شمرده می‌شود
+        if self.state != self.GRADED:
+            self.skipped += 1
+        next_index = self.current_index + 1
+        if next_index >= len(self.cards):
+            self.state = self.DONE
+            return False
+        self.current_index = next_index
+        self._reset_card_state()
+        return True
+
+    def summary(self):
+        return {"total": len(self.cards), "passed": self.passed, "failed": self.failed, "skipped": self.skipped}
@@ -0,0 +1,563 @@
+# server.py - API محلی HTTP/JSON روی موتور مرور و deck (برای رابط‌های دیگر و تست بار)
+#
+# سرور با asyncio (فقط کتابخانه استاندارد) روی 127.0.0.1 اجرا می‌شود و اتصال‌ها keep-alive هستند.
+# پردازش درخواست‌ها هیچ‌وقت event loop را روی SQLite معطل نمی‌کند:
+#   - خواندن‌ها در یک thread خواننده با اتصال ثابت خودش (بیشتر از کش deck پاسخ داده می‌شوند)
+#   - همه نوشتن‌ها در یک thread نویسنده با اتصال ثابت خودش، پس نوشتن‌ها پشت سر هم و بدون قفل رقابتی هستند
+#   - نمره‌ها (grade) در صف جمع می‌شوند؛ هر بار که نویسنده آزاد شود همه نمره‌های رسیده (تا MAX_BATCH)
+#     در یک تراکنش نوشته می‌شوند (group commit)، پس زیر بار تعداد commit ها کم می‌ماند
+#
+#   GET    /cards/due?limit=20          کارت‌های سررسید
+#   POST   /grades                      {"code": "...", "result": "pass" | "fail", "response_ms": 1200} یا لیستی از آن‌ها
+#   GET    /search?q=...&limit=50       جستجوی کلمه یا معنی
+#   POST   /words                       {"word": "...", "meaning": "...", "count": 5}
+#   PUT    /words/<code>                هر کدام از word، meaning، interval، count، next_time_review
+#   DELETE /words/<code>
+#   GET    /sync/changes?since=N        تغییرات برای sync.py (و POST /sync/changes برای اعمال تغییرات همتا)
+#   GET    /stats
+#
+#   python server.py                             اجرای سرور روی پورت 8765
+#   python server.py bench --requests 20000      تست بار با کلاینت محلی (فقط خواندن)
+#   python server.py bench --grade               همراه با ثبت نمره (دیتابیس را تغییر می‌دهد)
+
+import sys
+import json
+import time
+import random
+import asyncio
+import sqlite3
+import argparse
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, quote
+from concurrent.futures import ThreadPoolExecutor
+
+from instrument import percentile, timer
+import review_engine
+from review_engine import Card, Grade, next_review_state, next_fail_state
+from planner import DailyPlanner
+from sync import SyncStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# حداکثر نمره‌های یک تراکنش
+MAX_BATCH = 500
+MAX_BODY_BYTES = 1 << 20
+# changeset اولین هم‌گام‌سازی کل deck است
+MAX_SYNC_BODY_BYTES = 512 << 20
+MAX_LIMIT = 1000
+# بازه فاصله مرور (روز)، مثل Set Interval در صفحه Edit
+MAX_INTERVAL = 100000
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    """خطای قابل نمایش به کلاینت"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _card_json(row):
+    card = Card(*row)
+    return {**card._asdict(), "code": str(card.code)}
+
+
+def _review_date(value):
+    """تاریخ مرور بعدی "YYYY-MM-DD" یا "YYYY-MM-DD HH:MM:SS" به شکل ذخیره‌شده؛ None یعنی همیشه سررسید"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(value, fmt).strftime("%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                pass
+    raise ApiError(400, "next_time_review must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+
+
+def _limit(query, default):
+    try:
+        return max(1, min(int(query.get("limit", [default])[0]), MAX_LIMIT))
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+
+
+# ======================= Server =======================
+class ApiServer:
+    """سرور HTTP/JSON با یک thread خواننده و یک thread نویسنده"""
+
+    def __init__(self, db_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.db_path = db_path or review_engine.DB_PATH
+        self.host = host
+        self.port = port
+        self._reader = ThreadPoolExecutor(1, thread_name_prefix="api-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        # اتصال‌ها در thread خودشان ساخته و تا پایان نگه داشته می‌شوند
+        self._read_dbs = None
+        self._write_dbs = None
+        self._planner = None
+        self._grades = None
+        self._grade_task = None
+        self._server = None
+        self.stats = {"requests": 0, "grades": 0, "grade_batches": 0, "connections": 0}
+
+    # -------------------- اتصال‌ها (فقط در thread مربوطه) --------------------
+    def _open(self):
+        # edit رابط Qt را وارد می‌کند؛ فقط هنگام اولین درخواست بارگذاری می‌شود
+        import edit
+        return edit.DatabaseManager(self.db_path), review_engine.DatabaseManager(self.db_path), SyncStore(self.db_path)
+
+    def _read_db(self):
+        if self._read_dbs is None:
+            self._read_dbs = self._open()
+        return self._read_dbs
+
+    def _write_db(self):
+        if self._write_dbs is None:
+            self._write_dbs = self._open()
+            self._planner = DailyPlanner(self.db_path)
+        return self._write_dbs
+
+    async def _read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._reader, fn, *args)
+
+    async def _write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    # -------------------- اجرا --------------------
+    async def start(self):
+        self._grades = asyncio.Queue()
+        self._grade_task = asyncio.create_task(self._grade_loop())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"LexiMind API listening on http://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """بستن سرور، نوشتن نمره‌های باقی‌مانده و بستن اتصال‌ها"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._grade_task is not None:
+            await self._grades.put(None)
+            await self._grade_task
+            self._grade_task = None
+        await self._read(self._close_dbs, "_read_dbs")
+        await self._write(self._close_dbs, "_write_dbs")
+        self._reader.shutdown()
+        self._writer.shutdown()
+
+    def _close_dbs(self, attr):
+        for db in getattr(self, attr) or ():
+            db.close()
+        setattr(self, attr, None)
+
+    # -------------------- HTTP --------------------
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > (MAX_SYNC_BODY_BYTES if target.startswith("/sync/") else MAX_BODY_BYTES):
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write((f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                      f"Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """اجرای یک درخواست. خروجی: (status, payload)"""
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            return 400, {"error": "invalid JSON body"}
+
+        route = "/".join(parts[:1]) or "root"
+        try:
+            with timer("api.request", route=route, method=method):
+                if parts == ["cards", "due"] and method == "GET":
+                    return 200, await self._read(self._due, _limit(query, 20))
+                if parts == ["grades"] and method == "POST":
+                    return 200, await self._grade_request(data)
+                if parts == ["search"] and method == "GET":
+                    return 200, await self._read(self._search, query.get("q", [""])[0], _limit(query, 50))
+                if parts == ["words"] and method == "POST":
+                    return 201, await self._write(self._add, data)
+                if len(parts) == 2 and parts[0] == "words" and method in ("PUT", "DELETE"):
+                    if method == "PUT":
+                        return 200, await self._write(self._update, parts[1], data)
+                    return 200, await self._write(self._delete, parts[1])
+                if parts == ["sync", "changes"] and method == "GET":
+                    return 200, await self._read(self._changes, query)
+                if parts == ["sync", "changes"] and method == "POST":
+                    if not isinstance(data, dict):
+                        raise ApiError(400, "expected a changeset")
+                    return 200, await self._write(self._apply_changes, data)
+                if parts == ["stats"] and method == "GET":
+                    return 200, dict(self.stats)
+                if parts and parts[0] in ("cards", "grades", "search", "words", "sync", "stats"):
+                    raise ApiError(405, f"{method} is not allowed here")
+                raise ApiError(404, f"unknown path: {url.path}")
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"Error handling {method} {url.path}: {e}")
+            return 500, {"error": "internal error"}
+
+    # -------------------- خواندن (thread خواننده) --------------------
+    def _due(self, limit):
+        _, review_db, _ = self._read_db()
+        return [_card_json(row) for row in review_db.get_cards_for_review(limit)]
+
+    def _search(self, q, limit):
+        if not q.strip():
+            raise ApiError(400, "q is required")
+        edit_db, _, _ = self._read_db()
+        return [{"code": str(code), "word": word, "meaning": meaning, "interval": interval,
+                 "count": cnt, "next_time_review": nxt}
+                for code, word, meaning, interval, cnt, nxt in edit_db.search_words(q)[:limit]]
+
+    # -------------------- نمره‌ها --------------------
+    async def _grade_request(self, data):
+        items = data if isinstance(data, list) else [data]
+        if not items or len(items) > MAX_BATCH:
+            raise ApiError(400, f"send 1-{MAX_BATCH} grades")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get("code"):
+                raise ApiError(400, "each grade needs a code")
+            result = item.get("result", "pass")
+            if result not in ("pass", "fail"):
+                raise ApiError(400, "result must be 'pass' or 'fail'")
+            response_ms = item.get("response_ms")
+            if response_ms is not None and not isinstance(response_ms, int):
+                raise ApiError(400, "response_ms must be an integer")
+            futures.append((str(item["code"]), result, response_ms, loop.create_future()))
+        for entry in futures:
+            self._grades.put_nowait(entry)
+        if not isinstance(data, list):
+            return await futures[0][-1]
+        # در درخواست گروهی خطای هر نمره جداگانه برگردانده می‌شود
+        results = []
+        for code, *_, future in futures:
+            try:
+                results.append(await future)
+            except ApiError as e:
+                results.append({"code": code, "error": str(e)})
+        return results
+
+    async def _grade_loop(self):
+        """نویسنده نمره‌ها: هر بار همه نمره‌های در صف (تا MAX_BATCH) در یک تراکنش نوشته می‌شوند"""
+        stopping = False
+        while not stopping:
+            entry = await self._grades.get()
+            if entry is None:
+                break
+            batch = [entry]
+            while len(batch) < MAX_BATCH and not self._grades.empty():
+                entry = self._grades.get_nowait()
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            try:
+                results = await self._write(self._write_grades, [queued[:3] for queued in batch])
+            except Exception as e:
+                print(f"Error writing grades: {e}")
+                results = [ApiError(500, "write failed")] * len(batch)
+            for (*_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _write_grades(self, items):
+        """محاسبه وضعیت جدید کارت‌ها و نوشتن همه در یک تراکنش (thread نویسنده)"""
+        _, review_db, _ = self._write_db()
+        codes = list(dict.fromkeys(code for code, _, _ in items))
+        rows = review_db.conn.execute(f"""
+                                      SELECT code, review_intervals, count
+                                      FROM my_table
+                                      WHERE code IN ({",".join("?" * len(codes))})
+                                      """, codes).fetchall()
+        # str(code) -> [code, interval, count]؛ چند نمره برای یک کارت به ترتیب اعمال می‌شوند
+        state = {str(code): [code, interval, cnt] for code, interval, cnt in rows}
+
+        grades, results = [], []
+        for code, result, response_ms in items:
+            current = state.get(code)
+            if current is None:
+                results.append(ApiError(404, f"unknown code: {code}"))
+                continue
+            stored_code, interval, cnt = current
+            if result == "pass":
+                interval, cnt, next_review = next_review_state(interval, cnt)
+                next_review = self._planner.schedule(interval)
+            else:
+                interval, cnt, next_review = next_fail_state(interval, cnt)
+            current[1:] = interval, cnt
+            grades.append(Grade(stored_code, interval, cnt, next_review, result, response_ms))
+            results.append({"code": code, "result": result, "interval": interval, "count": cnt,
+                            "next_time_review": next_review})
+
+        if grades and not review_db.apply_review_batch(grades):
+            return [ApiError(500, "write failed")] * len(items)
+        self.stats["grades"] += len(grades)
+        self.stats["grade_batches"] += 1
+        return results
+
+    # -------------------- کلمات (thread نویسنده) --------------------
+    def _add(self, data):
+        if not isinstance(data, dict):
+            raise ApiError(400, "expected a JSON object")
+        word = str(data.get("word", "")).strip()
+        meaning = str(data.get("meaning", "")).strip()
+        if not word or not meaning:
+            raise ApiError(400, "word and meaning are required")
+        cnt = data.get("count", review_engine.REVIEW_THRESHOLD)
+        if not isinstance(cnt, int) or not 1 <= cnt <= review_engine.REVIEW_THRESHOLD:
+            raise ApiError(400, f"count must be 1-{review_engine.REVIEW_THRESHOLD}")
+        edit_db, _, _ = self._write_db()
+        code = edit_db.add_word(word, meaning, cnt)
+        if code is None:
+            raise ApiError(500, "could not add word")
+        return {"code": str(code)}
+
+    def _current(self, edit_db, code):
+        row = edit_db.conn.execute("""
+                                   SELECT words, meaning, review_intervals, count, next_time_review
+                                   FROM my_table
+                                   WHERE code = ?
+                                   """, (code,)).fetchone()
+        if row is None:
+            raise ApiError(404, f"unknown code: {code}")
+        return dict(zip(("word", "meaning", "interval", "count", "next_time_review"), row))
+
+    def _update(self, code, data):
+        if not isinstance(data, dict):
+            raise ApiError(400, "expected a JSON object")
+        edit_db, _, _ = self._write_db()
+        fields = self._current(edit_db, code)
+        unknown = set(data) - set(fields)
+        if unknown:
+            raise ApiError(400, f"unknown fields: {', '.join(sorted(unknown))}")
+        for name, high in (("interval", MAX_INTERVAL), ("count", review_engine.REVIEW_THRESHOLD)):
+            if name in data and (not isinstance(data[name], int) or not 1 <= data[name] <= high):
+                raise ApiError(400, f"{name} must be an integer 1-{high}")
+        if "next_time_review" in data:
+            data = {**data, "next_time_review": _review_date(data["next_time_review"])}
+        fields.update(data)
+        try:
+            updated = edit_db.update_word(code, fields["word"], fields["meaning"], fields["interval"],
+                                          fields["count"], fields["next_time_review"])
+        except sqlite3.Error as e:
+            raise ApiError(400, str(e))
+        if not updated:
+            raise ApiError(404, f"unknown code: {code}")
+        return {"code": code, **fields}
+
+    def _delete(self, code):
+        edit_db, _, _ = self._write_db()
+        if not edit_db.delete_word(code):
+            raise ApiError(404, f"unknown code: {code}")
+        return {"deleted": code}
+
+    # -------------------- sync.py --------------------
+    def _changes(self, query):
+        try:
+            since, lo, hi = (int(query.get(name, [default])[0]) for name, default in
+                             (("since", -1), ("lo", 0), ("hi", 0)))
+        except ValueError:
+            raise ApiError(400, "since, lo and hi must be integers")
+        _, _, sync_store = self._read_db()
+        return sync_store.changes_since(since, (lo, hi))
+
+    def _apply_changes(self, changes):
+        _, _, sync_store = self._write_db()
+        try:
+            return sync_store.apply(changes)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ApiError(400, f"invalid changeset: {e}")
+
+
+# ======================= Load-test client =======================
+class ApiClient:
+    """کلاینت ساده HTTP/1.1 روی یک اتصال keep-alive"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader = self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """خروجی: (status, داده JSON)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self._writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                            ).encode("latin-1") + body)
+        status_line = (await self._reader.readline()).split()
+        if len(status_line) < 2:
+            await self.close()
+            raise ConnectionError("connection closed by server")
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = json.loads(await self._reader.readexactly(int(headers.get("content-length", 0))))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return int(status_line[1]), data
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+
+async def run_bench(host, port, requests, concurrency, grade=False):
+    """ارسال requests درخواست روی concurrency اتصال همزمان. خروجی: دیکشنری نتایج"""
+    clients = [ApiClient(host, port) for _ in range(concurrency)]
+    _, due = await clients[0].request("GET", f"/cards/due?limit={MAX_LIMIT}")
+    codes = [card["code"] for card in due]
+    words = [card["word"][:3] for card in due] or ["a"]
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def worker(client):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            roll = random.random()
+            if grade and codes and roll < 0.5:
+                request = ("POST", "/grades", {"code": random.choice(codes),
+                                               "result": "pass" if random.random() < 0.8 else "fail"})
+            elif roll < 0.75:
+                request = ("GET", "/cards/due?limit=20", None)
+            else:
+                request = ("GET", f"/search?q={quote(random.choice(words))}&limit=20", None)
+            started = time.perf_counter()
+            status, _ = await client.request(*request)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(client) for client in clients))
+    finally:
+        for client in clients:
+            await client.close()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors, "seconds": round(elapsed, 3),
+            "rps": round(len(latencies) / elapsed) if elapsed else 0,
+            "p50_ms": round(percentile(latencies, 0.50), 3) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99), 3) if latencies else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind local HTTP/JSON API")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("command", nargs="?", choices=["serve", "bench"], default="serve")
+    parser.add_argument("--requests", type=int, default=10000, help="bench: number of requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="bench: parallel connections")
+    parser.add_argument("--grade", action="store_true", help="bench: also POST grades (modifies the database)")
+    parser.add_argument("--external", action="store_true", help="bench: use an already running server")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = ApiServer(args.db, args.host, args.port)
+
+        async def serve():
+            try:
+                await server.serve_forever()
+            finally:
+                await server.close()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    async def bench():
+        if args.external:
+            return await run_bench(args.host, args.port, args.requests, args.concurrency, args.grade), None
+        # بدون --external سرور در همین پردازش روی یک پورت آزاد اجرا می‌شود
+        server = await ApiServer(args.db, args.host, 0).start()
+        try:
+            result = await run_bench(args.host, server.port, args.requests, args.concurrency, args.grade)
+            return result, dict(server.stats)
+        finally:
+            await server.close()
+
+    result, stats = asyncio.run(bench())
+    print(json.dumps(result))
+    if stats:
+        print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
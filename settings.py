@@ -0,0 +1,202 @@
+# settings.py - تنظیمات برنامه: یک بار بارگذاری، نگه‌داری در حافظه و ذخیره با تأخیر (تجمیع‌شده)
+#
+# همه تنظیمات و پارامترهای قابل تنظیم (تنظیمات Review، انیمیشن‌ها، اندازه تکه‌ها، PRAGMA های
+# دیتابیس) در SCHEMA با نوع و مقدار پیش‌فرض تعریف می‌شوند و در جدول app_settings ذخیره می‌شوند.
+# set() فقط حافظه را تغییر می‌دهد و به مشترکین خبر می‌دهد؛ تغییرات چند ثانیه بعد یک‌جا در یک
+# تراکنش نوشته می‌شوند (یا با flush() فوراً، و هنگام خروج از برنامه).
+
+import atexit
+import os
+import threading
+from collections import namedtuple
+
+import migrations
+
+# تأخیر ذخیره تغییرات (ثانیه)؛ تغییرات پشت‌سرهم در یک نوشتن تجمیع می‌شوند
+FLUSH_DELAY_S = 2.0
+
+Setting = namedtuple("Setting", ["type", "default", "choices"])
+
+SCHEMA = {
+    # تنظیمات صفحه Review
+    "review.num_cards": Setting(int, 10, None),
+    "review.show_time": Setting(int, 3, None),
+    "review.card_side": Setting(str, "front", ("front", "back")),
+    # حالت سریع: بدون انیمیشن (یا با انیمیشن کوتاه)، رفتن فوری به کارت بعدی و کلیدهای Pass/Fail
+    "review.rapid": Setting(bool, False, None),
+    "review.rapid_fade_ms": Setting(int, 0, None),
+    # پاسخ‌ها ابتدا در journal.py و دیتابیس در دسته‌های بزرگ (بازیابی پس از بسته شدن ناگهانی)
+    "review.journal": Setting(bool, True, None),
+    # تلفظ (audio.py): صدا و سرعت espeak-ng، سقف حجم کش و تعداد کارت‌هایی که زودتر ساخته می‌شوند
+    "audio.enabled": Setting(bool, False, None),
+    "audio.voice": Setting(str, "en", None),
+    "audio.speed": Setting(int, 160, None),
+    "audio.cache_mb": Setting(int, 50, None),
+    "audio.prefetch_ahead": Setting(int, 20, None),
+    # برنامه‌ریز روزانه (planner.py): سقف مطلوب مرورهای هر روز و بازه جابه‌جایی (درصد فاصله)
+    "planner.daily_target": Setting(int, 200, None),
+    "planner.fuzz_percent": Setting(int, 10, None),
+    # انیمیشن‌ها
+    "ui.fade_ms": Setting(int, 320, None),
+    "ui.background_letters": Setting(int, 35, None),
+    "ui.background_frame_ms": Setting(int, 50, None),
+    # اندازه تکه‌ها و تأخیرهای صفحه Edit
+    "edit.populate_chunk": Setting(int, 500, None),
+    "edit.page_size": Setting(int, 500, None),
+    # تعداد عملیات صفحه Edit که برای Undo نگه داشته می‌شوند (history.py)
+    "edit.undo_depth": Setting(int, 50, None),
+    "search.debounce_ms": Setting(int, 250, None),
+    "search.stream_chunk": Setting(int, 200, None),
+    # PRAGMA های دیتابیس (مقادیر پیش‌فرض همان پیش‌فرض SQLite هستند)
+    "db.synchronous": Setting(str, "FULL", ("OFF", "NORMAL", "FULL")),
+    "db.cache_size_kb": Setting(int, 2000, None),
+}
+
+
+def coerce(key, value):
+    """تبدیل مقدار به نوع تعریف‌شده در SCHEMA (ValueError برای مقدار نامعتبر)"""
+    setting = SCHEMA[key]
+    if setting.type is bool and isinstance(value, str):
+        # مقادیر از جدول app_settings به صورت متن خوانده می‌شوند ("True" / "False")
+        if value.strip().lower() not in ("true", "false", "1", "0"):
+            raise ValueError(f"{key} must be a boolean, not {value!r}")
+        value = value.strip().lower() in ("true", "1")
+    value = setting.type(value)
+    if setting.choices and value not in setting.choices:
+        raise ValueError(f"{key} must be one of {setting.choices}, not {value!r}")
+    return value
+
+
+class SettingsStore:
+    """تنظیمات در حافظه با ذخیره تأخیری و اطلاع‌رسانی تغییرات"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._values = {key: setting.default for key, setting in SCHEMA.items()}
+        self._dirty = {}
+        self._flush_timer = None
+        # (prefix, callback)
+        self._subscribers = []
+        self.load()
+
+    def load(self):
+        conn = migrations.connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT key, value FROM app_settings").fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            for key, value in rows:
+                if key not in SCHEMA:
+                    continue
+                try:
+                    self._values[key] = coerce(key, value)
+                except (TypeError, ValueError) as e:
+                    print(f"Error in setting {key}: {e}")
+            self._apply_pragmas()
+
+    def _apply_pragmas(self):
+        migrations.PRAGMAS.update({
+            "synchronous": self._values["db.synchronous"],
+            "cache_size": -self._values["db.cache_size_kb"],
+        })
+
+    # -------------------- خواندن و نوشتن --------------------
+    def get(self, key):
+        return self._values[key]
+
+    def values(self, prefix=""):
+        with self._lock:
+            return {k: v for k, v in self._values.items() if k.startswith(prefix)}
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, changes):
+        """تغییر چند تنظیم؛ مقادیر بدون تغییر نادیده گرفته می‌شوند"""
+        changed = {}
+        with self._lock:
+            for key, value in changes.items():
+                value = coerce(key, value)
+                if self._values[key] != value:
+                    self._values[key] = value
+                    self._dirty[key] = value
+                    changed[key] = value
+            if not changed:
+                return
+            if any(key.startswith("db.") for key in changed):
+                self._apply_pragmas()
+            self._schedule_flush()
+            subscribers = list(self._subscribers)
+        for key, value in changed.items():
+            for prefix, callback in subscribers:
+                if key.startswith(prefix):
+                    callback(key, value)
+
+    # -------------------- اطلاع‌رسانی --------------------
+    def subscribe(self, callback, prefix=""):
+        """callback(key, value) پس از هر تغییر کلیدهایی که با prefix شروع می‌شوند"""
+        with self._lock:
+            self._subscribers.append((prefix, callback))
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [(p, c) for p, c in self._subscribers if c != callback]
+
+    # -------------------- ذخیره --------------------
+    def _schedule_flush(self):
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_DELAY_S, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """نوشتن همه تغییرات در انتظار در یک تراکنش"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        try:
+            conn = migrations.connect(self.db_path)
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO app_settings (key, value) VALUES (?, ?)",
+                                     [(key, str(value)) for key, value in dirty.items()])
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error saving settings: {e}")
+            with self._lock:
+                # تغییرات برای تلاش بعدی نگه داشته می‌شوند (مگر اینکه در این فاصله دوباره تغییر کرده باشند)
+                self._dirty = {**dirty, **self._dirty}
+
+
+# ======================= Registry =======================
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_settings(db_path=None):
+    """تنظیمات مشترک هر فایل دیتابیس (در اولین فراخوانی بارگذاری می‌شود)"""
+    if db_path is None:
+        import review_engine
+        db_path = review_engine.DB_PATH
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SettingsStore(key)
+        return store
+
+
+@atexit.register
+def flush_all():
+    """ذخیره تغییرات در انتظار همه فایل‌ها (هنگام خروج از برنامه)"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
@@ -0,0 +1,214 @@
+# snapshot.py - تصویر دودویی (binary snapshot) کش deck برای شروع سریع برنامه
+#
+# هنگام خروج، ستون‌های DeckCache در یک فایل کنار دیتابیس ("flash cards.snapshot") نوشته می‌شوند و
+# در اجرای بعدی با mmap باز می‌شوند؛ تا اولین نوشتن، هیچ داده‌ای از SQLite خوانده نمی‌شود و
+# رشته‌ها فقط هنگام دسترسی decode می‌شوند، پس زمان باز کردن به اندازه deck بستگی ندارد.
+#
+# ساختار فایل (little-endian، همه بخش‌ها هم‌تراز 8 بایت):
+#   سرآیند: MAGIC، نسخه قالب، نسخه اسکیما (user_version)، تعداد ردیف، مهر فایل دیتابیس (inode، اندازه، mtime)،
+#           شمارنده sync_meta.version که ردیف‌ها با آن هم‌گام هستند (-1 اگر وجود نداشته باشد)
+#   فهرست: آفست هر بخش (uint64)
+#   intervals, counts          int64[n]
+#   برای هر ستون متنی:         نوع هر خانه uint8[n] (None / str / int)، آفست‌ها uint64[n + 1]، بایت‌های UTF-8
+#   due_order                  uint32[n] شماره ردیف‌ها به ترتیب next_time_review (NULL اول)
+#
+# اگر مهر فایل دیتابیس یا نسخه‌ها با فایل snapshot نخواند، snapshot نادیده گرفته می‌شود.
+# (شمارنده sync تغییراتی را هم نشان می‌دهد که هنوز فقط در فایل WAL هستند و مهر فایل را عوض نکرده‌اند.)
+
+import os
+import mmap
+import struct
+from bisect import bisect_right
+
+MAGIC = b"LXSNAP\0\0"
+# با تغییر ساختار فایل افزایش می‌یابد
+FORMAT_VERSION = 2
+
+STRING_COLUMNS = ("codes", "words", "meanings", "next_reviews", "words_norm", "meanings_norm")
+
+_HEADER = struct.Struct("<8sIIQQQQq")
+# intervals، counts، سه آفست برای هر ستون متنی، due_order
+_DIRECTORY = struct.Struct(f"<{2 + 3 * len(STRING_COLUMNS) + 1}Q")
+
+_NONE, _STR, _INT = 0, 1, 2
+
+
+def snapshot_path_for(db_path):
+    """مسیر فایل snapshot کنار فایل دیتابیس"""
+    root, _ = os.path.splitext(db_path)
+    return root + ".snapshot"
+
+
+def _pad(buf):
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+# ======================= Writer =======================
+def write(path, stamp, schema_version, content_version, columns):
+    """
+    نوشتن snapshot. columns: دیکشنری با کلیدهای intervals، counts و STRING_COLUMNS
+    (لیست‌های هم‌طول، فقط ردیف‌های زنده) که با content_version (sync_meta.version) هم‌گام هستند.
+    فایل به صورت اتمیک جایگزین می‌شود.
+    """
+    n = len(columns["intervals"])
+    ino, size, mtime_ns = stamp
+    body = bytearray()
+    offsets = []
+    base = _HEADER.size + _DIRECTORY.size
+
+    def section(data):
+        offsets.append(base + len(body))
+        body.extend(data)
+        _pad(body)
+
+    section(struct.pack(f"<{n}q", *columns["intervals"]))
+    section(struct.pack(f"<{n}q", *columns["counts"]))
+    for name in STRING_COLUMNS:
+        kinds = bytearray(n)
+        ends = [0]
+        blob = bytearray()
+        for i, value in enumerate(columns[name]):
+            if value is None:
+                kinds[i] = _NONE
+            else:
+                kinds[i] = _INT if isinstance(value, int) else _STR
+                blob.extend(str(value).encode("utf-8"))
+            ends.append(len(blob))
+        section(kinds)
+        section(struct.pack(f"<{n + 1}Q", *ends))
+        section(blob)
+
+    # NULL (همیشه سررسید) اول، سپس به ترتیب تاریخ
+    nxt = columns["next_reviews"]
+    section(struct.pack(f"<{n}I", *sorted(range(n), key=lambda i: nxt[i] or "")))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, schema_version, n, ino, size, mtime_ns,
+                             -1 if content_version is None else content_version))
+        f.write(_DIRECTORY.pack(*offsets))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+# ======================= Reader =======================
+class StringColumn:
+    """ستون متنی فقط‌خواندنی روی mmap؛ هر خانه هنگام دسترسی decode می‌شود"""
+
+    def __init__(self, mm, kinds, ends, blob_start):
+        self._mm = mm
+        self._kinds = kinds
+        self._ends = ends
+        self._blob = blob_start
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def __getitem__(self, i):
+        kind = self._kinds[i]
+        if kind == _NONE:
+            return None
+        text = self._mm[self._blob + self._ends[i]:self._blob + self._ends[i + 1]].decode("utf-8")
+        return int(text) if kind == _INT else text
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def find(self, needle):
+        """
+        شماره ردیف‌هایی که needle (متن) در آن‌ها هست؛ جستجو با mmap.find روی کل بایت‌های ستون
+        و تبدیل آفست به ردیف با bisect (بدون decode کردن ردیف‌ها)
+        """
+        needle = needle.encode("utf-8")
+        ends, blob = self._ends, self._blob
+        if not needle:
+            return [i for i in range(len(self)) if self._kinds[i] != _NONE]
+        rows = []
+        pos, stop = blob, blob + ends[len(self)]
+        while True:
+            hit = self._mm.find(needle, pos, stop)
+            if hit < 0:
+                return rows
+            row = bisect_right(ends, hit - blob) - 1
+            row_end = blob + ends[row + 1]
+            if hit + len(needle) <= row_end:
+                rows.append(row)
+                # بقیه همین ردیف لازم نیست
+                pos = row_end
+            else:
+                # تطابق از مرز دو ردیف گذشته است
+                pos = hit + 1
+
+
+class Snapshot:
+    """snapshot باز‌شده با mmap"""
+
+    def __init__(self, f, mm, rows, content_version):
+        self._file = f
+        self._mm = mm
+        self.rows = rows
+        self.content_version = content_version
+        # همه memoryview ها پیش از بستن mmap آزاد می‌شوند
+        self._base = memoryview(mm)
+        self._views = []
+        offsets = _DIRECTORY.unpack_from(mm, _HEADER.size)
+        self.intervals = self._view(offsets[0], "q", rows)
+        self.counts = self._view(offsets[1], "q", rows)
+        self.columns = {}
+        for k, name in enumerate(STRING_COLUMNS):
+            kinds_at, ends_at, blob_at = offsets[2 + 3 * k:5 + 3 * k]
+            self.columns[name] = StringColumn(mm, self._view(kinds_at, "B", rows),
+                                              self._view(ends_at, "Q", rows + 1), blob_at)
+        self.due_order = self._view(offsets[-1], "I", rows)
+
+    def _view(self, start, fmt, count):
+        raw = self._base[start:start + count * struct.calcsize(fmt)]
+        view = raw.cast(fmt)
+        self._views += [view, raw]
+        return view
+
+    @classmethod
+    def open(cls, path, stamp, schema_version):
+        """باز کردن snapshot؛ اگر وجود نداشته باشد یا با دیتابیس فعلی نخواند None"""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return None
+        try:
+            magic, version, schema, rows, ino, size, mtime_ns, content_version = _HEADER.unpack_from(mm, 0)
+            if (magic, version, schema, (ino, size, mtime_ns)) == (MAGIC, FORMAT_VERSION, schema_version,
+                                                                   tuple(stamp)):
+                return cls(f, mm, rows, None if content_version < 0 else content_version)
+        except (struct.error, ValueError, TypeError) as e:
+            print(f"Error reading snapshot: {e}")
+        mm.close()
+        f.close()
+        return None
+
+    def due_rows(self, today):
+        """
+        شماره ردیف‌هایی که next_time_review آن‌ها NULL یا حداکثر today است. جستجوی دودویی روی due_order؛
+        فقط تاریخ ردیف‌های وسط بازه decode می‌شوند.
+        """
+        nxt, order = self.columns["next_reviews"], self.due_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (nxt[order[mid]] or "") <= today:
+                lo = mid + 1
+            else:
+                hi = mid
+        return order[:lo].tolist()
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._base.release()
+        self._mm.close()
+        self._file.close()
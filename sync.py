@@ -0,0 +1,359 @@
+# sync.py - هم‌گام‌سازی deck پیش‌فرض بین دستگاه‌ها با تبادل فقط تغییرات (delta)
+#
+# هر نوشتن در my_table با trigger های migrations.py (مرحله 8) ثبت می‌شود: ستون version (شمارنده
+# محلی تغییرات این فایل) و modified (زمان تغییر، میلی‌ثانیه)؛ حذف‌ها در sync_tombstones می‌مانند.
+# برای هر همتا آخرین version دریافت‌شده از او (pulled) و آخرین version محلی فرستاده‌شده (pushed)
+# در sync_peers نگه داشته می‌شود، پس هر بار فقط ردیف‌های تغییرکرده از آخرین هم‌گام‌سازی جابه‌جا می‌شوند.
+#
+# تعارض: آخرین نویسنده برنده است (modified بزرگ‌تر؛ در تساوی، مقایسه محتوا تا هر دو طرف به یک نتیجه
+# برسند). حذف بر تغییری که پیش از آن انجام شده غلبه می‌کند. کد هر کارت شناسه آن در هم‌گام‌سازی است
+# (ردیف‌های قدیمی با کد تکراری در طرف مقابل یکی می‌شوند).
+#
+# همتا می‌تواند یک فایل دیتابیس دیگر (مثلاً روی درایو مشترک؛ اگر وجود نداشته باشد ساخته می‌شود) یا
+# سرور محلی server.py روی دستگاه دیگر باشد. deck های اضافه (decks.py) هم‌گام نمی‌شوند.
+#
+#   python sync.py status
+#   python sync.py with "/mnt/share/flash cards.db"
+#   python sync.py with http://192.168.1.20:8765
+
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from instrument import instrument_methods, timer
+import review_engine
+from deck_cache import get_cache
+from fuzzy import FuzzyIndex
+from migrations import connect, NOW_MS_SQL
+from normalize import normalize_text
+
+# ترتیب فیلدهای هر ردیف در changeset
+ROW_FIELDS = ("code", "words", "meaning", "review_intervals", "count", "next_time_review", "modified")
+# تعداد کد در هر پرس‌وجوی IN
+LOOKUP_CHUNK = 500
+
+
+def next_version(conn):
+    """یک شماره version جدید (داخل تراکنش جاری) برای نوشتن‌هایی که version را خودشان تعیین می‌کنند"""
+    conn.execute("UPDATE sync_meta SET value = value + 1 WHERE key = 'version'")
+    return conn.execute("SELECT value FROM sync_meta WHERE key = 'version'").fetchone()[0]
+
+
+def now_ms(conn):
+    return conn.execute(f"SELECT {NOW_MS_SQL}").fetchone()[0]
+
+
+def _wins(incoming, local):
+    """incoming و local: (modified, فیلدها)؛ آیا incoming جایگزین local می‌شود؟"""
+    if incoming[0] != local[0]:
+        return incoming[0] > local[0]
+    return json.dumps(incoming[1], ensure_ascii=False) > json.dumps(local[1], ensure_ascii=False)
+
+
+@instrument_methods("db.sync")
+class SyncStore:
+    """خواندن و اعمال changeset روی یک فایل دیتابیس"""
+
+    def __init__(self, db_path=None, update_indexes=True):
+        self.db_path = db_path or review_engine.DB_PATH
+        self.conn = connect(self.db_path)
+        # برای فایل همتا کش deck و ایندکس تقریبی به‌روز نمی‌شوند (ساختن آن‌ها فقط برای چند ردیف
+        # یعنی خواندن کل فایل)؛ ایندکس تقریبی با تغییر تعداد ردیف‌ها بعداً خودش دوباره ساخته می‌شود
+        self.update_indexes = update_indexes
+        self.cache = get_cache(self.db_path) if update_indexes else None
+
+    @property
+    def device_id(self):
+        return self.conn.execute("SELECT value FROM sync_meta WHERE key = 'device_id'").fetchone()[0]
+
+    def version(self):
+        return self.conn.execute("SELECT value FROM sync_meta WHERE key = 'version'").fetchone()[0]
+
+    # -------------------- خواندن تغییرات --------------------
+    def changes_since(self, since, exclude=None):
+        """
+        ردیف‌ها و حذف‌هایی که version آن‌ها از since بیشتر است (since = -1: همه ردیف‌ها).
+        exclude = (lo, hi): بازه version هایی که همین حالا از همان همتا اعمال شده‌اند و نباید برگردند.
+        """
+        lo, hi = exclude or (0, 0)
+        self.conn.execute("BEGIN")
+        try:
+            until = self.version()
+            rows = self.conn.execute("""
+                                     SELECT code, words, meaning, review_intervals, count, next_time_review, modified
+                                     FROM my_table
+                                     WHERE version > ?
+                                       AND NOT (version > ? AND version <= ?)
+                                     ORDER BY version
+                                     """, (since, lo, hi)).fetchall()
+            deleted = self.conn.execute("""
+                                        SELECT code, deleted_at
+                                        FROM sync_tombstones
+                                        WHERE version > ?
+                                          AND NOT (version > ? AND version <= ?)
+                                        """, (since, lo, hi)).fetchall()
+        finally:
+            self.conn.execute("COMMIT")
+        return {"device": self.device_id, "since": since, "until": until,
+                "rows": [[str(code), *rest] for code, *rest in rows], "deleted": deleted}
+
+    # -------------------- اعمال تغییرات --------------------
+    def _local_rows(self, codes):
+        """code -> (modified, [words, meaning, review_intervals, count, next_time_review])"""
+        local = {}
+        for i in range(0, len(codes), LOOKUP_CHUNK):
+            chunk = codes[i:i + LOOKUP_CHUNK]
+            for code, *fields, modified in self.conn.execute(f"""
+                    SELECT code, words, meaning, review_intervals, count, next_time_review, modified
+                    FROM my_table
+                    WHERE code IN ({",".join("?" * len(chunk))})
+                    """, chunk):
+                local[str(code)] = (modified, fields)
+        return local
+
+    def _tombstones(self, codes):
+        stones = {}
+        for i in range(0, len(codes), LOOKUP_CHUNK):
+            chunk = codes[i:i + LOOKUP_CHUNK]
+            stones.update(self.conn.execute(f"""
+                          SELECT code, deleted_at
+                          FROM sync_tombstones
+                          WHERE code IN ({",".join("?" * len(chunk))})
+                          """, chunk).fetchall())
+        return stones
+
+    def apply(self, changes):
+        """
+        اعمال changeset یک همتا در یک تراکنش با قاعده «آخرین نویسنده برنده است».
+        خروجی: شمارش‌ها به همراه بازه version هایی که این اعمال مصرف کرده است (before, after]
+        """
+        rows = [dict(zip(ROW_FIELDS, row)) for row in changes.get("rows", [])]
+        deleted = [(str(code), deleted_at) for code, deleted_at in changes.get("deleted", [])]
+        codes = list(dict.fromkeys([row["code"] for row in rows] + [code for code, _ in deleted]))
+        result = {"inserted": 0, "updated": 0, "deleted": 0, "skipped": 0}
+
+        # ایندکس تقریبی پس از commit تغییرات را از version ردیف‌ها می‌خواند
+        fuzzy = None
+        if self.update_indexes:
+            fuzzy = FuzzyIndex(self.db_path)
+        inserts, updates, removals = [], [], []
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.version()
+                local = self._local_rows(codes)
+                stones = self._tombstones(codes)
+                # همه ردیف‌های این changeset یک version مشترک می‌گیرند و از trigger ها رد می‌شوند
+                version = next_version(self.conn) if rows or deleted else before
+
+                for row in rows:
+                    code = row["code"]
+                    fields = [row[name] for name in ROW_FIELDS[1:-1]]
+                    incoming = (row["modified"], fields)
+                    if code in local:
+                        if not _wins(incoming, local[code]):
+                            result["skipped"] += 1
+                            continue
+                        updates.append((code, local[code][1][0], row))
+                    elif stones.get(code, -1) >= row["modified"]:
+                        result["skipped"] += 1
+                        continue
+                    else:
+                        inserts.append(row)
+                    local[code] = incoming
+
+                self.conn.executemany("""
+                    INSERT INTO my_table (code, words, meaning, review_intervals, count, next_time_review,
+                                          words_norm, meaning_norm, modified, version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [(r["code"], r["words"], r["meaning"], r["review_intervals"], r["count"],
+                           r["next_time_review"], normalize_text(r["words"]), normalize_text(r["meaning"]),
+                           r["modified"], version) for r in inserts])
+                self.conn.executemany("""
+                    UPDATE my_table
+                    SET words            = ?,
+                        meaning          = ?,
+                        review_intervals = ?,
+                        count            = ?,
+                        next_time_review = ?,
+                        modified         = ?,
+                        version          = ?
+                    WHERE code = ?
+                    """, [(r["words"], r["meaning"], r["review_intervals"], r["count"], r["next_time_review"],
+                           r["modified"], version, code) for code, _, r in updates])
+
+                for code, deleted_at in deleted:
+                    if code in local:
+                        if local[code][0] > deleted_at:
+                            # ردیف پس از حذف در این طرف تغییر کرده است
+                            result["skipped"] += 1
+                            continue
+                        removals.append((code, local[code][1][0]))
+                        self.conn.execute("DELETE FROM my_table WHERE code = ?", (code,))
+                    elif stones.get(code, -1) >= deleted_at:
+                        continue
+                    # زمان حذف همتا حفظ می‌شود تا با همتاهای دیگر هم درست مقایسه شود
+                    self.conn.execute("""
+                                      INSERT OR REPLACE INTO sync_tombstones (code, deleted_at, version)
+                                      VALUES (?, ?, ?)
+                                      """, (code, deleted_at, version))
+                after = self.version()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            result.update(inserted=len(inserts), updated=len(updates), deleted=len(removals),
+                          before=before, after=after)
+            self._after_apply(fuzzy, inserts, updates, removals)
+        finally:
+            if fuzzy:
+                fuzzy.close()
+        return result
+
+    def _after_apply(self, fuzzy, inserts, updates, removals):
+        """به‌روزرسانی کش deck و ایندکس تقریبی پس از commit"""
+        cache = self.cache
+        if cache:
+            for row in inserts:
+                cache.apply_insert(row["code"], row["words"], row["meaning"], row["review_intervals"],
+                                   row["count"], row["next_time_review"],
+                                   normalize_text(row["words"]), normalize_text(row["meaning"]))
+            for code, _, row in updates:
+                cache.apply_update(code, row["words"], row["meaning"], row["review_intervals"],
+                                   row["count"], row["next_time_review"])
+            for code, _ in removals:
+                cache.apply_delete(code)
+        if fuzzy is None:
+            return
+        try:
+            fuzzy.ensure_built()
+        except sqlite3.Error as e:
+            print(f"Error updating fuzzy index: {e}")
+
+    # -------------------- وضعیت همتاها --------------------
+    def peer_state(self, peer):
+        """(pulled, pushed) برای همتا؛ همتای جدید (-1, -1): همه ردیف‌ها"""
+        row = self.conn.execute("SELECT pulled, pushed FROM sync_peers WHERE peer = ?", (peer,)).fetchone()
+        return row or (-1, -1)
+
+    def save_peer_state(self, peer, pulled, pushed):
+        with self.conn:
+            self.conn.execute("""
+                              INSERT OR REPLACE INTO sync_peers (peer, pulled, pushed, synced_at)
+                              VALUES (?, ?, ?, ?)
+                              """, (peer, pulled, pushed, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    def peers(self):
+        return self.conn.execute("SELECT peer, pulled, pushed, synced_at FROM sync_peers ORDER BY peer").fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+# ======================= Peers =======================
+class FilePeer:
+    """همتا = فایل دیتابیس دیگر"""
+
+    def __init__(self, path):
+        self.store = SyncStore(path, update_indexes=False)
+
+    def changes_since(self, since, exclude=None):
+        return self.store.changes_since(since, exclude)
+
+    def apply(self, changes):
+        return self.store.apply(changes)
+
+    def close(self):
+        self.store.close()
+
+
+class HttpPeer:
+    """همتا = server.py روی دستگاه دیگر (/sync/changes)"""
+
+    def __init__(self, url, timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, request):
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def changes_since(self, since, exclude=None):
+        lo, hi = exclude or (0, 0)
+        return self._call(f"{self.url}/sync/changes?{urlencode({'since': since, 'lo': lo, 'hi': hi})}")
+
+    def apply(self, changes):
+        body = json.dumps(changes, ensure_ascii=False).encode("utf-8")
+        return self._call(Request(f"{self.url}/sync/changes", data=body, method="POST",
+                                  headers={"Content-Type": "application/json"}))
+
+    def close(self):
+        pass
+
+
+def open_peer(target):
+    if target.startswith(("http://", "https://")):
+        return HttpPeer(target)
+    return FilePeer(target)
+
+
+def sync(store, peer, peer_key):
+    """
+    هم‌گام‌سازی دوطرفه: ارسال تغییرات محلی، دریافت تغییرات همتا (بدون ردیف‌هایی که همین حالا فرستادیم)
+    و ذخیره نقطه‌های ادامه. خروجی: {"pushed": ..., "pulled": ...}
+    """
+    pulled, pushed = store.peer_state(peer_key)
+    with timer("sync.run"):
+        outgoing = store.changes_since(pushed)
+        push_result = peer.apply(outgoing)
+        incoming = peer.changes_since(pulled, (push_result["before"], push_result["after"]))
+        pull_result = store.apply(incoming)
+
+    # ردیف‌هایی که از همتا آمده‌اند دوباره برای او فرستاده نمی‌شوند، مگر اینکه در این فاصله
+    # نوشتن محلی دیگری هم انجام شده باشد
+    if pull_result["before"] == outgoing["until"]:
+        pushed = pull_result["after"]
+    else:
+        pushed = outgoing["until"]
+    store.save_peer_state(peer_key, incoming["until"], pushed)
+    return {"pushed": {"rows": len(outgoing["rows"]), "tombstones": len(outgoing["deleted"]), **push_result},
+            "pulled": {"rows": len(incoming["rows"]), "tombstones": len(incoming["deleted"]), **pull_result}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LexiMind delta sync")
+    parser.add_argument("--db", default=None)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    with_peer = sub.add_parser("with", help="sync with a database file or a server.py URL")
+    with_peer.add_argument("peer")
+    args = parser.parse_args(argv)
+
+    store = SyncStore(args.db)
+    try:
+        if args.command == "with":
+            peer = open_peer(args.peer)
+            try:
+                report = sync(store, peer, args.peer)
+            finally:
+                peer.close()
+            for direction in ("pushed", "pulled"):
+                r = report[direction]
+                print(f"{direction}: {r['rows']} rows, {r['tombstones']} deletions "
+                      f"(inserted {r['inserted']}, updated {r['updated']}, deleted {r['deleted']}, "
+                      f"kept {r['skipped']})")
+        print(f"device {store.device_id}, version {store.version()}")
+        for peer, pulled, pushed, synced_at in store.peers():
+            print(f"  {peer}: pulled {pulled}, pushed {pushed}, last sync {synced_at}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# test_history.py - Undo پس از مرور: ستون‌هایی که بعد از عملیات تغییر کرده‌اند برگردانده نمی‌شوند
+#
+#   python -m pytest tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from deck_cache import drop_cache
+import edit
+import review_engine
+from migrations import connect
+from review_engine import Grade
+
+
+class UndoAfterReviewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.dir, "flash cards.db")
+        conn = connect(self.db_path)
+        with conn:
+            conn.executemany("""
+                             INSERT INTO my_table (code, words, meaning, review_intervals, count, next_time_review)
+                             VALUES (?, ?, ?, ?, ?, ?)
+                             """, [(10, "computer", "رایانه", 60, 1, "2025-09-29 00:00:00"),
+                                   (11, "house", "خانه", 8, 3, "2025-09-30 00:00:00")])
+        conn.close()
+        self.db = edit.DatabaseManager(self.db_path)
+        self.reviews = review_engine.DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.reviews.close()
+        self.db.close()
+        drop_cache(self.db_path)
+        shutil.rmtree(self.dir)
+
+    def row(self, code):
+        return self.db.conn.execute("""
+                                    SELECT meaning, review_intervals, count, next_time_review
+                                    FROM my_table
+                                    WHERE code = ?
+                                    """, (code,)).fetchone()
+
+    def review(self, code, interval, next_review):
+        self.assertTrue(self.reviews.apply_review_batch(
+            [Grade(code, interval, 1, next_review, "pass", 500, "2026-10-19 10:00:00")]))
+
+    def test_edit_review_undo_keeps_review(self):
+        self.db.update_word(10, "computer", "کامپیوتر", 60, 1, "2025-09-29 00:00:00")
+        self.review(10, 120, "2027-06-01 00:00:00")
+
+        self.assertEqual(self.db.undo(), "Edit computer")
+        self.assertEqual(self.row(10), ("رایانه", 120, 1, "2027-06-01 00:00:00"))
+
+        self.assertEqual(self.db.redo(), "Edit computer")
+        self.assertEqual(self.row(10), ("کامپیوتر", 120, 1, "2027-06-01 00:00:00"))
+
+    def test_bulk_reschedule_undo_keeps_review(self):
+        self.db.bulk_reschedule("2030-01-01", codes=[10, 11])
+        self.review(11, 16, "2026-11-04 00:00:00")
+
+        self.db.undo()
+        self.assertEqual(self.row(10), ("رایانه", 60, 1, "2025-09-29 00:00:00"))
+        self.assertEqual(self.row(11), ("خانه", 16, 1, "2026-11-04 00:00:00"))
+
+    def external(self, sql, params=()):
+        """تغییر از اتصال دیگر (مثل sync)"""
+        conn = connect(self.db_path)
+        with conn:
+            conn.execute(sql, params)
+        conn.close()
+
+    def test_undo_delete_skips_code_added_since(self):
+        self.db.bulk_delete(codes=[10, 11])
+        self.external("""
+                      INSERT INTO my_table (code, words, meaning, review_intervals, count, next_time_review)
+                      VALUES (10, 'computer', 'synced', 4, 2, '2026-10-25 00:00:00')
+                      """)
+
+        self.db.undo()
+        rows = self.db.conn.execute("SELECT meaning FROM my_table WHERE code = 10").fetchall()
+        self.assertEqual(rows, [("synced",)])
+        self.assertEqual(self.row(11), ("خانه", 8, 3, "2025-09-30 00:00:00"))
+
+    def test_undo_reset_keeps_rows_deleted_since(self):
+        self.db.bulk_reset(codes=[10, 11])
+        self.external("DELETE FROM my_table WHERE code = 11")
+
+        self.db.undo()
+        self.assertEqual(self.row(10), ("رایانه", 60, 1, "2025-09-29 00:00:00"))
+        self.assertIsNone(self.row(11))
+
+
+if __name__ == "__main__":
+    unittest.main()
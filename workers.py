@@ -0,0 +1,167 @@
+# workers.py - اجرای کارهای دیتابیس خارج از thread رابط گرافیکی (QThreadPool + QRunnable)
+#
+# هر کار یک تابع است که در thread کارگر اجرا می‌شود و یک JobContext می‌گیرد. نتیجه با سیگنال
+# به thread رابط گرافیکی برگردانده می‌شود. کارها با یک key دسته‌بندی می‌شوند؛ ارسال کار جدید با
+# همان key کار قبلی را «منسوخ» می‌کند و نتیجه آن دیگر به UI تحویل داده نمی‌شود.
+#
+# نکته: اتصال sqlite3 قابل اشتراک بین thread ها نیست؛ هر کار باید DatabaseManager خودش را
+# باز و بسته کند (کمکی db_job همین کار را انجام می‌دهد). کش deck بین thread ها مشترک و قفل‌دار است.
+
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from instrument import timer
+
+# تعداد thread های کارگر؛ نوشتن در SQLite در هر حال سریالی است
+MAX_WORKER_THREADS = 2
+
+
+class JobCancelled(Exception):
+    """در کارهای طولانی با ctx.check() برای توقف زودهنگام کار منسوخ‌شده پرتاب می‌شود"""
+
+
+class JobContext:
+    """امکانات در اختیار تابع کار: بررسی لغو و ارسال نتایج جزئی (progress)"""
+
+    def __init__(self, executor, key, generation, signals):
+        self._executor = executor
+        self._key = key
+        self._generation = generation
+        self._signals = signals
+
+    def cancelled(self):
+        return not self._executor.is_current(self._key, self._generation)
+
+    def check(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    def progress(self, payload):
+        """ارسال نتیجه جزئی (مثلاً یک تکه از نتایج جستجو) به thread رابط گرافیکی"""
+        self._signals.progress.emit(self._key, self._generation, payload)
+
+
+class _JobSignals(QObject):
+    # key, generation, status ("ok" / "error" / "cancelled"), payload
+    done = pyqtSignal(object, int, str, object)
+    progress = pyqtSignal(object, int, object)
+
+
+class _Job(QRunnable):
+    def __init__(self, func, context, signals, key, generation):
+        super().__init__()
+        self.func = func
+        self.context = context
+        self.signals = signals
+        self.key = key
+        self.generation = generation
+
+    def run(self):
+        if self.context.cancelled():
+            self.signals.done.emit(self.key, self.generation, "cancelled", None)
+            return
+        try:
+            with timer(f"worker.{self.key}"):
+                result = self.func(self.context)
+        except JobCancelled:
+            self.signals.done.emit(self.key, self.generation, "cancelled", None)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.done.emit(self.key, self.generation, "error", e)
+        else:
+            self.signals.done.emit(self.key, self.generation, "ok", result)
+
+
+class QueryExecutor(QObject):
+    """صف کارهای دیتابیس با لغو کارهای منسوخ و سیگنال busy برای نشانگر مشغول بودن"""
+
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, max_threads=MAX_WORKER_THREADS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._generations = {}
+        self._callbacks = {}
+        self._pending = 0
+        # نگه‌داشتن ارجاع به سیگنال‌ها تا پایان کار (جلوگیری از حذف توسط GC)
+        self._signals = {}
+
+    def submit(self, key, func, on_result=None, on_error=None, on_progress=None):
+        """
+        اجرای func(ctx) در thread کارگر.
+        on_result(result) / on_error(exc) / on_progress(payload) در thread رابط گرافیکی صدا زده می‌شوند،
+        و فقط اگر کار تا آن لحظه با کار جدیدتری با همان key منسوخ نشده باشد.
+        """
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        signals = _JobSignals()
+        signals.done.connect(self._on_done)
+        if on_progress:
+            signals.progress.connect(self._on_progress)
+        self._signals[(key, generation)] = signals
+        self._callbacks[(key, generation)] = (on_result, on_error, on_progress)
+
+        context = JobContext(self, key, generation, signals)
+        self._set_pending(self._pending + 1)
+        self.pool.start(_Job(func, context, signals, key, generation))
+        return generation
+
+    def cancel(self, key):
+        """منسوخ کردن کار در حال اجرای key (نتیجه‌اش نادیده گرفته می‌شود)"""
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    def _on_progress(self, key, generation, payload):
+        callbacks = self._callbacks.get((key, generation))
+        if callbacks and callbacks[2] and self.is_current(key, generation):
+            callbacks[2](payload)
+
+    def _on_done(self, key, generation, status, payload):
+        on_result, on_error, _ = self._callbacks.pop((key, generation), (None, None, None))
+        self._signals.pop((key, generation), None)
+        self._set_pending(self._pending - 1)
+
+        if status == "cancelled" or not self.is_current(key, generation):
+            return
+        if status == "ok" and on_result:
+            on_result(payload)
+        elif status == "error" and on_error:
+            on_error(payload)
+
+    def _set_pending(self, value):
+        was_busy = self._pending > 0
+        self._pending = value
+        if was_busy != (value > 0):
+            self.busy_changed.emit(value > 0)
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def shutdown(self, timeout_ms=3000):
+        """لغو همه کارها و انتظار برای پایان thread ها (هنگام بستن صفحه)"""
+        for key in list(self._generations):
+            self.cancel(key)
+        self.pool.waitForDone(timeout_ms)
+
+
+def db_job(factory, func):
+    """
+    ساخت تابع کار که یک DatabaseManager مخصوص thread کارگر باز می‌کند، func(db, ctx) را اجرا
+    و سپس اتصال را می‌بندد.
+    """
+
+    def job(ctx):
+        db = factory()
+        try:
+            return func(db, ctx)
+        finally:
+            db.close()
+
+    return job